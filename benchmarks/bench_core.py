@@ -0,0 +1,28 @@
+"""
+Benchmarks for app.core.utils.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.core.utils import cgroup_cpu_limit, cgroup_memory_limit, format_version_info, get_system_info, probe_capabilities
+
+
+def bench_get_system_info():
+    get_system_info()
+
+
+def bench_probe_capabilities_cached():
+    probe_capabilities()
+
+
+def bench_cgroup_limits():
+    cgroup_cpu_limit()
+    cgroup_memory_limit()
+
+
+def bench_format_version_info():
+    format_version_info("3.13.5")
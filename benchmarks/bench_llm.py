@@ -0,0 +1,86 @@
+"""
+Benchmarks for the app.llm helpers on the scripts' per-turn path.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import ChatGeneration
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
+from pydantic import BaseModel
+
+from app.llm.cache import SQLiteLLMCache, cache_key
+from app.llm.history import SlidingWindow, TokenBudget
+from app.llm.prompts import PromptRegistry
+from app.llm.streaming import StreamingPydanticParser
+
+
+class Country(BaseModel):
+    name: str
+    capital: str
+    population: int
+    languages: List[str]
+
+
+CONVERSATION = [
+    HumanMessage(content=f"message {i} " + "lorem ipsum " * 20) if i % 2 == 0 else AIMessage(content=f"reply {i}")
+    for i in range(100)
+]
+PROMPT = dumps(CONVERSATION[-6:])
+LLM_STRING = "fake-chat-model:latency=0"
+COUNTRY_JSON = '{"name": "France", "capital": "Paris", "population": 68000000, "languages": ["French"]}'
+
+PROMPT_COUNTRY_INFO = "Provide information about {country}.\n{format_instructions}"
+COUNTRY_NAMES = [{"country": f"country {i}"} for i in range(100)]
+
+_prompts = PromptRegistry()
+_country_prompt = _prompts.register("country", PROMPT_COUNTRY_INFO, model=Country)
+
+_cache = SQLiteLLMCache(Path(tempfile.mkdtemp()) / "bench_cache.sqlite")
+_cache.update(PROMPT, LLM_STRING, [ChatGeneration(message=AIMessage(content="cached"))])
+
+
+def bench_cache_key():
+    cache_key(PROMPT, LLM_STRING)
+
+
+def bench_cache_memory_hit():
+    _cache.lookup(PROMPT, LLM_STRING)
+
+
+def bench_sliding_window():
+    SlidingWindow(20)(CONVERSATION)
+
+
+def bench_token_budget():
+    TokenBudget(2000)(CONVERSATION)
+
+
+def bench_streaming_parser():
+    parser = StreamingPydanticParser(Country)
+    for i in range(0, len(COUNTRY_JSON), 8):
+        parser.feed(COUNTRY_JSON[i:i + 8])
+    parser.finish()
+
+
+def bench_prompt_per_call():
+    # What the scripts did before the registry: build everything for each prompt.
+    parser = PydanticOutputParser(pydantic_object=Country)
+    prompt = ChatPromptTemplate.from_messages([HumanMessagePromptTemplate.from_template(PROMPT_COUNTRY_INFO)])
+    prompt.format_prompt(country="France", format_instructions=parser.get_format_instructions()).to_messages()
+
+
+def bench_prompt_compiled():
+    _country_prompt.format_messages(country="France")
+
+
+def bench_prompt_format_many_100():
+    _country_prompt.format_many(COUNTRY_NAMES)
@@ -0,0 +1,69 @@
+"""
+Benchmarks for hot functions in scripts/ (run against the local fake chat model).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Add src and the script directories to the Python path
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts" / "langchain"))
+sys.path.insert(0, str(ROOT / "scripts" / "langgraph"))
+sys.path.insert(0, str(ROOT / "scripts" / "news"))
+
+from articles import extract_text
+from countries_example import build_chain
+from pydantic_bulk import per_object, sample_rows, validate_json_array
+from pydantic_examples import DataPoint, DataPointSeries, Product
+from router import build_graph
+
+from app.llm.fake import FakeChatModel
+
+RECORDS = [
+    {"time": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}", "value": i * 0.5, "unit": ("C", "F")[i % 2]}
+    for i in range(1000)
+]
+PRODUCT_LINES = [json.dumps(r).encode("utf-8") for r in sample_rows(Product, 1000)]
+PRODUCT_ARRAY = b"[" + b",".join(PRODUCT_LINES) + b"]"
+
+# A news page of about 60 KB: scripts and navigation, then the story.
+ARTICLE_HTML = (
+    "<html><head><script>" + "var x = 1;" * 2000 + "</script></head><body><nav>"
+    + "<li><a href='/'>Section</a></li>" * 200 + "</nav><article>"
+    + "<p>The committee published its findings after a two year review of the program.</p>" * 300
+    + "</article></body></html>"
+)
+
+_router = build_graph(FakeChatModel())
+_countries = build_chain(FakeChatModel(reply_fn=lambda prompt: '{"name": "Chile", "capital": "Santiago"}'))
+
+
+def bench_datapoint_per_object_1k():
+    [DataPoint.from_dict(r).to_dict() for r in RECORDS]
+
+
+def bench_datapoint_series_1k():
+    DataPointSeries.from_records(RECORDS).to_records()
+
+
+def bench_product_per_object_1k():
+    per_object(Product, PRODUCT_LINES)
+
+
+def bench_product_bulk_1k():
+    validate_json_array(Product, PRODUCT_ARRAY)
+
+
+def bench_router_turn():
+    _router.invoke({"messages": [{"role": "user", "content": "I feel anxious about tomorrow"}], "message_type": None})
+
+
+def bench_countries_chain():
+    _countries.invoke({"country": "Chile"})
+
+
+def bench_extract_article_text():
+    extract_text(ARTICLE_HTML)
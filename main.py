@@ -1,30 +1,59 @@
 #!/usr/bin/env python3
 """
 Main entry point for the UV Tests application.
+
+Each subcommand runs one of the tools under ``scripts/``. Nothing heavy
+(torch, transformers, langchain, ...) is imported until a subcommand is
+chosen, so ``--help`` and ``info`` start instantly.
+
+    python main.py                 # same as: python main.py info
+    python main.py news --port 8000
+    python main.py router --history tokens:2000
+    python main.py countries --bulk names.txt
+    python main.py smol "list the files in this repo"
+    python main.py bench compare benchmarks/baseline.json
 """
 
+import argparse
 import sys
 from pathlib import Path
 
+ROOT = Path(__file__).parent
+
 # Add src directory to Python path
-src_path = Path(__file__).parent / "src"
+src_path = ROOT / "src"
 sys.path.insert(0, str(src_path))
 
-from app.core.utils import get_python_version, get_system_info, format_version_info
+# Subcommands that run a script as __main__, passing the remaining arguments through.
+SCRIPTS = {
+    "router": ("scripts/langgraph/router.py", "interactive emotional/logical router chatbot"),
+    "router-service": ("scripts/langgraph/router_service.py", "serve the router graph over HTTP/WebSocket"),
+    "router-batch": ("scripts/langgraph/router_batch.py", "route a JSONL file of messages"),
+    "countries": ("scripts/langchain/countries_example.py", "look up country capitals (single or --bulk)"),
+    "smol": ("scripts/smol/smol.py", "run the smolagents coding agent on a prompt, or serve it"),
+    "smol-client": ("scripts/smol/daemon.py", "send a prompt to a running smol agent daemon"),
+}
 
+# Subcommands that run a package under src/ as ``python -m``.
+MODULES = {
+    "bench": ("app.bench", "run micro-benchmarks and compare them with a baseline"),
+}
+
+
+def info():
+    """Print Python and system information."""
+    from app.core.utils import get_python_version, get_system_info, format_version_info
 
-def main():
-    """Main application function."""
     print("=== UV Tests Application ===")
-    
+
     # Get and display Python version
     version = get_python_version()
     print(f"Python Version: {version}")
-    
+
     # Display formatted version
     formatted = format_version_info(version)
     print(f"Formatted: {formatted}")
-    
+
     # Display system information
     print("\nSystem Information:")
     info = get_system_info()
@@ -33,9 +62,72 @@ def main():
             print(f"  {key}: {len(value)} paths")
         else:
             print(f"  {key}: {value}")
-    
+
     print("\n=== Application Complete ===")
 
 
+def news(host: str, port: int):
+    """Serve the news briefing API."""
+    import importlib.util
+
+    import uvicorn
+
+    path = ROOT / "scripts" / "news" / "main.py"
+    spec = importlib.util.spec_from_file_location("news_main", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, str(path.parent))
+    spec.loader.exec_module(module)
+    uvicorn.run(module.app, host=host, port=port)
+
+
+def run_script(relative_path: str, argv: list):
+    """Run a script as ``__main__`` with ``argv``, as if it were invoked directly."""
+    import runpy
+
+    path = ROOT / relative_path
+    # Scripts import their siblings (e.g. router_service imports router).
+    sys.path.insert(0, str(path.parent))
+    sys.argv = [str(path), *argv]
+    runpy.run_path(str(path), run_name="__main__")
+
+
+def run_module(module: str, argv: list):
+    """Run ``python -m module`` with ``argv``."""
+    import runpy
+
+    sys.argv = [module, *argv]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="UV Tests tools")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("info", help="show Python and system information")
+    news_parser = commands.add_parser("news", help="serve the AI news briefing API")
+    news_parser.add_argument("--host", default="127.0.0.1")
+    news_parser.add_argument("--port", type=int, default=8000)
+    for name, (_, help_text) in {**SCRIPTS, **MODULES}.items():
+        # The script parses its own arguments, including --help.
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    """Main application function."""
+    args, rest = build_parser().parse_known_args(argv)
+    if args.command in SCRIPTS:
+        run_script(SCRIPTS[args.command][0], rest)
+        return
+    if args.command in MODULES:
+        run_module(MODULES[args.command][0], rest)
+        return
+    if rest:
+        build_parser().error(f"unrecognized arguments: {' '.join(rest)}")
+    if args.command == "news":
+        news(args.host, args.port)
+    else:
+        info()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,14 +1,24 @@
+import argparse
+import csv
+import io
+import json
 import os
+import sys
+from pathlib import Path
+from typing import Iterable, List, Set
 
 from langchain_openai import ChatOpenAI
-from langchain.prompts.chat import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-)
-from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from app.llm.cache import cached_stream, enable_llm_cache
+from app.llm.prompts import prompts
+from app.llm.ratelimit import BATCH, limit_chat_model
+from app.llm.streaming import parse_stream
+
 
 # Define your desired data structure.
 class Country(BaseModel):
@@ -26,33 +36,122 @@ PROMPT_COUNTRY_INFO = """
     {format_instructions}
     """
 
+# Compiled once, with the format instructions for ``Country`` already filled in.
+country_prompt = prompts.register("country_info", PROMPT_COUNTRY_INFO, model=Country)
+
+
+def build_chain(llm):
+    """Prompt -> model -> parser chain producing ``Country`` objects."""
+    return country_prompt.chain(llm)
+
+
+def read_names(path: str) -> List[str]:
+    """Read one country name per line, skipping blanks and duplicates."""
+    with open(path, encoding="utf-8") as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+
+def done_names(out_path: str) -> Set[str]:
+    """Return the queries already present in a previous bulk output file.
+
+    A partially written last row (from a crash mid-write) is cut off so new
+    rows are appended on a clean line boundary.
+    """
+    if not os.path.exists(out_path):
+        return set()
+    with open(out_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    text = data[:end].decode("utf-8")
+    if out_path.endswith(".csv"):
+        return {row["query"] for row in csv.DictReader(io.StringIO(text, newline=""))}
+    done = set()
+    for line in text.splitlines():
+        try:
+            done.add(json.loads(line)["query"])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return done
+
+
+def bulk_lookup(chain, names: Iterable[str], out_path: str, concurrency: int = 8) -> dict:
+    """Look up many countries concurrently, appending rows as they complete.
+
+    Rows are written as JSONL, or CSV when ``out_path`` ends in ``.csv``.
+    Names already in ``out_path`` are skipped, so a rerun only fetches the
+    missing ones; failures are reported and left out so they are retried.
+    """
+    done = done_names(out_path)
+    stats = {"skipped": 0, "fetched": 0, "failed": 0}
+    pending = []
+    for name in names:
+        if name in done:
+            stats["skipped"] += 1
+        else:
+            pending.append(name)
+    if not pending:
+        return stats
+
+    is_csv = out_path.endswith(".csv")
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    with open(out_path, "a", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=["query", *Country.model_fields]) if is_csv else None
+        if writer and new_file:
+            writer.writeheader()
+        results = chain.batch_as_completed(
+            [{"country": name} for name in pending],
+            config={"max_concurrency": concurrency},
+            return_exceptions=True,
+        )
+        for index, result in results:
+            if isinstance(result, Exception):
+                stats["failed"] += 1
+                print(f"Failed {pending[index]!r}: {result}", file=sys.stderr)
+                continue
+            row = {"query": pending[index], **result.model_dump()}
+            if writer:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            stats["fetched"] += 1
+    return stats
+
 
 def main():
-    # Set up a parser + inject instructions into the prompt template.
-    parser = PydanticOutputParser(pydantic_object=Country)
+    enable_llm_cache()
 
     # setup the chat model
     llm = ChatOpenAI(openai_api_key=OPENAI_API_KEY, model_name=OPENAI_MODEL)
-    message = HumanMessagePromptTemplate.from_template(
-        template=PROMPT_COUNTRY_INFO,
-    )
-    chat_prompt = ChatPromptTemplate.from_messages([message])
 
     # get user input
     country_name = input("Enter the name of a country: ")
 
     # generate the response
     print("Generating response...")
-    chat_prompt_with_values = chat_prompt.format_prompt(
-        country=country_name, format_instructions=parser.get_format_instructions()
-    )
-    #output = llm(chat_prompt_with_values.to_messages())
-    output = llm.invoke(chat_prompt_with_values.to_messages())
-    country = parser.parse(output.content)
+    messages = country_prompt.format_messages(country=country_name)
+    # Stream the answer so a malformed reply is rejected as soon as it goes wrong.
+    country = parse_stream(cached_stream(llm, messages), Country)
 
     # print the response
     print(f"The capital of {country.name} is {country.capital}.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Look up country capitals")
+    arg_parser.add_argument("--bulk", metavar="NAMES_FILE", help="file with one country name per line")
+    arg_parser.add_argument("--out", default="countries.jsonl", help="bulk output (.jsonl or .csv)")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="concurrent model calls in bulk mode")
+    args = arg_parser.parse_args()
+
+    if args.bulk:
+        enable_llm_cache()
+        llm = limit_chat_model(
+            ChatOpenAI(openai_api_key=OPENAI_API_KEY, model_name=OPENAI_MODEL, max_retries=0), priority=BATCH
+        )
+        stats = bulk_lookup(build_chain(llm), read_names(args.bulk), args.out, args.concurrency)
+        print(f"fetched={stats['fetched']} failed={stats['failed']} skipped={stats['skipped']}")
+    else:
+        main()
\ No newline at end of file
@@ -1,14 +1,18 @@
 import os
+import sys
+from pathlib import Path
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-)
-from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from app.llm.cache import cached_stream, enable_llm_cache
+from app.llm.prompts import prompts
+from app.llm.streaming import parse_stream
+
 
 # Define your desired data structure.
 class Memory(BaseModel):
@@ -26,32 +30,28 @@ PROMPT_MEMORY_INFO = """
     {format_instructions}
     """
 
+# Compiled once, with the format instructions for ``Memory`` already filled in.
+memory_prompt = prompts.register("memory_info", PROMPT_MEMORY_INFO, model=Memory)
+
 
 def main():
-    # Set up a parser + inject instructions into the prompt template.
-    parser = PydanticOutputParser(pydantic_object=Memory)
+    enable_llm_cache()
 
     # setup the chat model
     llm = ChatOpenAI(openai_api_key=OPENAI_API_KEY, model_name=OPENAI_MODEL)
-    message = HumanMessagePromptTemplate.from_template(
-        template=PROMPT_MEMORY_INFO,
-    )
-    chat_prompt = ChatPromptTemplate.from_messages([message])
 
     # get user input
     topic = input("Enter the topic for the facts: ")
 
     # generate the response
     print("Generating response...")
-    chat_prompt_with_values = chat_prompt.format_prompt(
-        topic=topic, format_instructions=parser.get_format_instructions()
-    )
-    #output = llm(chat_prompt_with_values.to_messages())
-    output = llm.invoke(chat_prompt_with_values.to_messages())
-    memory = parser.parse(output.content)
-
-    # print the response
-    print(f"The 5 insights about {topic} are: \n{memory.result}.")
+    messages = memory_prompt.format_messages(topic=topic)
+    # print the insights as soon as that field is complete, not after the whole answer
+    def show(name, value):
+        if name == "result":
+            print(f"The 5 insights about {topic} are: \n{value}.")
+
+    parse_stream(cached_stream(llm, messages), Memory, on_field=show)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,7 @@
 import os
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,9 +15,13 @@ from langchain_core.prompts import (
     SystemMessagePromptTemplate,
     AIMessagePromptTemplate
 )
-from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from app.llm.prompts import prompts
+
 # Example 1: Basic HumanMessagePromptTemplate
 def basic_human_message_example():
     """Simple example of HumanMessagePromptTemplate"""
@@ -90,34 +97,28 @@ def multi_message_conversation():
     print(f"Multi-message prompt: {formatted_prompt}")
     print()
 
+# Data structure for example 4, at module level so its format instructions are cached once
+class ProgrammingTip(BaseModel):
+    tip: str = Field(description="A useful programming tip")
+    language: str = Field(description="Programming language this tip applies to")
+    difficulty: str = Field(description="Beginner, Intermediate, or Advanced")
+
 # Example 4: Using with Pydantic models (like your original code)
 def pydantic_integration_example():
     """Integration with Pydantic models for structured output"""
     print("=== Example 4: Pydantic Integration ===")
     
-    # Define your data structure
-    class ProgrammingTip(BaseModel):
-        tip: str = Field(description="A useful programming tip")
-        language: str = Field(description="Programming language this tip applies to")
-        difficulty: str = Field(description="Beginner, Intermediate, or Advanced")
-    
-    # Create parser
-    parser = PydanticOutputParser(pydantic_object=ProgrammingTip)
-    
-    # Create prompt template
-    human_message = HumanMessagePromptTemplate.from_template(
-        "Give me a programming tip about {topic}. {format_instructions}"
+    # Compiled once; the parser's format instructions are filled in at registration
+    tip_prompt = prompts.register(
+        "programming_tip",
+        "Give me a programming tip about {topic}. {format_instructions}",
+        model=ProgrammingTip,
     )
     
-    chat_prompt = ChatPromptTemplate.from_messages([human_message])
-    
-    # Format with parser instructions
-    formatted_prompt = chat_prompt.format_prompt(
-        topic="Python decorators",
-        format_instructions=parser.get_format_instructions()
-    )
+    # Format with only the remaining variables
+    formatted_messages = tip_prompt.format_messages(topic="Python decorators")
     
-    print(f"Pydantic prompt: {formatted_prompt}")
+    print(f"Pydantic prompt: {formatted_messages}")
     print()
 
 # Example 5: Dynamic conversation building
@@ -0,0 +1,238 @@
+"""
+Bulk JSON/JSONL ingestion for the models in pydantic_examples.py.
+
+Building models one at a time from Python kwargs crosses into pydantic-core
+once per object. Here each chunk of rows is validated straight from JSON
+bytes by a cached ``TypeAdapter(list[Model])``, so parsing and validation
+(custom validators included) run in a single call. A bad row does not fail
+the batch: it is reported in ``BulkResult.errors`` with its row number and
+the rest of the chunk is still returned.
+
+    python scripts/langchain/pydantic_bulk.py --rows 100000
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Annotated, Any, BinaryIO, Dict, Iterable, Iterator, List, Sequence, Type, TypeVar, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError, WrapValidator
+
+from pydantic_examples import Company, Product, User
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@dataclass
+class RowError:
+    row: int
+    """Zero-based row (array index or JSONL line among non-blank lines)."""
+    errors: List[Dict[str, Any]]
+
+
+@dataclass
+class BulkResult:
+    items: List[BaseModel] = field(default_factory=list)
+    rows: List[int] = field(default_factory=list)
+    """Row number of each item in ``items``."""
+    errors: List[RowError] = field(default_factory=list)
+
+    def extend(self, other: "BulkResult") -> None:
+        self.items.extend(other.items)
+        self.rows.extend(other.rows)
+        self.errors.extend(other.errors)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[M]) -> TypeAdapter:
+    """Cached ``TypeAdapter(list[model])``; building one compiles a validator."""
+    return TypeAdapter(list[model])
+
+
+class _Invalid:
+    __slots__ = ("errors",)
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+
+
+def _keep_errors(value: Any, handler) -> Any:
+    try:
+        return handler(value)
+    except ValidationError as e:
+        return _Invalid(e.errors(include_url=False))
+
+
+@lru_cache(maxsize=None)
+def _tolerant_adapter(model: Type[M]) -> TypeAdapter:
+    # Invalid rows become _Invalid markers instead of failing the whole list.
+    return TypeAdapter(list[Annotated[model, WrapValidator(_keep_errors)]])
+
+
+def validate_json_array(model: Type[M], data: Union[str, bytes], first_row: int = 0,
+                        expect_errors: bool = False) -> BulkResult:
+    """Validate a JSON array of ``model`` objects, collecting per-row errors.
+
+    The strict list validator is tried first; if any row fails, the array is
+    validated again with a per-row error-catching validator. Pass
+    ``expect_errors`` to skip straight to the second. Raises
+    ``ValidationError`` only when ``data`` is not a JSON array at all.
+    """
+    if not expect_errors:
+        try:
+            items = list_adapter(model).validate_json(data)
+            return BulkResult(items=items, rows=list(range(first_row, first_row + len(items))))
+        except ValidationError:
+            pass
+
+    result = BulkResult()
+    for i, value in enumerate(_tolerant_adapter(model).validate_json(data), first_row):
+        if isinstance(value, _Invalid):
+            result.errors.append(RowError(i, value.errors))
+        else:
+            result.items.append(value)
+            result.rows.append(i)
+    return result
+
+
+def _validate_each_line(model: Type[M], lines: Sequence[bytes], first_row: int) -> BulkResult:
+    result = BulkResult()
+    for i, line in enumerate(lines, first_row):
+        try:
+            result.items.append(model.model_validate_json(line))
+            result.rows.append(i)
+        except ValidationError as e:
+            result.errors.append(RowError(i, e.errors(include_url=False)))
+    return result
+
+
+def _validate_lines(model: Type[M], lines: Sequence[bytes], first_row: int, expect_errors: bool) -> BulkResult:
+    try:
+        result = validate_json_array(model, b"[" + b",".join(lines) + b"]", first_row, expect_errors)
+    except ValidationError:
+        # Some line is not valid JSON, so the chunk cannot be parsed as one array.
+        return _validate_each_line(model, lines, first_row)
+    if len(result.items) + len(result.errors) != len(lines):
+        # A line such as ``{...}, {...}`` joined into extra rows; row numbers would shift.
+        return _validate_each_line(model, lines, first_row)
+    return result
+
+
+def iter_jsonl(model: Type[M], stream: Union[BinaryIO, Iterable[Union[str, bytes]]],
+               chunk_size: int = 1000) -> Iterator[BulkResult]:
+    """Validate a JSONL stream ``chunk_size`` lines at a time.
+
+    Only one chunk of raw lines and its models are held in memory, so
+    arbitrarily large files can be processed. Blank lines are skipped and do
+    not count as rows.
+    """
+    chunk: List[bytes] = []
+    row = 0
+    dirty = False
+    for line in stream:
+        line = line.encode("utf-8") if isinstance(line, str) else line
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            result = _validate_lines(model, chunk, row, dirty)
+            # Once a chunk has bad rows, later ones probably do too.
+            dirty = bool(result.errors)
+            yield result
+            row += len(chunk)
+            chunk = []
+    if chunk:
+        yield _validate_lines(model, chunk, row, dirty)
+
+
+def load_jsonl(model: Type[M], path: str, chunk_size: int = 1000) -> BulkResult:
+    """Validate a whole JSONL file into one ``BulkResult``."""
+    result = BulkResult()
+    with open(path, "rb") as f:
+        for chunk in iter_jsonl(model, f, chunk_size):
+            result.extend(chunk)
+    return result
+
+
+# -- benchmark ---------------------------------------------------------------
+
+def sample_rows(model: Type[BaseModel], n: int, invalid_every: int = 0) -> List[Dict[str, Any]]:
+    """Generate ``n`` rows for ``model``; every ``invalid_every``-th row is invalid."""
+    rows = []
+    for i in range(n):
+        if model is User:
+            row = {"name": f"User {i}", "email": f"user{i}@example.com", "age": i % 100}
+        elif model is Company:
+            row = {"name": f"Company {i}", "industry": "Technology", "founded_year": 1900 + i % 120,
+                   "address": {"street": f"{i} Main St", "city": "Springfield", "country": "USA",
+                               "postal_code": f"{i % 100000:05d}"}}
+        elif model is Product:
+            row = {"name": f"Product {i}", "price": 1 + i % 50, "category": "Books",
+                   "tags": ["python", f"tag{i % 10}"]}
+        else:
+            raise ValueError(f"No sample rows for {model.__name__}")
+        if invalid_every and i % invalid_every == invalid_every - 1:
+            row["name" if model is Product else "age" if model is User else "founded_year"] = (
+                "lowercase name" if model is Product else -1
+            )
+        rows.append(row)
+    return rows
+
+
+def per_object(model: Type[BaseModel], lines: Iterable[bytes]) -> BulkResult:
+    """The existing path: decode each line and build the model from kwargs."""
+    result = BulkResult()
+    for i, line in enumerate(lines):
+        try:
+            result.items.append(model(**json.loads(line)))
+            result.rows.append(i)
+        except ValidationError as e:
+            result.errors.append(RowError(i, e.errors(include_url=False)))
+    return result
+
+
+def benchmark(rows: int = 100_000, chunk_size: int = 1000, invalid_every: int = 100) -> List[Dict[str, Any]]:
+    """Time per-object and bulk validation of the same JSONL lines for each model."""
+    results = []
+    for model in (User, Company, Product):
+        lines = [json.dumps(r).encode("utf-8") for r in sample_rows(model, rows, invalid_every)]
+
+        start = time.perf_counter()
+        slow = per_object(model, lines)
+        per_object_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = BulkResult()
+        for chunk in iter_jsonl(model, lines, chunk_size):
+            fast.extend(chunk)
+        bulk_s = time.perf_counter() - start
+
+        assert fast.rows == slow.rows and [e.row for e in fast.errors] == [e.row for e in slow.errors]
+        results.append({
+            "model": model.__name__,
+            "rows": rows,
+            "errors": len(fast.errors),
+            "per_object_s": round(per_object_s, 3),
+            "bulk_s": round(bulk_s, 3),
+            "speedup": round(per_object_s / bulk_s, 1),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bulk JSONL validation against per-object construction")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--invalid-every", type=int, default=100, help="make every Nth row invalid (0 = none)")
+    args = parser.parse_args(argv)
+
+    for r in benchmark(args.rows, args.chunk_size, args.invalid_every):
+        print(f"{r['model']:>8}: per-object {r['per_object_s']:.3f}s, bulk {r['bulk_s']:.3f}s "
+              f"({r['speedup']}x, {r['errors']} invalid rows of {r['rows']})")
+
+
+if __name__ == "__main__":
+    main()
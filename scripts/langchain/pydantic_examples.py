@@ -1,8 +1,11 @@
+import json
 import os
+import re
+import numpy as np
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, TypeAdapter, field_validator, ConfigDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from datetime import datetime, timezone
 
 # Load environment variables
 load_dotenv()
@@ -91,6 +94,157 @@ class DataPoint(BaseModel):
             unit=data["unit"]
         )
 
+# Naive ISO strings numpy parses exactly as pydantic does; anything else goes through pydantic.
+_NAIVE_ISO = re.compile(r"\d{4}-\d\d-\d\d(?:[T ]\d\d:\d\d(?::\d\d(?:\.\d{1,6})?)?)?|NaT")
+_DATETIME = TypeAdapter(datetime)
+
+def _to_datetime64(times: Sequence[Any]) -> np.ndarray:
+    """Parse timestamps into UTC ``datetime64[us]`` the way ``DataPoint`` does, vectorized when possible.
+
+    Naive ISO strings take numpy's parser. Everything else (offsets, epoch
+    numbers, datetimes) is validated like ``DataPoint.timestamp`` and
+    converted to UTC.
+    """
+    if isinstance(times, np.ndarray) and times.dtype.kind == "M":
+        return times.astype("datetime64[us]")
+    times = times.tolist() if isinstance(times, np.ndarray) else list(times)
+    if all(isinstance(t, str) and _NAIVE_ISO.fullmatch(t) for t in times):
+        try:
+            return np.asarray(times, dtype="datetime64[us]")
+        except ValueError:
+            pass  # e.g. month 13; report it the way pydantic does
+    parsed = []
+    for t in times:
+        t = _DATETIME.validate_python(t)
+        if t.tzinfo is not None:
+            t = t.astimezone(timezone.utc).replace(tzinfo=None)
+        parsed.append(t)
+    return np.array(parsed, dtype="datetime64[us]")
+
+class DataPointSeries:
+    """Columnar companion to ``DataPoint`` for large series.
+
+    Timestamps are a ``datetime64[us]`` array (timezone-aware input is
+    converted to UTC), values a ``float64`` array and units a categorical
+    column: ``unit_codes`` indexes into the ``units`` tuple. Validation and
+    conversion work on whole columns; ``DataPoint`` objects are only built
+    when a single row is indexed or the series is iterated. Slicing returns
+    a series that shares the underlying arrays.
+    """
+
+    __slots__ = ("timestamps", "values", "unit_codes", "units")
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, unit_codes: np.ndarray, units: Sequence[str]):
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        self.values = np.asarray(values, dtype=np.float64)
+        self.unit_codes = np.asarray(unit_codes, dtype=np.int32)
+        self.units = tuple(units)
+        self._validate()
+
+    def _validate(self):
+        n = len(self.timestamps)
+        if self.timestamps.ndim != 1 or self.values.shape != (n,) or self.unit_codes.shape != (n,):
+            raise ValueError("timestamps, values and unit_codes must be 1-D arrays of the same length")
+        if np.isnat(self.timestamps).any():
+            raise ValueError(f"Missing timestamp at rows {np.flatnonzero(np.isnat(self.timestamps))[:10].tolist()}")
+        bad = (self.unit_codes < 0) | (self.unit_codes >= len(self.units))
+        if bad.any():
+            raise ValueError(f"Unknown unit code at rows {np.flatnonzero(bad)[:10].tolist()}")
+        if not all(isinstance(u, str) for u in self.units):
+            raise ValueError("units must be strings")
+
+    @classmethod
+    def from_columns(cls, timestamps: Sequence[Any], values: Sequence[float], units: Union[str, Sequence[str]]):
+        """Build from column sequences; ``units`` may be a single unit for every row."""
+        timestamps = _to_datetime64(timestamps)
+        if isinstance(units, str):
+            return cls(timestamps, values, np.zeros(len(timestamps), dtype=np.int32), (units,))
+        # Categories in order of first appearance; one dict lookup per row.
+        categories: Dict[str, int] = {}
+        codes = np.fromiter((categories.setdefault(u, len(categories)) for u in units), dtype=np.int32,
+                            count=len(units))
+        return cls(timestamps, values, codes, list(categories))
+
+    @classmethod
+    def from_points(cls, points: Iterable[DataPoint]):
+        points = list(points)
+        return cls.from_columns(
+            [p.timestamp for p in points], [p.value for p in points], [p.unit for p in points]
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]):
+        """Build from ``DataPoint.to_dict``-style records (``time``/``value``/``unit``)."""
+        records = list(records)
+        return cls.from_columns(
+            [r["time"] for r in records], [r["value"] for r in records], [r["unit"] for r in records]
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Sequence[Any]]):
+        """Build from the columnar ``{"time": [...], "value": [...], "unit": [...]}`` format."""
+        return cls.from_columns(data["time"], data["value"], data["unit"])
+
+    @classmethod
+    def from_json(cls, text: Union[str, bytes]):
+        """Parse columnar JSON or a JSON array of records."""
+        data = json.loads(text)
+        return cls.from_records(data) if isinstance(data, list) else cls.from_dict(data)
+
+    def _time_strings(self) -> np.ndarray:
+        whole_seconds = not (self.timestamps.astype(np.int64) % 1_000_000).any()
+        return np.datetime_as_string(self.timestamps, unit="s" if whole_seconds else "us")
+
+    def unit_column(self) -> np.ndarray:
+        return np.asarray(self.units, dtype=object)[self.unit_codes]
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        """Columnar dictionary, the inverse of ``from_dict``."""
+        return {
+            "time": self._time_strings().tolist(),
+            "value": self.values.tolist(),
+            "unit": self.unit_column().tolist(),
+        }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Row dictionaries in the ``DataPoint.to_dict`` format."""
+        return [
+            {"time": t, "value": v, "unit": u}
+            for t, v, u in zip(self._time_strings().tolist(), self.values.tolist(), self.unit_column().tolist())
+        ]
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def point(self, i: int) -> DataPoint:
+        """Build the ``DataPoint`` for row ``i``."""
+        return DataPoint.model_construct(
+            timestamp=self.timestamps[i].item(),
+            value=float(self.values[i]),
+            unit=self.units[self.unit_codes[i]],
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.point(key)
+        # Basic slices share memory with this series; masks and index arrays copy.
+        series = object.__new__(DataPointSeries)
+        series.timestamps = self.timestamps[key]
+        series.values = self.values[key]
+        series.unit_codes = self.unit_codes[key]
+        series.units = self.units
+        return series
+
+    def __iter__(self) -> Iterator[DataPoint]:
+        for i in range(len(self)):
+            yield self.point(i)
+
+    def __repr__(self) -> str:
+        return f"DataPointSeries(len={len(self)}, units={list(self.units)})"
+
 # Example 7: Error Handling and Validation
 def demonstrate_validation():
     """Show how Pydantic handles validation errors"""
@@ -199,6 +353,32 @@ def demonstrate_config_management():
     except Exception as e:
         print(f"❌ Config loading failed: {e}")
 
+# Example 10: Columnar Series
+def demonstrate_columnar_series(n: int = 100_000):
+    """Compare per-object DataPoint conversion with DataPointSeries"""
+    import time
+
+    print("\n=== Columnar Series Example ===\n")
+
+    records = [
+        {"time": f"2024-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}", "value": i * 0.1,
+         "unit": ("C", "F")[i % 2]}
+        for i in range(n)
+    ]
+
+    start = time.perf_counter()
+    per_object = [DataPoint.from_dict(r).to_dict() for r in records]
+    per_object_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    series = DataPointSeries.from_records(records)
+    columnar = series.to_records()
+    columnar_s = time.perf_counter() - start
+
+    assert columnar == per_object
+    print(f"✅ {n} points: per-object {per_object_s:.3f}s, columnar {columnar_s:.3f}s")
+    print(f"   {series}, mean value {series.values.mean():.2f}, first point {series[0]}")
+
 if __name__ == "__main__":
     print("Pydantic Examples and Use Cases\n")
     
@@ -206,6 +386,7 @@ if __name__ == "__main__":
     demonstrate_validation()
     demonstrate_langchain_integration()
     demonstrate_config_management()
+    demonstrate_columnar_series()
     
     print("\n=== Pydantic Benefits Summary ===")
     print("✅ Type safety and validation")
@@ -0,0 +1,213 @@
+"""
+Graph-overhead benchmark for the router and example graphs.
+
+Both graphs are built around the deterministic ``FakeChatModel`` with a
+configurable simulated latency, so the numbers separate the model's own time
+from LangGraph orchestration, prompt building and structured-output parsing.
+
+For each graph it reports:
+  * ``turn_ms``          median wall time of one ``graph.invoke`` (untraced)
+  * ``model_ms``         median time of one bare ``llm.invoke``
+  * ``nodes``            per node: mean wall time per call, time inside the
+                         model, time in output parsers, and the node overhead
+                         (wall minus model minus parse time)
+  * ``orchestration_ms`` mean traced turn time not spent inside any node
+  * ``alloc_kb_per_turn``/``peak_kb`` from tracemalloc
+  * ``throughput``       turns/s sequentially and on a thread pool
+
+    python scripts/langgraph/bench_graphs.py --turns 300 --latency 0.002 --save graph_baseline.json
+    python scripts/langgraph/bench_graphs.py --turns 300 --latency 0.002 --compare graph_baseline.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import example
+import router
+
+# router.py puts src/ on sys.path
+from app.llm.fake import FakeChatModel
+from app.llm.tracing import Aggregator, GraphTracer
+
+GRAPHS: Dict[str, Callable] = {
+    "router": router.build_graph,
+    "example": example.build_graph,
+}
+
+# Metrics compared against a baseline, and whether bigger is better.
+TRACKED = {
+    "turn_ms": False,
+    "orchestration_ms": False,
+    "alloc_kb_per_turn": False,
+    "throughput_seq": True,
+    "throughput_pool": True,
+}
+
+MESSAGES = [
+    "I feel anxious about my exam tomorrow",
+    "What is the boiling point of water at altitude?",
+    "My friend stopped talking to me and I don't know why",
+    "How many bytes are in a kilobyte?",
+]
+
+
+def _turn_input(i: int) -> Dict[str, Any]:
+    return {"messages": [{"role": "user", "content": f"{MESSAGES[i % len(MESSAGES)]} #{i}"}]}
+
+
+def _median_ms(fn: Callable[[int], Any], n: int) -> float:
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench_graph(build: Callable, turns: int, latency: float, workers: int) -> Dict[str, Any]:
+    """Benchmark one graph factory and return its metrics."""
+    llm = FakeChatModel(latency=latency)
+    graph = build(llm)
+    for i in range(min(turns, 20)):
+        graph.invoke(_turn_input(i))
+
+    model_ms = _median_ms(lambda i: llm.invoke(_turn_input(i)["messages"]), turns)
+    turn_ms = _median_ms(lambda i: graph.invoke(_turn_input(i)), turns)
+
+    spans = Aggregator()
+    tracer = GraphTracer(spans)
+    for i in range(turns):
+        graph.invoke(_turn_input(i), config={"callbacks": [tracer]})
+    summary = spans.summary()
+    nodes = {}
+    for key, stats in summary.items():
+        kind, _, node = key.partition("/")
+        if kind != "node":
+            continue
+        # Means throughout, so the parts add up to the node time.
+        count = stats["count"]
+        node_ms = stats["total_ms"] / count
+        llm_ms = summary.get(f"llm/{node}", {}).get("total_ms", 0.0) / count
+        parse_ms = summary.get(f"parser/{node}", {}).get("total_ms", 0.0) / count
+        nodes[node] = {
+            "calls_per_turn": round(count / turns, 3),
+            "node_ms": round(node_ms, 4),
+            "llm_ms": round(llm_ms, 4),
+            "parse_ms": round(parse_ms, 4),
+            "overhead_ms": round(max(0.0, node_ms - llm_ms - parse_ms), 4),
+        }
+    traced_turn_ms = summary["graph/"]["mean_ms"]
+    node_total = sum(n["node_ms"] * n["calls_per_turn"] for n in nodes.values())
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(turns):
+        graph.invoke(_turn_input(i))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(turns):
+        graph.invoke(_turn_input(i))
+    throughput_seq = turns / (time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda i: graph.invoke(_turn_input(i)), range(turns)))
+        throughput_pool = turns / (time.perf_counter() - start)
+
+    return {
+        "turn_ms": round(turn_ms, 4),
+        "model_ms": round(model_ms, 4),
+        "traced_turn_ms": round(traced_turn_ms, 4),
+        "orchestration_ms": round(max(0.0, traced_turn_ms - node_total), 4),
+        "nodes": nodes,
+        "alloc_kb_per_turn": round((current - before) / 1024 / turns, 3),
+        "peak_kb": round((peak - before) / 1024, 1),
+        "throughput_seq": round(throughput_seq, 2),
+        "throughput_pool": round(throughput_pool, 2),
+    }
+
+
+def run(turns: int = 200, latency: float = 0.0, workers: int = 8, graphs=None) -> Dict[str, Any]:
+    """Run the benchmark for the selected graphs."""
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "turns": turns,
+            "latency": latency,
+            "workers": workers,
+        },
+        "graphs": {name: bench_graph(GRAPHS[name], turns, latency, workers) for name in graphs or GRAPHS},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """Return human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for name, metrics in current["graphs"].items():
+        base = baseline.get("graphs", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in TRACKED.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def _print_report(results: Dict[str, Any]) -> None:
+    for name, m in results["graphs"].items():
+        print(f"== {name} ==")
+        print(f"  turn {m['turn_ms']:.3f} ms (model {m['model_ms']:.3f} ms/call, "
+              f"orchestration {m['orchestration_ms']:.3f} ms)")
+        for node, n in m["nodes"].items():
+            print(f"  {node:<12} node {n['node_ms']:.3f} ms  llm {n['llm_ms']:.3f}  overhead {n['overhead_ms']:.3f}")
+            print(f"  {'':<12} parse {n['parse_ms']:.3f} ms")
+        print(f"  alloc {m['alloc_kb_per_turn']:.1f} KiB/turn, peak {m['peak_kb']:.0f} KiB")
+        print(f"  throughput {m['throughput_seq']:.1f}/s sequential, {m['throughput_pool']:.1f}/s pooled")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark LangGraph overhead with a fake chat model")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated model latency in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="threads for the pooled throughput run")
+    parser.add_argument("--graph", action="append", choices=sorted(GRAPHS), help="graph(s) to run")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.turns, args.latency, args.workers, args.graph)
+    _print_report(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,6 @@
+import sys
+from functools import partial
+from pathlib import Path
 from typing import Annotated
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
@@ -5,9 +8,15 @@ from langgraph.graph.message import add_messages
 from langchain.chat_models import init_chat_model
 from dotenv import load_dotenv
 
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from app.llm.cache import enable_llm_cache
+from app.llm.tracing import traced
+
 load_dotenv()
 
-llm = init_chat_model("openai:gpt-3.5-turbo")
+MODEL = "openai:gpt-3.5-turbo"
 
 
 class State(TypedDict):
@@ -17,28 +26,32 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 
-graph_builder = StateGraph(State)
-
-
-def chatbot(state: State):
+def chatbot(state: State, llm):
     return {"messages": [llm.invoke(state["messages"])]}
 
 
-# The first argument is the unique node name
-# The second argument is the function or object that will be called whenever
-# the node is used.
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("chatbot", END)
+def build_graph(llm):
+    """Compile the single-node chatbot graph around a chat model."""
+    graph_builder = StateGraph(State)
+
+    # The first argument is the unique node name
+    # The second argument is the function or object that will be called whenever
+    # the node is used.
+    graph_builder.add_node("chatbot", partial(chatbot, llm=llm))
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
 
+    return graph_builder.compile()
 
-graph = graph_builder.compile()
 
-user_input = input("Enter a message: ")
-state = graph.invoke({"messages": [{"role": "user", "content": user_input}]})
+if __name__ == "__main__":
+    enable_llm_cache()
+    graph = traced(build_graph(init_chat_model(MODEL)))
 
-print(state["messages"][-1].content)
+    user_input = input("Enter a message: ")
+    state = graph.invoke({"messages": [{"role": "user", "content": user_input}]})
 
+    print(state["messages"][-1].content)
 
 
 # # This neeed to run in a jupyter notebook
@@ -1,14 +1,32 @@
+import argparse
+import sys
+from pathlib import Path
+
 from dotenv import load_dotenv
+from functools import partial
 from typing import Annotated, Literal
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langchain.chat_models import init_chat_model
+from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
 
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from app.llm.cache import enable_llm_cache
+from app.llm.checkpoint import SQLiteSessionStore
+from app.llm.history import SlidingWindow, parse_policy
+from app.llm.tracing import traced
+
 load_dotenv()
 
-llm = init_chat_model("openai:gpt-3.5-turbo")
+# Messages kept in memory (and re-read from the session store on resume).
+DEFAULT_HISTORY = "window:20"
+RESUME_LIMIT = 50
+
+MODEL = "openai:gpt-3.5-turbo"
 
 
 class MessageClassifier(BaseModel):
@@ -23,20 +41,39 @@ class State(TypedDict):
     message_type: str | None
 
 
-def classify_message(state: State):
-    last_message = state["messages"][-1]
-    classifier_llm = llm.with_structured_output(MessageClassifier, method="function_calling")
-
-    result = classifier_llm.invoke([
-        {
-            "role": "system",
-            "content": """Classify the user message as either:
+CLASSIFIER_PROMPT = """Classify the user message as either:
             - 'emotional': if it asks for emotional support, therapy, deals with feelings, or personal problems
             - 'logical': if it asks for facts, information, logical analysis, or practical solutions
             """
-        },
+
+THERAPIST_PROMPT = """You are a compassionate therapist. Focus on the emotional aspects of the user's message.
+                        Show empathy, validate their feelings, and help them process their emotions.
+                        Ask thoughtful questions to help them explore their feelings more deeply.
+                        Avoid giving logical solutions unless explicitly asked."""
+
+LOGICAL_PROMPT = """You are a purely logical assistant. Focus only on facts and information.
+            Provide clear, concise answers based on logic and evidence.
+            Do not address emotions or provide emotional support.
+            Be direct and straightforward in your responses."""
+
+
+def _prompt(system: str, state: State):
+    last_message = state["messages"][-1]
+    return [
+        {"role": "system", "content": system},
         {"role": "user", "content": last_message.content}
-    ])
+    ]
+
+
+def classify_message(state: State, llm):
+    classifier_llm = llm.with_structured_output(MessageClassifier, method="function_calling")
+    result = classifier_llm.invoke(_prompt(CLASSIFIER_PROMPT, state))
+    return {"message_type": result.message_type}
+
+
+async def aclassify_message(state: State, llm):
+    classifier_llm = llm.with_structured_output(MessageClassifier, method="function_calling")
+    result = await classifier_llm.ainvoke(_prompt(CLASSIFIER_PROMPT, state))
     return {"message_type": result.message_type}
 
 
@@ -48,68 +85,64 @@ def router(state: State):
     return {"next": "logical"}
 
 
-def therapist_agent(state: State):
-    last_message = state["messages"][-1]
+def therapist_agent(state: State, llm):
+    reply = llm.invoke(_prompt(THERAPIST_PROMPT, state))
+    return {"messages": [{"role": "assistant", "content": reply.content}]}
 
-    messages = [
-        {"role": "system",
-         "content": """You are a compassionate therapist. Focus on the emotional aspects of the user's message.
-                        Show empathy, validate their feelings, and help them process their emotions.
-                        Ask thoughtful questions to help them explore their feelings more deeply.
-                        Avoid giving logical solutions unless explicitly asked."""
-         },
-        {
-            "role": "user",
-            "content": last_message.content
-        }
-    ]
-    reply = llm.invoke(messages)
+
+async def atherapist_agent(state: State, llm):
+    reply = await llm.ainvoke(_prompt(THERAPIST_PROMPT, state))
     return {"messages": [{"role": "assistant", "content": reply.content}]}
 
 
-def logical_agent(state: State):
-    last_message = state["messages"][-1]
+def logical_agent(state: State, llm):
+    reply = llm.invoke(_prompt(LOGICAL_PROMPT, state))
+    return {"messages": [{"role": "assistant", "content": reply.content}]}
 
-    messages = [
-        {"role": "system",
-         "content": """You are a purely logical assistant. Focus only on facts and information.
-            Provide clear, concise answers based on logic and evidence.
-            Do not address emotions or provide emotional support.
-            Be direct and straightforward in your responses."""
-         },
-        {
-            "role": "user",
-            "content": last_message.content
-        }
-    ]
-    reply = llm.invoke(messages)
+
+async def alogical_agent(state: State, llm):
+    reply = await llm.ainvoke(_prompt(LOGICAL_PROMPT, state))
     return {"messages": [{"role": "assistant", "content": reply.content}]}
 
 
-graph_builder = StateGraph(State)
+def _node(func, afunc, llm):
+    # Sync and async variants, so graph.ainvoke never blocks the event loop on the model.
+    return RunnableLambda(partial(func, llm=llm), afunc=partial(afunc, llm=llm))
+
+
+def build_graph(llm):
+    """Compile the router graph around a chat model."""
+    graph_builder = StateGraph(State)
 
-graph_builder.add_node("classifier", classify_message)
-graph_builder.add_node("router", router)
-graph_builder.add_node("therapist", therapist_agent)
-graph_builder.add_node("logical", logical_agent)
+    graph_builder.add_node("classifier", _node(classify_message, aclassify_message, llm))
+    graph_builder.add_node("router", router)
+    graph_builder.add_node("therapist", _node(therapist_agent, atherapist_agent, llm))
+    graph_builder.add_node("logical", _node(logical_agent, alogical_agent, llm))
 
-graph_builder.add_edge(START, "classifier")
-graph_builder.add_edge("classifier", "router")
+    graph_builder.add_edge(START, "classifier")
+    graph_builder.add_edge("classifier", "router")
+
+    graph_builder.add_conditional_edges(
+        "router",
+        lambda state: state.get("next"),
+        {"therapist": "therapist", "logical": "logical"}
+    )
 
-graph_builder.add_conditional_edges(
-    "router",
-    lambda state: state.get("next"),
-    {"therapist": "therapist", "logical": "logical"}
-)
+    graph_builder.add_edge("therapist", END)
+    graph_builder.add_edge("logical", END)
 
-graph_builder.add_edge("therapist", END)
-graph_builder.add_edge("logical", END)
+    return graph_builder.compile()
 
-graph = graph_builder.compile()
 
+def run_chatbot(graph, history=None, store: SQLiteSessionStore | None = None, session_id: str = "default"):
+    """Interactive loop.
 
-def run_chatbot():
-    state = {"messages": [], "message_type": None}
+    ``history`` trims the conversation before each turn so state stays bounded;
+    ``store`` persists every turn incrementally and restores the session on start.
+    """
+    history = history or SlidingWindow()
+    messages = store.load(session_id, limit=RESUME_LIMIT) if store else []
+    state = {"messages": history(messages), "message_type": None}
 
     while True:
         user_input = input("Message: ")
@@ -117,16 +150,31 @@ def run_chatbot():
             print("Bye")
             break
 
-        state["messages"] = state.get("messages", []) + [
-            {"role": "user", "content": user_input}
-        ]
+        user_message = {"role": "user", "content": user_input}
+        state["messages"] = history(state.get("messages", []) + [user_message])
 
         state = graph.invoke(state)
 
         if state.get("messages") and len(state["messages"]) > 0:
             last_message = state["messages"][-1]
+            if store:
+                store.append(session_id, [user_message, last_message])
             print(f"Assistant: {last_message.content}")
 
 
 if __name__ == "__main__":
-    run_chatbot()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Emotional/logical router chatbot")
+    parser.add_argument("--history", default=DEFAULT_HISTORY,
+                        help="history policy: window:<n>, tokens:<n> or summary:<n>")
+    parser.add_argument("--db", help="SQLite file to persist the session in")
+    parser.add_argument("--session", default="default", help="session id inside --db")
+    args = parser.parse_args()
+
+    enable_llm_cache()
+    llm = init_chat_model(MODEL)
+    store = SQLiteSessionStore(args.db) if args.db else None
+    try:
+        run_chatbot(traced(build_graph(llm)), parse_policy(args.history, llm=llm), store=store, session_id=args.session)
+    finally:
+        if store:
+            store.close()
@@ -0,0 +1,170 @@
+"""
+Offline batch mode for the router graph.
+
+Streams messages from a JSONL file, runs each one through the compiled router
+graph on a bounded thread pool and appends one JSON result per input line to
+the output file as soon as it finishes. Re-running with the same output file
+skips lines that already have a result, so a crashed run resumes where it
+stopped. Lines that failed for a transient reason (rate limits, connection
+errors) are tried again; the newest row for a line is the one that counts.
+
+Input lines are objects with a ``message`` (or ``content``/``text``) field and
+an optional ``id``; output lines carry the input ``line`` number, ``id``,
+``message_type``, ``reply`` and ``error``.
+
+    python scripts/langgraph/router_batch.py logged.jsonl routed.jsonl --workers 16
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from langchain.chat_models import init_chat_model
+
+from router import MODEL, build_graph
+
+# router.py puts src/ on sys.path
+from app.llm.cache import enable_llm_cache
+from app.llm.fake import FakeChatModel
+from app.llm.ratelimit import BATCH, limit_chat_model
+from app.llm.tracing import traced
+
+load_dotenv()
+
+MESSAGE_KEYS = ("message", "content", "text")
+# Errors caused by the input line itself; retrying them gives the same result.
+INPUT_ERRORS = ("missing message field", "invalid JSON")
+
+
+def read_messages(path: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield ``(line_number, record, error)`` for every non-blank input line.
+
+    A line that is not a JSON object comes back with ``record=None`` and an error.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, f"invalid JSON: expected an object, got {type(record).__name__}"
+                continue
+            yield line_number, record, None
+
+
+def completed_lines(path: str) -> Set[int]:
+    """Return line numbers already written to ``path`` that need no retry.
+
+    Rows that failed for a transient reason are left out so they are routed
+    again. A partially written last line (from a crash mid-write) is cut off
+    so new results are appended on a clean line boundary.
+    """
+    done: Set[int] = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            row = json.loads(line)
+            line_number, error = row["line"], row.get("error")
+        except (ValueError, KeyError, TypeError):
+            continue
+        if error is None or error.startswith(INPUT_ERRORS):
+            done.add(line_number)
+        else:
+            done.discard(line_number)
+    return done
+
+
+def route_one(graph, line_number: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one message through the graph and build its result row."""
+    text = next((record[k] for k in MESSAGE_KEYS if k in record), None)
+    result = {"line": line_number, "id": record.get("id"), "message_type": None, "reply": None, "error": None}
+    if text is None:
+        result["error"] = "missing message field"
+        return result
+    try:
+        state = graph.invoke({"messages": [{"role": "user", "content": text}], "message_type": None})
+        result["message_type"] = state.get("message_type")
+        result["reply"] = state["messages"][-1].content
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_batch(graph, input_path: str, output_path: str, workers: int = 8) -> Dict[str, int]:
+    """Route every input line not yet in ``output_path``; return counters."""
+    done = completed_lines(output_path)
+    stats = {"skipped": 0, "routed": 0, "errors": 0}
+    max_in_flight = workers * 2
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(output_path, "a", encoding="utf-8") as out:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                result = future.result()
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                stats["errors" if result["error"] else "routed"] += 1
+            out.flush()
+
+        for line_number, record, error in read_messages(input_path):
+            if line_number in done:
+                stats["skipped"] += 1
+                continue
+            if error is not None:
+                out.write(json.dumps({"line": line_number, "id": None, "message_type": None, "reply": None,
+                                      "error": error}, ensure_ascii=False) + "\n")
+                stats["errors"] += 1
+                continue
+            pending.add(pool.submit(route_one, graph, line_number, record))
+            if len(pending) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+        if pending:
+            drain(ALL_COMPLETED)
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route logged messages through the router graph")
+    parser.add_argument("input", help="JSONL file with one message per line")
+    parser.add_argument("output", help="JSONL file to append results to (resumed if it exists)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent graph invocations")
+    parser.add_argument("--model", default=MODEL, help="init_chat_model model string")
+    parser.add_argument("--fake", action="store_true", help="use the local fake chat model")
+    parser.add_argument("--cache", action="store_true", help="answer repeated messages from the LLM cache")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        enable_llm_cache()
+
+    if args.fake:
+        llm = FakeChatModel()
+    else:
+        # Retries are left to the shared controller, which backs off on 429s.
+        llm = limit_chat_model(init_chat_model(args.model, max_retries=0), priority=BATCH)
+
+    start = time.perf_counter()
+    stats = run_batch(traced(build_graph(llm)), args.input, args.output, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"routed={stats['routed']} errors={stats['errors']} skipped={stats['skipped']} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Load test for router_service against the local fake chat model.
+
+Runs the service in-process (httpx's ASGI transport, no sockets) and drives
+it with 1..N concurrent sessions. With a simulated model latency, turns/s
+should grow with concurrency inside a single process until ``max_in_flight``
+is reached.
+
+    python scripts/langgraph/router_loadtest.py --latency 0.05 --levels 1 4 16 64
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+
+from router import build_graph
+from router_service import create_app, make_llm
+
+
+async def _session(client: httpx.AsyncClient, session_id: str, turns: int) -> int:
+    rejected = 0
+    for i in range(turns):
+        r = await client.post(f"/sessions/{session_id}/messages", json={"content": f"message {i} from {session_id}"})
+        if r.status_code == 503:
+            rejected += 1
+        else:
+            r.raise_for_status()
+    return rejected
+
+
+async def measure(app, concurrency: int, turns: int) -> Dict[str, float]:
+    """Drive ``app`` with ``concurrency`` sessions of ``turns`` turns each."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://router") as client:
+        start = time.perf_counter()
+        rejected = await asyncio.gather(*[_session(client, f"load-{concurrency}-{i}", turns) for i in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    total = concurrency * turns
+    return {
+        "concurrency": concurrency,
+        "turns": total,
+        "seconds": round(elapsed, 3),
+        "turns_per_s": round((total - sum(rejected)) / elapsed, 1),
+        "rejected": sum(rejected),
+    }
+
+
+def run(levels: List[int], turns: int = 10, latency: float = 0.05, max_in_flight: int = 256) -> List[Dict[str, float]]:
+    """Measure throughput at each concurrency level."""
+    graph = build_graph(make_llm(fake=True, latency=latency))
+    results = []
+    for level in levels:
+        # A fresh app per level: its locks and semaphores belong to one event loop.
+        app = create_app(graph, max_in_flight=max_in_flight, max_queued=level)
+        results.append(asyncio.run(measure(app, level, turns)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the router service with a fake model")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--turns", type=int, default=10, help="turns per session")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated model latency in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    for row in run(args.levels, args.turns, args.latency, args.max_in_flight):
+        print(f"concurrency {row['concurrency']:>4}: {row['turns_per_s']:>8.1f} turns/s "
+              f"({row['turns']} turns in {row['seconds']}s, {row['rejected']} rejected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Multi-session HTTP/WebSocket service for the router graph.
+
+One compiled graph and one chat model (with a pooled async HTTP client) are
+shared by every session; each session keeps its own bounded history and turns
+within a session run one at a time. At most ``max_in_flight`` turns run
+concurrently across all sessions, at most ``max_queued`` more may wait, and
+anything beyond that is rejected with 503 so clients back off instead of
+piling up.
+
+    python scripts/langgraph/router_service.py --port 8000
+    python scripts/langgraph/router_service.py --fake --latency 0.05
+
+    POST /sessions/{session_id}/messages  {"content": "..."}
+    WS   /ws/{session_id}                 send text, receive {"reply", "message_type"}
+    GET  /health
+"""
+
+import argparse
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from langchain.chat_models import init_chat_model
+from pydantic import BaseModel
+
+from router import MODEL, build_graph
+
+# router.py puts src/ on sys.path
+from app.llm.cache import enable_llm_cache
+from app.llm.checkpoint import SQLiteSessionStore
+from app.llm.fake import FakeChatModel
+from app.llm.history import SlidingWindow
+from app.llm.ratelimit import INTERACTIVE, limit_chat_model
+from app.llm.tracing import traced
+
+load_dotenv()
+
+
+class Overloaded(Exception):
+    """Raised when the turn queue is full."""
+
+
+class TurnLimiter:
+    """Bound concurrent turns and the number of turns waiting for a slot."""
+
+    def __init__(self, max_in_flight: int = 64, max_queued: int = 256):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def _acquire(self, lock: Optional[asyncio.Lock] = None) -> None:
+        if (self._slots.locked() or (lock is not None and lock.locked())) and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded()
+        self.queued += 1
+        try:
+            if lock is not None:
+                await lock.acquire()
+            try:
+                await self._slots.acquire()
+            except BaseException:
+                if lock is not None:
+                    lock.release()
+                raise
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    async def __aenter__(self):
+        await self._acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        self._slots.release()
+
+    @asynccontextmanager
+    async def turn(self, lock: asyncio.Lock):
+        """Hold ``lock`` (a session's) and a slot; waiting for either counts towards ``max_queued``."""
+        await self._acquire(lock)
+        try:
+            yield self
+        finally:
+            await self.__aexit__()
+            lock.release()
+
+
+@dataclass
+class Session:
+    messages: List[Any] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    pending: int = 0
+    """Turns holding or waiting for this session; it is not evicted while any are."""
+
+
+class SessionManager:
+    """Per-session state, with the least recently used sessions dropped from memory.
+
+    With a ``store`` every turn is persisted, so an evicted session is
+    reloaded from disk on its next message.
+    """
+
+    def __init__(self, history: Callable = None, max_sessions: int = 10_000,
+                 store: Optional[SQLiteSessionStore] = None, resume_limit: int = 50):
+        self.history = history or SlidingWindow()
+        self.max_sessions = max_sessions
+        self.store = store
+        self.resume_limit = resume_limit
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def get(self, session_id: str) -> Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._add(session_id, self._load(session_id))
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def aget(self, session_id: str) -> Session:
+        """``get`` for async handlers: a session missing from memory is loaded off the event loop."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            messages = await asyncio.to_thread(self._load, session_id)
+            # Another connection may have loaded the same session meanwhile; keep the first.
+            session = self._sessions.get(session_id) or self._add(session_id, messages)
+        self._sessions.move_to_end(session_id)
+        return session
+
+    @asynccontextmanager
+    async def open(self, session_id: str):
+        """``aget`` the session and keep it in memory until the block exits."""
+        session = await self.aget(session_id)
+        session.pending += 1
+        try:
+            yield session
+        finally:
+            session.pending -= 1
+
+    def _load(self, session_id: str) -> list:
+        if not self.store:
+            return []
+        return self.history(self.store.load(session_id, limit=self.resume_limit))
+
+    def _add(self, session_id: str, messages: list) -> Session:
+        session = Session()
+        session.messages = messages
+        self._sessions[session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest.pending or oldest.lock.locked() or oldest_id == session_id:
+                break
+            del self._sessions[oldest_id]
+        return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class MessageIn(BaseModel):
+    content: str
+
+
+class MessageOut(BaseModel):
+    session_id: str
+    reply: str
+    message_type: Optional[str] = None
+
+
+def create_app(graph, max_in_flight: int = 64, max_queued: int = 256, sessions: SessionManager = None) -> FastAPI:
+    """Build the FastAPI app around a compiled router graph."""
+    app = FastAPI(title="Router graph service")
+    limiter = TurnLimiter(max_in_flight, max_queued)
+    if sessions is None:
+        sessions = SessionManager()
+    app.state.limiter = limiter
+    app.state.sessions = sessions
+
+    async def run_turn(session_id: str, content: str) -> Dict[str, Any]:
+        async with sessions.open(session_id) as session, limiter.turn(session.lock):
+            user_message = {"role": "user", "content": content}
+            state = await graph.ainvoke({
+                "messages": sessions.history(session.messages + [user_message]),
+                "message_type": None,
+            })
+            session.messages = state["messages"]
+            reply = state["messages"][-1]
+            if sessions.store:
+                await asyncio.to_thread(sessions.store.append, session_id, [user_message, reply])
+        return {"session_id": session_id, "reply": reply.content, "message_type": state.get("message_type")}
+
+    @app.post("/sessions/{session_id}/messages", response_model=MessageOut)
+    async def post_message(session_id: str, message: MessageIn):
+        try:
+            return await run_turn(session_id, message.content)
+        except Overloaded:
+            raise HTTPException(status_code=503, detail="overloaded", headers={"Retry-After": "1"})
+
+    @app.websocket("/ws/{session_id}")
+    async def chat_socket(websocket: WebSocket, session_id: str):
+        await websocket.accept()
+        try:
+            while True:
+                content = await websocket.receive_text()
+                try:
+                    await websocket.send_json(await run_turn(session_id, content))
+                except Overloaded:
+                    await websocket.send_json({"session_id": session_id, "error": "overloaded"})
+        except WebSocketDisconnect:
+            pass
+
+    @app.get("/health")
+    def health():
+        return {
+            "in_flight": limiter.in_flight,
+            "queued": limiter.queued,
+            "rejected": limiter.rejected,
+            "sessions": len(sessions),
+        }
+
+    return app
+
+
+def make_llm(fake: bool = False, latency: float = 0.0, pool_size: int = 100):
+    """Create the shared chat model.
+
+    Real models get one pooled async HTTP client and go through the shared
+    rate-limit controller, which handles 429s instead of the client's retries.
+    """
+    if fake:
+        return FakeChatModel(latency=latency)
+    client = httpx.AsyncClient(limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+    return limit_chat_model(init_chat_model(MODEL, http_async_client=client, max_retries=0), priority=INTERACTIVE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the router graph over HTTP and WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--max-queued", type=int, default=256)
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--db", help="SQLite file to persist sessions in")
+    parser.add_argument("--fake", action="store_true", help="use the local fake chat model")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated latency for --fake")
+    parser.add_argument("--cache", action="store_true", help="answer repeated prompts from the LLM cache")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        enable_llm_cache()
+    llm = make_llm(args.fake, args.latency, pool_size=args.max_in_flight)
+    store = SQLiteSessionStore(args.db) if args.db else None
+    app = create_app(
+        traced(build_graph(llm)),
+        max_in_flight=args.max_in_flight,
+        max_queued=args.max_queued,
+        sessions=SessionManager(max_sessions=args.max_sessions, store=store),
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Full article text for the news briefing.
+
+NewsAPI cuts ``content`` off at about 200 characters, so the summarizer
+only sees stubs. An ``ArticleFetcher`` downloads the articles themselves,
+all at once:
+
+    fetcher = ArticleFetcher()
+    for result in fetcher.fetch_many([a["url"] for a in articles], budget=5.0):
+        result.text      # main text, or None if it could not be fetched in time
+
+Each fetch holds a per-domain slot, so one site gets at most
+``per_domain`` connections. It gives up after ``timeout`` seconds in
+total, or after ``max_bytes`` of body. HTML goes through an incremental
+``TextExtractor`` chunk by chunk, and the download stops as soon as
+``max_chars`` of main text has been found. Extracted text is kept per URL
+together with the response's ETag/Last-Modified. Later fetches send a
+conditional request, and a 304 (or an unchanged ETag) reuses the text
+without extracting it again.
+"""
+
+import codecs
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "news-companion/0.1 (+article text for summaries)"
+
+# Subtrees that never hold article text.
+SKIP_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "iframe", "form", "button", "select",
+    "nav", "header", "footer", "aside", "figure",
+})
+# Elements whose text is a paragraph of its own.
+BLOCK_TAGS = frozenset({
+    "p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre", "td", "dd", "dt", "div",
+    "section", "article", "main", "br",
+})
+# Subtrees that, when present, hold the main text.
+MAIN_TAGS = frozenset({"article", "main"})
+VOID_TAGS = frozenset({"br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "base", "col"})
+
+_SPACE = re.compile(r"\s+")
+
+
+class TextExtractor(HTMLParser):
+    """Main text of an HTML page, fed in chunks.
+
+    Text inside ``<article>``/``<main>`` is preferred over the rest of the
+    page. Paragraphs shorter than ``min_paragraph`` characters (bylines,
+    share buttons, menus that are not in a ``<nav>``) are dropped.
+    """
+
+    def __init__(self, max_chars: int = 4000, min_paragraph: int = 40):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.min_paragraph = min_paragraph
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._stack: List[str] = []
+        self._buffer: List[str] = []
+        self._main: List[str] = []
+        self._other: List[str] = []
+        self._main_chars = 0
+        self._other_chars = 0
+        self.seen_main = False
+
+    # -- parser callbacks ------------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._flush()
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        self._stack.append(tag)
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in MAIN_TAGS:
+            self._main_depth += 1
+            self.seen_main = True
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return  # stray end tag
+        if tag in BLOCK_TAGS:
+            self._flush()
+        # Close anything left open inside ``tag`` as well (``<p>`` without ``</p>`` etc.).
+        while self._stack:
+            open_tag = self._stack.pop()
+            if open_tag in SKIP_TAGS:
+                self._skip_depth -= 1
+            elif open_tag in MAIN_TAGS:
+                self._main_depth -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._buffer.append(data)
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        text = _SPACE.sub(" ", "".join(self._buffer)).strip()
+        self._buffer.clear()
+        if len(text) < self.min_paragraph:
+            return
+        if self._main_depth:
+            self._main.append(text)
+            self._main_chars += len(text) + 2
+        else:
+            self._other.append(text)
+            self._other_chars += len(text) + 2
+
+    # -- results ---------------------------------------------------------
+
+    @property
+    def done(self) -> bool:
+        """Enough text was found; the rest of the page need not be read."""
+        if self._main_chars >= self.max_chars:
+            return True
+        # Without an <article> so far, the page text is the best there is.
+        return not self.seen_main and self._other_chars >= self.max_chars
+
+    def text(self) -> str:
+        self._flush()
+        paragraphs = self._main if self._main else self._other
+        return "\n\n".join(paragraphs)[:self.max_chars].strip()
+
+
+def extract_text(html: str, max_chars: int = 4000, min_paragraph: int = 40) -> str:
+    """``TextExtractor`` over a whole document."""
+    extractor = TextExtractor(max_chars, min_paragraph)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+@dataclass
+class FetchResult:
+    url: str
+    text: Optional[str] = None
+    """Extracted main text; None on failure or when nothing usable was found."""
+    status: Optional[int] = None
+    cached: bool = False
+    """The text came from the cache after revalidating with the server."""
+    seconds: float = 0.0
+    bytes_read: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class _CachedText:
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class ExtractCache:
+    """Thread-safe LRU of extracted text per URL, with its validators."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CachedText]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[_CachedText]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if etag is None and last_modified is None:
+            return  # nothing to revalidate with
+        with self._lock:
+            self._entries[url] = _CachedText(text, etag, last_modified)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def entries(self) -> int:
+        return len(self._entries)
+
+
+class _Aborted(Exception):
+    pass
+
+
+def _charset(content_type: str) -> str:
+    match = re.search(r"charset=[\"']?([\w.:-]+)", content_type, re.I)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+class ArticleFetcher:
+    """Fetch and extract many article pages concurrently, politely and within a budget."""
+
+    def __init__(self, max_workers: int = 16, per_domain: int = 2, timeout: float = 8.0,
+                 connect_timeout: float = 3.05, max_bytes: int = 2 * 1024 * 1024, max_chars: int = 4000,
+                 chunk_size: int = 16 * 1024, cache: Optional[ExtractCache] = None,
+                 session: Optional[requests.Session] = None):
+        self.max_workers = max_workers
+        self.per_domain = per_domain
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.chunk_size = chunk_size
+        self.cache = cache if cache is not None else ExtractCache()
+        if session is None:
+            session = requests.Session()
+            # One pool per host, big enough for every worker's keep-alive connection.
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max(per_domain, 1))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+        self.session = session
+        self._domains: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="article-fetch")
+        self._counts = {"fetched": 0, "not_modified": 0, "failed": 0, "bytes": 0}
+
+    def _domain_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._domains:
+                self._domains[host] = threading.BoundedSemaphore(self.per_domain)
+            return self._domains[host]
+
+    def _count(self, result: FetchResult) -> None:
+        with self._lock:
+            self._counts["bytes"] += result.bytes_read
+            if result.error is not None:
+                self._counts["failed"] += 1
+            elif result.cached:
+                self._counts["not_modified"] += 1
+            else:
+                self._counts["fetched"] += 1
+
+    def fetch(self, url: str, deadline: Optional[float] = None) -> FetchResult:
+        """Fetch one page; ``deadline`` is a ``time.monotonic()`` value to give up at."""
+        start = time.monotonic()
+        end = start + self.timeout if deadline is None else min(deadline, start + self.timeout)
+        result = FetchResult(url)
+        try:
+            slot = self._domain_slot(url)
+            if not slot.acquire(timeout=max(0.0, end - time.monotonic())):
+                raise _Aborted("no connection slot for this domain in time")
+            try:
+                self._fetch(url, end, result)
+            finally:
+                slot.release()
+        except (_Aborted, requests.RequestException, ValueError) as e:
+            result.text = None
+            result.error = str(e) or type(e).__name__
+        result.seconds = time.monotonic() - start
+        self._count(result)
+        return result
+
+    def _fetch(self, url: str, end: float, result: FetchResult) -> None:
+        headers = {"Accept": "text/html,application/xhtml+xml;q=0.9,text/plain;q=0.5"}
+        cached = self.cache.get(url)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise _Aborted("timed out")
+        with self.session.get(url, headers=headers, stream=True, allow_redirects=True,
+                              timeout=(min(self.connect_timeout, remaining), remaining)) as response:
+            result.status = response.status_code
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if cached is not None and (response.status_code == 304 or (etag and etag == cached.etag)):
+                result.text, result.cached = cached.text, True
+                return
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "text/html")
+            if "html" not in content_type and not content_type.startswith("text/"):
+                raise _Aborted(f"not a text page ({content_type})")
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                raise _Aborted(f"page is {int(length)} bytes, more than {self.max_bytes}")
+
+            extractor = TextExtractor(self.max_chars)
+            decoder = codecs.getincrementaldecoder(_charset(content_type))(errors="replace")
+            plain = "html" not in content_type
+            chunks = []
+            for chunk in response.iter_content(self.chunk_size):
+                result.bytes_read += len(chunk)
+                if result.bytes_read > self.max_bytes:
+                    raise _Aborted(f"page is more than {self.max_bytes} bytes")
+                if time.monotonic() > end:
+                    raise _Aborted("timed out")
+                text = decoder.decode(chunk)
+                if plain:
+                    chunks.append(text)
+                    continue
+                extractor.feed(text)
+                if extractor.done:
+                    break
+            text = decoder.decode(b"", final=True)
+            if plain:
+                body = _SPACE.sub(" ", "".join(chunks) + text).strip()[:self.max_chars]
+            else:
+                extractor.feed(text)
+                extractor.close()
+                body = extractor.text()
+
+        result.text = body or None
+        if body:
+            self.cache.put(url, body, etag, last_modified)
+
+    def fetch_many(self, urls: Sequence[Optional[str]], budget: Optional[float] = None) -> List[FetchResult]:
+        """Fetch all ``urls`` concurrently; results are in input order.
+
+        Everything is given up after ``budget`` seconds; unfinished pages come
+        back with ``error="timed out"``. Empty URLs are skipped with an error.
+        """
+        deadline = None if budget is None else time.monotonic() + budget
+        futures = {}
+        results: List[Optional[FetchResult]] = [None] * len(urls)
+        for i, url in enumerate(urls):
+            if not url or urlsplit(url).scheme not in ("http", "https"):
+                results[i] = FetchResult(url or "", error="no http(s) url")
+            else:
+                futures[self._executor.submit(self.fetch, url, deadline)] = i
+        # Workers stop on their own at the deadline; the margin covers a blocking read.
+        wait(futures, timeout=None if budget is None else budget + 0.1)
+        for future, i in futures.items():
+            if future.done():
+                results[i] = future.result()
+            else:
+                results[i] = FetchResult(urls[i], error="timed out", seconds=budget or 0.0)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, "cached_pages": self.cache.entries, "domains": len(self._domains)}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+def source_text(result: FetchResult, article: dict) -> Tuple[str, Optional[str]]:
+    """The best text to summarize for ``article``; returns (text, degradation or None)."""
+    fallback = article.get("content") or article.get("description") or article.get("title") or ""
+    if result.text and len(result.text) > len(fallback):
+        return result.text, None
+    return fallback, "snippet"
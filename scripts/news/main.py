@@ -1,11 +1,32 @@
-from fastapi import FastAPI
+import sys
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from app.core.utils import available_cores, limit_native_threads
+
+# Size OpenMP/BLAS pools to the CPUs this container may use, before numpy or torch loads.
+limit_native_threads()
+
+from app.core.deadline import CostModel, Deadline, DeadlineExceeded, Degradations, Profile, StepWatchdog, choose_profile
+from app.core.memory import is_enabled as memory_profiling, memory_region, profile_memory, summarize as memory_summary
+from app.core.renderpool import RenderError, RenderPool
+from app.core.scheduler import BULK, SHORT, InferenceScheduler
+from articles import ArticleFetcher, source_text
+from render_worker import load_pipeline
+
+from fastapi import FastAPI, Query
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import requests
 from transformers import pipeline
 from diffusers import StableDiffusionPipeline
 import torch
 import os
+import re
+from collections import OrderedDict
+from functools import partial
 import uvicorn
 import logging
 from dotenv import load_dotenv
@@ -18,13 +39,21 @@ load_dotenv()
 NEWS_API_KEY = os.environ.get("NEWS_API_KEY")
 HF_TOKEN = os.environ.get("HF_TOKEN")
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# Seconds a /briefing request may take unless it passes ?deadline=
+BRIEFING_DEADLINE = float(os.environ.get("BRIEFING_DEADLINE", "60"))
+# Most seconds spent downloading full articles; pages not back by then use the NewsAPI snippet
+ARTICLE_FETCH_BUDGET = float(os.environ.get("ARTICLE_FETCH_BUDGET", "5"))
+# Diffusion worker processes on CPU, each with its own pipeline; 0 renders in this process
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "0"))
+SD_MODEL = "runwayml/stable-diffusion-v1-5"
 
 # ---------- APP ----------
 app = FastAPI(title="AI Multimodal News Companion MVP")
 
 # ---------- MODELS ----------
 # Summarizer
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn", device=0 if DEVICE=="cuda" else -1)
+with memory_region("model load: summarizer"):
+    summarizer = pipeline("summarization", model="facebook/bart-large-cnn", device=0 if DEVICE=="cuda" else -1)
 
 HF_TTS_URL = "https://api-inference.huggingface.co/models/espnet/kan-bayashi_ljspeech"
 headers = {"Authorization": f"Bearer {HF_TOKEN}"}
@@ -42,18 +71,136 @@ def generate_audio(text: str, filename: str) -> str:
     logger.info(f"Audio saved to: {path}")
     return path
 
+# Summarizer and diffusion split the usable cores instead of each taking all of
+# them; summaries are short and interactive, so they jump the render queue.
+scheduler = InferenceScheduler(set_torch_threads=DEVICE == "cpu")
+SUMMARIZER_THREADS = scheduler.register("summarizer", threads=max(1, scheduler.total_threads // 2), priority=SHORT)
+scheduler.register("diffusion", threads=max(1, scheduler.total_threads - SUMMARIZER_THREADS), priority=BULK)
+
 # Text-to-Image
-sd_pipe = StableDiffusionPipeline.from_pretrained("runwayml/stable-diffusion-v1-5")
-sd_pipe.to(DEVICE)
+render_pool = None
+if RENDER_WORKERS > 0 and DEVICE == "cpu":
+    # Worker processes pinned to the diffusion share of the cores, so renders run side by
+    # side and off this process's GIL; pixels come back through shared memory.
+    cores = available_cores()
+    render_pool = RenderPool(partial(load_pipeline, SD_MODEL), workers=RENDER_WORKERS,
+                             cores=cores[SUMMARIZER_THREADS:] or cores)
+else:
+    with memory_region("model load: sd_pipe"):
+        sd_pipe = StableDiffusionPipeline.from_pretrained(SD_MODEL)
+        sd_pipe.to(DEVICE)
+
+# Render profiles, best first; cost is steps x megapixels, which render time scales with.
+RENDER_PROFILES = tuple(
+    Profile(name, cost=steps * size * size / 1e6, params={"num_inference_steps": steps, "height": size, "width": size})
+    for name, steps, size in (("full", 50, 512), ("fast", 20, 512), ("draft", 12, 384))
+)
+render_cost = CostModel()
+degradations = Degradations()
+# Last successful render per prompt, used when there is no time to render again.
+_rendered: "OrderedDict[str, str]" = OrderedDict()
+PLACEHOLDER_IMAGE = "static/images/placeholder.png"
+
+def _placeholder_image() -> str:
+    if not os.path.exists(PLACEHOLDER_IMAGE):
+        from PIL import Image
+        Image.new("RGB", (256, 256), (200, 200, 200)).save(PLACEHOLDER_IMAGE)
+    return PLACEHOLDER_IMAGE
+
+def _render(prompt: str, profile: Profile, deadline: Optional[Deadline]):
+    """Run the pipeline with ``profile``, aborting between steps if the deadline can't be met."""
+    if deadline is None:
+        return sd_pipe(prompt, **profile.params).images[0]
+    watchdog = StepWatchdog(deadline, profile.params["num_inference_steps"])
+
+    def on_step_end(pipe, step, timestep, callback_kwargs):
+        watchdog.check(step + 1)
+        return callback_kwargs
+
+    try:
+        return sd_pipe(prompt, **profile.params, callback_on_step_end=on_step_end).images[0]
+    finally:
+        # Partial runs still tell us how fast steps are.
+        render_cost.observe(profile.cost * watchdog.completed / watchdog.total_steps, watchdog.elapsed)
+
+def _pick_profile(deadline: Optional[Deadline]) -> Profile:
+    if deadline is None:
+        return RENDER_PROFILES[0]
+    profile = choose_profile(RENDER_PROFILES, deadline.remaining(), render_cost)
+    if profile is None:
+        raise DeadlineExceeded(f"no render profile fits in {deadline.remaining():.2f}s")
+    return profile
 
-def generate_image(prompt: str, filename: str) -> str:
-    """Generate a thumbnail image"""
+def _observe_pool_render(profile: Profile, future) -> None:
+    """Learn from a finished pool render, whether it completed or was cut short."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is None:
+        render_cost.observe(profile.cost, future.result().seconds)
+    elif isinstance(error, DeadlineExceeded):
+        # Partial runs still tell us how fast steps are.
+        render_cost.observe(profile.cost * error.progress, error.seconds)
+
+def _close_late_frame(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+def _render_in_pool(prompt: str, profile: Profile, deadline: Optional[Deadline]):
+    """Render in a worker process; returns a shared-memory ``Frame`` to save and close."""
+    # time.monotonic() is system-wide, so the worker can check this deadline itself.
+    deadline_at = None if deadline is None else deadline.expires
+    future = render_pool.submit(prompt=prompt, deadline_at=deadline_at, **profile.params)
+    # Observed when the worker is done, even if we stop waiting before that.
+    future.add_done_callback(partial(_observe_pool_render, profile))
+    try:
+        # The worker enforces the deadline itself; the margin covers sending the frame back.
+        frame = future.result(timeout=None if deadline is None else deadline.remaining() + 1.0)
+    except TimeoutError:
+        # Nobody will save a frame that arrives after this; free it when it does.
+        future.add_done_callback(_close_late_frame)
+        raise
+    logger.info(f"Rendered ({profile.name}) in {frame.seconds:.2f}s on worker {frame.worker}")
+    return frame
+
+def generate_image(prompt: str, filename: str, budget: Optional[float] = None) -> Tuple[str, Optional[str]]:
+    """Generate a thumbnail image within ``budget`` seconds; returns (path, degradation or None)"""
     os.makedirs("static/images", exist_ok=True)
-    image = sd_pipe(prompt).images[0]
+    deadline = Deadline(budget) if budget is not None else None
+    profile = RENDER_PROFILES[0]
+    try:
+        if render_pool is not None:
+            profile = _pick_profile(deadline)
+            image = _render_in_pool(prompt, profile, deadline)
+        else:
+            # Only wait in the queue for as long as the cheapest render leaves room for.
+            cheapest = render_cost.estimate(RENDER_PROFILES[-1].cost) or 0.0
+            timeout = None if deadline is None else max(0.0, deadline.remaining() - cheapest)
+            with scheduler.slot("diffusion", timeout=timeout) as job, memory_region("render"):
+                profile = _pick_profile(deadline)
+                image = _render(prompt, profile, deadline)
+            logger.info(f"Rendered ({profile.name}) in {job.compute_seconds:.2f}s after {job.wait_seconds:.2f}s queued")
+    except (TimeoutError, RenderError) as e:
+        # DeadlineExceeded, no diffusion slot in time, or a render worker died.
+        logger.info(f"Image for {prompt!r} degraded: {e}")
+        if prompt in _rendered and os.path.exists(_rendered[prompt]):
+            return _rendered[prompt], "cached"
+        return _placeholder_image(), "placeholder"
+
     path = f"static/images/{filename}.png"
-    image.save(path)
+    # Encoding happens here for pool renders too. Frames and PIL images both close on exit,
+    # which for a frame frees its shared block even if saving fails.
+    with image, memory_region("save"):
+        image.save(path)
     logger.info(f"Image saved to: {path}")
-    return path
+    _rendered[prompt] = path
+    _rendered.move_to_end(prompt)
+    while len(_rendered) > 256:
+        _rendered.popitem(last=False)
+    return path, None if profile is RENDER_PROFILES[0] else profile.name
+
+# Full article text; NewsAPI's content field is cut off at ~200 characters.
+fetcher = ArticleFetcher()
 
 # ---------- SCHEMAS ----------
 class BriefingResponse(BaseModel):
@@ -61,6 +208,8 @@ class BriefingResponse(BaseModel):
     summary: str
     #audio_path: str
     image_path: str
+    degraded: Dict[str, str] = {}
+    """Stages that fell back to something cheaper, e.g. {"image": "draft"}."""
 
 # ---------- HELPERS ----------
 def fetch_news(topic: str = "technology", n_articles: int = 1):
@@ -73,37 +222,100 @@ def fetch_news(topic: str = "technology", n_articles: int = 1):
         return []
     return data["articles"]
 
-def generate_summary(text: str) -> str:
-    """Summarize long text into a short digest"""
-    result = summarizer(text, max_length=80, min_length=30, do_sample=False)
-    logger.info(f"Summary: {result[0]['summary_text']}")
-    return result[0]["summary_text"]
+def lead_sentences(text: str, max_chars: int = 300) -> str:
+    """Cheap extractive summary: the first sentences that fit in ``max_chars``."""
+    summary = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        if summary and len(summary) + len(sentence) + 1 > max_chars:
+            break
+        summary = f"{summary} {sentence}".strip()
+    return summary[:max_chars]
+
+@profile_memory("summarize")
+def generate_summary(text: str, budget: Optional[float] = None) -> Tuple[str, Optional[str]]:
+    """Summarize long text into a short digest; returns (summary, degradation or None)"""
+    if budget is not None and budget <= 0:
+        return lead_sentences(text), "extractive"
+    try:
+        with scheduler.slot("summarizer", timeout=budget) as job:
+            result = summarizer(text, max_length=80, min_length=30, do_sample=False, truncation=True)
+    except TimeoutError:
+        return lead_sentences(text), "extractive"
+    logger.info(f"Summary ({job.compute_seconds:.2f}s, {job.wait_seconds:.2f}s queued): {result[0]['summary_text']}")
+    return result[0]["summary_text"], None
 
 # ---------- ROUTES ----------
 @app.get("/briefing", response_model=List[BriefingResponse])
-def get_briefing(topic: Optional[str] = "technology"):
-    """End-to-end pipeline: fetch news → summarize → TTS → image"""
+@profile_memory("briefing")
+def get_briefing(topic: Optional[str] = "technology",
+                 deadline: Optional[float] = Query(None, gt=0, description="seconds; defaults to BRIEFING_DEADLINE")):
+    """End-to-end pipeline: fetch news → full text → summarize → TTS → image, degrading to meet the deadline"""
+    budget = Deadline(deadline or BRIEFING_DEADLINE)
     articles = fetch_news(topic, n_articles=2)
+    # All pages download at once, in at most a quarter of the deadline.
+    pages = fetcher.fetch_many([a.get("url") for a in articles], budget=min(ARTICLE_FETCH_BUDGET, budget.share(4)))
     results = []
 
-    for i, article in enumerate(articles):
+    for i, (article, page) in enumerate(zip(articles, pages)):
         logger.info(f"Processing article {i+1} of {len(articles)}: {article['title']}")
         title = article["title"]
-        text = article.get("content") or article.get("description") or title
+        degraded = {}
+        text, mode = source_text(page, article)
+        if mode:
+            logger.info(f"Using the NewsAPI snippet for {page.url!r}: {page.error or 'no better text'}")
+            degraded["text"] = mode
 
-        summary = generate_summary(text)
+        summary, mode = generate_summary(text, budget=budget.remaining())
+        if mode:
+            degraded["summary"] = mode
         #audio_path = generate_audio(summary, f"{topic}_{i}")
-        image_path = generate_image(title, f"{topic}_{i}")
+        # Later articles get an equal share of whatever time is left.
+        image_path, mode = generate_image(title, f"{topic}_{i}", budget=budget.share(len(articles) - i))
+        if mode:
+            degraded["image"] = mode
 
+        for stage, mode in degraded.items():
+            degradations.record(stage, mode)
         results.append(BriefingResponse(
             title=title,
             summary=summary,
             #audio_path=audio_path,
-            image_path=image_path
+            image_path=image_path,
+            degraded=degraded,
         ))
 
+    degradations.record_request(any(r.degraded for r in results))
     return results
 
+@app.get("/debug/memory")
+def memory_profile():
+    """Per-region memory stats so far (set APP_MEMPROF to collect them)"""
+    return {"enabled": memory_profiling(), "regions": memory_summary()}
+
+@app.get("/debug/scheduler")
+def scheduler_stats():
+    """CPU budget use, and queue wait vs compute time per model"""
+    return scheduler.stats()
+
+@app.get("/debug/articles")
+def article_stats():
+    """Article fetch counts: fetched, revalidated from the cache (not_modified), failed"""
+    return fetcher.stats()
+
+@app.get("/debug/renders")
+def render_stats():
+    """Render pool workers, their cores and jobs, and images per minute (RENDER_WORKERS > 0)"""
+    return render_pool.stats() if render_pool is not None else {"workers": [], "in_process": True}
+
+@app.get("/debug/degradations")
+def degradation_stats():
+    """How often /briefing stages fell back to cheaper results to meet their deadline"""
+    return {
+        "counts": degradations.snapshot(),
+        "render_seconds_per_unit": render_cost.seconds_per_unit,
+        "deadline_default": BRIEFING_DEADLINE,
+    }
+
 @app.get("/")
 def read_root():
     return {"msg": "Hello FastAPI"}
@@ -0,0 +1,40 @@
+"""
+Stable Diffusion inside a render-pool worker (see ``app.core.renderpool``).
+
+Kept out of main.py so spawned workers import only what they need, not the
+web app and its models.
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.core.deadline import Deadline, StepWatchdog
+
+
+def load_pipeline(model_id: str):
+    """Build a CPU pipeline in this worker and return its render function."""
+    # Imported here, after the pool has sized this worker's thread pools.
+    import torch
+    from diffusers import StableDiffusionPipeline
+
+    pipe = StableDiffusionPipeline.from_pretrained(model_id)
+    pipe.to("cpu")
+    pipe.set_progress_bar_config(disable=True)
+
+    def render(prompt: str, deadline_at: Optional[float] = None, **params) -> np.ndarray:
+        """RGB uint8 pixels; stops between steps once ``deadline_at`` (``time.monotonic()``) can't be met."""
+        on_step_end = None
+        if deadline_at is not None:
+            watchdog = StepWatchdog(Deadline(deadline_at - time.monotonic()), params["num_inference_steps"])
+
+            def on_step_end(pipe, step, timestep, callback_kwargs):
+                watchdog.check(step + 1)
+                return callback_kwargs
+
+        with torch.inference_mode():
+            images = pipe(prompt, output_type="np", callback_on_step_end=on_step_end, **params).images
+        return (images[0] * 255).round().astype(np.uint8)
+
+    return render
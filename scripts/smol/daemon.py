@@ -0,0 +1,281 @@
+"""
+Keep an agent loaded between prompts and serve it over a Unix socket.
+
+Loading the model dominates a one-shot ``smol.py`` run. ``AgentDaemon``
+calls its factory once, then answers requests on a local socket, one JSON
+object per line in each direction:
+
+    {"op": "run", "prompt": "...", "cwd": "/path"}  -> {"ok": true, "output": "...", "seconds": 1.2}
+    {"op": "ping"}                                   -> {"ok": true, "pid": ..., "load_seconds": ..., "runs": ...}
+    {"op": "shutdown"}                               -> {"ok": true}
+
+The factory returns ``run(prompt, cwd) -> str``. Runs share one model, so
+they are serialized; pings are answered while a run is in progress. The
+socket is created with mode 0600 in ``$XDG_RUNTIME_DIR`` (or a private
+``smol-agent-<uid>`` directory under the temp dir), and a stale socket left
+by a dead daemon is replaced. Clients and the daemon refuse a socket that
+belongs to another user, so nobody else can pose as the daemon.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+Runner = Callable[[str, str], str]
+
+
+def _private_dir(path: str) -> str:
+    """Create ``path`` as a 0700 directory, or check that an existing one is ours and private."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} is not a private directory owned by uid {os.getuid()}")
+    return path
+
+
+def default_socket_path() -> str:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "smol-agent.sock")
+    # A fixed name in a shared directory could be created first by another user.
+    directory = _private_dir(os.path.join(tempfile.gettempdir(), f"smol-agent-{os.getuid()}"))
+    return os.path.join(directory, "agent.sock")
+
+
+def _check_socket(path: str) -> None:
+    """Raise ``PermissionError`` unless ``path`` is a socket owned by us."""
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode):
+        raise PermissionError(f"{path} is not a socket")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} belongs to uid {st.st_uid}, not {os.getuid()}")
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered, but the request failed."""
+
+
+def _request(message: Dict[str, Any], socket_path: Optional[str] = None,
+             timeout: Optional[float] = None) -> Dict[str, Any]:
+    socket_path = socket_path or default_socket_path()
+    _check_socket(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection without answering")
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise DaemonError(reply.get("error", "unknown error"))
+    return reply
+
+
+def ask(prompt: str, cwd: Optional[str] = None, socket_path: Optional[str] = None,
+        timeout: Optional[float] = None) -> str:
+    """Run ``prompt`` on the daemon, from ``cwd`` (default: ours), and return the agent's answer."""
+    reply = _request({"op": "run", "prompt": prompt, "cwd": cwd or os.getcwd()}, socket_path, timeout)
+    return reply["output"]
+
+
+def ping(socket_path: Optional[str] = None, timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+    """The daemon's stats, or None when no daemon is listening."""
+    try:
+        return _request({"op": "ping"}, socket_path, timeout)
+    except (OSError, ValueError):
+        return None
+
+
+def shutdown(socket_path: Optional[str] = None, timeout: float = 5.0) -> bool:
+    """Ask the daemon to exit; False when none was running."""
+    try:
+        _request({"op": "shutdown"}, socket_path, timeout)
+        return True
+    except OSError:
+        return False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon: "AgentDaemon" = self.server.daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = daemon.handle(json.loads(line))
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AgentDaemon:
+    """Load an agent once with ``factory`` and serve it on ``socket_path``."""
+
+    def __init__(self, factory: Callable[[], Runner], socket_path: Optional[str] = None):
+        self.factory = factory
+        self.socket_path = socket_path or default_socket_path()
+        self.runs = 0
+        self.load_seconds: Optional[float] = None
+        self.started = time.time()
+        self._runner: Optional[Runner] = None
+        self._load_error: Optional[BaseException] = None
+        self._loaded = threading.Event()
+        self._run_lock = threading.Lock()
+        self._server: Optional[_Server] = None
+
+    def load(self) -> None:
+        """Build the agent; ``run`` requests wait until this has finished."""
+        start = time.perf_counter()
+        try:
+            self._runner = self.factory()
+        except BaseException as e:
+            self._load_error = e
+            # serve_forever re-raises this once the server has stopped.
+            server = self._server
+            if server is not None:
+                threading.Thread(target=server.shutdown, daemon=True).start()
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._loaded.set()
+
+    def _bind(self) -> _Server:
+        if os.path.lexists(self.socket_path):
+            # Never unlink (or trust) another user's file.
+            _check_socket(self.socket_path)
+            if ping(self.socket_path) is not None:
+                raise RuntimeError(f"a daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            server = _Server(self.socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        server.daemon = self
+        return server
+
+    def start(self) -> None:
+        """Bind the socket and start loading the agent, so clients can ping during a slow load."""
+        self._server = self._bind()
+        threading.Thread(target=self.load, name="smol-daemon-load", daemon=True).start()
+
+    def _serve(self) -> None:
+        server = self._server
+        try:
+            server.serve_forever(poll_interval=0.1)
+        finally:
+            # Don't leave a socket that accepts connections nobody will answer.
+            self.close()
+
+    def serve_forever(self) -> None:
+        if self._server is None:
+            self.start()
+        self._serve()
+        if self._load_error is not None:
+            raise self._load_error
+
+    def serve_in_thread(self) -> threading.Thread:
+        if self._server is None:
+            self.start()
+        thread = threading.Thread(target=self._serve, name="smol-daemon", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def stop(self) -> None:
+        """Stop a running ``serve_forever`` (from another thread) and remove the socket."""
+        server = self._server
+        if server is not None:
+            server.shutdown()
+        self.close()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "loaded": self._loaded.is_set() and self._load_error is None,
+                "load_seconds": self.load_seconds,
+                "runs": self.runs,
+                "busy": self._run_lock.locked(),
+            }
+        if op == "run":
+            self._loaded.wait()
+            if self._load_error is not None:
+                return {"ok": False, "error": f"agent failed to load: {self._load_error!r}"}
+            with self._run_lock:
+                start = time.perf_counter()
+                output = self._runner(request["prompt"], request.get("cwd") or os.getcwd())
+                self.runs += 1
+            return {"ok": True, "output": str(output), "seconds": time.perf_counter() - start}
+        if op == "shutdown":
+            # shutdown() waits for serve_forever to return, so it can't run on a handler thread.
+            server = self._server
+            if server is not None:
+                threading.Thread(target=server.shutdown, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+
+def main(argv=None) -> int:
+    """Thin client: talks to a running daemon without importing smolagents or the model."""
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Client for the smol agent daemon (start it with: smol.py serve)")
+    parser.add_argument("--socket", default=default_socket_path())
+    commands = parser.add_subparsers(dest="command", required=True)
+    ask_parser = commands.add_parser("ask", help="run a prompt on the daemon")
+    ask_parser.add_argument("prompt", nargs="+")
+    commands.add_parser("status", help="show whether a daemon is running")
+    commands.add_parser("stop", help="stop the daemon")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        stats = ping(args.socket)
+        if stats is None:
+            print(f"no daemon on {args.socket}")
+            return 1
+        print(json.dumps(stats, indent=2))
+        return 0
+    if args.command == "stop":
+        return 0 if shutdown(args.socket) else 1
+    try:
+        print(ask(" ".join(args.prompt), socket_path=args.socket))
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"no daemon on {args.socket}; start one with: python scripts/smol/smol.py serve", file=sys.stderr)
+        return 1
+    except DaemonError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
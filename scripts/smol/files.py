@@ -0,0 +1,301 @@
+"""
+File reading, searching and writing for the agent's file tools.
+
+Reads memory-map the file and only decode the requested line range. A
+``FileCache`` keeps each file's line-offset index, plus recently returned
+ranges and grep results, keyed by path and validated against
+``(st_mtime_ns, st_size, st_ino)``: a re-read of an unchanged file costs
+one ``stat``, and any edit (by the agent or anything else) invalidates it.
+
+Every function takes a ``cwd`` for relative paths, so the agent's file tools
+can follow the directory its shell session has ``cd``'d to.
+
+Writes go to a temporary file in the target directory through a buffered
+writer, are fsynced and then ``os.replace``d over the target, so readers
+never see a half-written file.
+"""
+
+import bisect
+import mmap
+import os
+import re
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MAX_LINES = 400
+DEFAULT_MAX_MATCHES = 100
+MAX_LINE_CHARS = 2000
+BINARY_SNIFF_BYTES = 8192
+
+StatKey = Tuple[int, int, int]
+
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _line_offsets(buf) -> array:
+    """Start offset of every line, plus a final entry at end of file."""
+    offsets = array("q", [0])
+    find, pos, size = buf.find, 0, len(buf)
+    if size == 0:
+        return offsets
+    while True:
+        pos = find(b"\n", pos) + 1
+        if pos == 0 or pos >= size:
+            break
+        offsets.append(pos)
+    offsets.append(size)
+    return offsets
+
+
+class _Entry:
+    __slots__ = ("key", "offsets", "binary", "results", "size")
+
+    def __init__(self, key: StatKey, offsets: array, binary: bool):
+        self.key = key
+        self.offsets = offsets
+        self.binary = binary
+        self.results: Dict[tuple, str] = {}
+        self.size = offsets.itemsize * len(offsets)
+
+
+class FileCache:
+    """LRU cache of line indexes and rendered results, bounded by ``max_bytes``."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, path: str, st: os.stat_result, buf) -> _Entry:
+        """The cached entry for ``path``, (re)indexing ``buf`` if the file changed."""
+        key = _stat_key(st)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                return entry
+            self._drop(path)
+        entry = _Entry(key, _line_offsets(buf), b"\0" in buf[:BINARY_SNIFF_BYTES])
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = entry
+            self.bytes += entry.size
+            self._evict()
+        return entry
+
+    def _lookup(self, path: str, st: os.stat_result, result_key: tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.key != _stat_key(st):
+                self.misses += 1
+                return None
+            result = entry.results.get(result_key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return result
+
+    def _store(self, path: str, entry: _Entry, result_key: tuple, result: str) -> None:
+        with self._lock:
+            if self._entries.get(path) is not entry or result_key in entry.results:
+                return
+            entry.results[result_key] = result
+            entry.size += len(result)
+            self.bytes += len(result)
+            self._evict()
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget ``path`` (or everything)."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.bytes = 0
+            else:
+                self._drop(os.path.realpath(path))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"files": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+
+_default_cache = FileCache()
+
+
+def _open_map(path: str):
+    """``(stat, buffer)`` for ``path``; empty files get ``b""`` since they cannot be mapped."""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return st, b""
+        return st, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _close(buf) -> None:
+    if isinstance(buf, mmap.mmap):
+        buf.close()
+
+
+def _decode(line: bytes) -> str:
+    text = line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+    if len(text) > MAX_LINE_CHARS:
+        text = text[:MAX_LINE_CHARS] + f" ... [{len(text) - MAX_LINE_CHARS} chars cut]"
+    return text
+
+
+def _resolve(path: str, cwd: Optional[str]) -> str:
+    """Absolute, symlink-free ``path``; a relative one is taken from ``cwd`` (default: ours)."""
+    return os.path.realpath(os.path.join(cwd, path) if cwd else path)
+
+
+def read_file(path: str, start_line: int = 1, end_line: Optional[int] = None,
+              max_lines: int = DEFAULT_MAX_LINES, cache: Optional[FileCache] = None,
+              cwd: Optional[str] = None) -> str:
+    """Lines ``start_line..end_line`` (1-based, inclusive) of ``path``, numbered.
+
+    At most ``max_lines`` are returned; a trailing note says how to read on.
+    """
+    cache = _default_cache if cache is None else cache
+    path = _resolve(path, cwd)
+    start_line = max(1, start_line)
+    result_key = ("read", start_line, end_line, max_lines)
+    st = os.stat(path)
+    cached = cache._lookup(path, st, result_key)
+    if cached is not None:
+        return cached
+
+    st, buf = _open_map(path)
+    try:
+        entry = cache._entry(path, st, buf)
+        if entry.binary:
+            result = f"[binary file, {st.st_size} bytes]"
+        else:
+            total = len(entry.offsets) - 1
+            last = min(total, end_line or total, start_line + max_lines - 1)
+            offsets = entry.offsets
+            lines = [
+                f"{n:>6}\t{_decode(buf[offsets[n - 1]:offsets[n]])}"
+                for n in range(start_line, last + 1)
+            ]
+            if start_line > total:
+                lines.append(f"[file has {total} lines]")
+            elif last < min(total, end_line or total):
+                lines.append(f"[lines {start_line}-{last} of {total}; read from line {last + 1} for more]")
+            result = "\n".join(lines)
+    finally:
+        _close(buf)
+    cache._store(path, entry, result_key, result)
+    return result
+
+
+def grep_file(path: str, pattern: str, context: int = 0, ignore_case: bool = False,
+              max_matches: int = DEFAULT_MAX_MATCHES, cache: Optional[FileCache] = None,
+              cwd: Optional[str] = None) -> str:
+    """Lines of ``path`` matching the regex ``pattern``, as ``line:text`` (context lines use ``-``)."""
+    cache = _default_cache if cache is None else cache
+    path = _resolve(path, cwd)
+    result_key = ("grep", pattern, context, ignore_case, max_matches)
+    st = os.stat(path)
+    cached = cache._lookup(path, st, result_key)
+    if cached is not None:
+        return cached
+
+    regex = re.compile(pattern.encode(), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    st, buf = _open_map(path)
+    try:
+        entry = cache._entry(path, st, buf)
+        if entry.binary:
+            result = f"[binary file, {st.st_size} bytes]"
+        else:
+            offsets = entry.offsets
+            total = len(offsets) - 1
+            hits = []
+            for match in regex.finditer(buf):
+                line = bisect.bisect_right(offsets, match.start())
+                if not hits or hits[-1] != line:
+                    hits.append(line)
+                    if len(hits) > max_matches:
+                        break
+            shown = hits[:max_matches]
+            wanted = set(shown)
+            out, previous = [], 0
+            for line in shown:
+                for n in range(max(1, line - context), min(total, line + context) + 1):
+                    if n <= previous:
+                        continue
+                    if previous and n > previous + 1:
+                        out.append("--")
+                    sep = ":" if n in wanted else "-"
+                    out.append(f"{n}{sep}{_decode(buf[offsets[n - 1]:offsets[n]])}")
+                    previous = n
+            if not shown:
+                out.append("[no matches]")
+            elif len(hits) > max_matches:
+                out.append(f"[stopped after {max_matches} matching lines]")
+            result = "\n".join(out)
+    finally:
+        _close(buf)
+    cache._store(path, entry, result_key, result)
+    return result
+
+
+def _process_umask() -> int:
+    # os.umask can only be read by setting it, so do it once, before any tool threads exist.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _process_umask()
+
+
+def write_file(path: str, content: str, cache: Optional[FileCache] = None, cwd: Optional[str] = None) -> int:
+    """Atomically replace ``path`` with ``content`` (UTF-8); returns bytes written.
+
+    Parent directories are created and an existing file's permissions are
+    kept. A symlink is followed, so its target is replaced, not the link.
+    """
+    cache = _default_cache if cache is None else cache
+    target = _resolve(path, cwd)
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(target).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    data = content.encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+    try:
+        with open(fd, "wb", buffering=1 << 20) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    cache.invalidate(target)
+    return len(data)
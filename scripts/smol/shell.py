@@ -0,0 +1,239 @@
+"""
+Long-lived bash sessions for the agent's ``sh`` tool.
+
+Spawning ``subprocess.run(..., shell=True)`` per command pays process start
+and shell init every time and forgets ``cd``/``export``. A ``ShellSession``
+keeps one ``bash`` running and frames each command with a random sentinel:
+
+    { <cmd>
+    } </dev/null 2>&1
+    printf '\\n<sentinel> %d %s\\n' "$?" "$PWD"
+
+Output is read until the sentinel line, through a bounded buffer that keeps
+the first and last ``max_output / 2`` bytes and counts what was dropped, so a
+runaway ``cat`` cannot balloon memory. A command that exceeds its timeout
+gets its process group killed and the session is restarted.
+
+``ShellPool`` hands out several sessions for commands that may run in
+parallel; each borrowed session is moved to the working directory the last
+command left behind.
+"""
+
+import os
+import queue
+import selectors
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_OUTPUT = 64 * 1024
+
+
+@dataclass
+class ShellResult:
+    output: str
+    exit_code: Optional[int]
+    """None when the command timed out."""
+    truncated: int = 0
+    """Bytes dropped from the middle of the output."""
+    cwd: Optional[str] = None
+
+    @property
+    def timed_out(self) -> bool:
+        return self.exit_code is None
+
+    def for_agent(self) -> str:
+        """Output plus a short note on truncation, timeout or a non-zero exit."""
+        notes = []
+        if self.truncated:
+            notes.append(f"[{self.truncated} bytes of output truncated]")
+        if self.timed_out:
+            notes.append("[timed out; shell restarted, cwd and env were reset]")
+        elif self.exit_code:
+            notes.append(f"[exit {self.exit_code}]")
+        return self.output + ("\n" + " ".join(notes) if notes else "")
+
+
+class _BoundedBuffer:
+    """Keep the head and tail of a byte stream, counting what falls in between."""
+
+    def __init__(self, limit: int, keep_tail: int):
+        self.head_limit = max(0, limit // 2)
+        self.tail_share = limit - self.head_limit
+        # The tail may hold more than its share while reading, to find the marker.
+        self.tail_limit = max(self.tail_share, keep_tail)
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def write(self, data: bytes) -> None:
+        # New bytes always land in the tail, so the end of the stream is never split.
+        self.tail += data
+        excess = len(self.tail) - self.tail_limit
+        if excess > 0:
+            moved = max(0, min(self.head_limit - len(self.head), excess))
+            self.head += self.tail[:moved]
+            self.dropped += excess - moved
+            del self.tail[:excess]
+
+
+class ShellSession:
+    """One persistent ``bash`` process running commands one at a time."""
+
+    def __init__(self, cwd: Optional[str] = None, env: Optional[dict] = None, shell: str = "bash"):
+        self.shell = shell
+        self.start_cwd = cwd
+        self.env = env
+        self.cwd = cwd or os.getcwd()
+        self.commands = 0
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._start()
+
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            [self.shell, "--noprofile", "--norc"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.start_cwd,
+            env=self.env,
+            start_new_session=True,
+        )
+        self.cwd = self.start_cwd or os.getcwd()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _kill(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            os.killpg(self._proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self._proc.wait()
+        for stream in (self._proc.stdin, self._proc.stdout):
+            stream.close()
+        self._proc = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, cmd: str, timeout: float = DEFAULT_TIMEOUT, max_output: int = DEFAULT_MAX_OUTPUT,
+            on_output: Optional[Callable[[bytes], None]] = None) -> ShellResult:
+        """Run ``cmd`` in this session; ``on_output`` receives raw chunks as they arrive."""
+        with self._lock:
+            if not self.alive:
+                self._kill()
+                self._start()
+            sentinel = f"__SMOL_DONE_{uuid.uuid4().hex}__".encode()
+            script = f"{{ {cmd}\n}} </dev/null 2>&1\nprintf '\\n%s %d %s\\n' {sentinel.decode()} \"$?\" \"$PWD\"\n"
+            try:
+                self._proc.stdin.write(script.encode())
+                self._proc.stdin.flush()
+            except BrokenPipeError:
+                self._kill()
+                self._start()
+                return ShellResult("shell exited unexpectedly", exit_code=-1, cwd=self.cwd)
+            self.commands += 1
+            return self._read_until(sentinel, time.monotonic() + timeout, max_output, on_output)
+
+    def _read_until(self, sentinel: bytes, deadline: float, max_output: int,
+                    on_output: Optional[Callable[[bytes], None]]) -> ShellResult:
+        marker = b"\n" + sentinel + b" "
+        # The tail must always be able to hold the marker line.
+        buffer = _BoundedBuffer(max_output, keep_tail=len(marker) + 4200)
+        fd = self._proc.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    return self._timed_out(buffer)
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self._kill()
+                    self._start()
+                    return self._result(buffer, bytes(buffer.tail), exit_code=-1)
+                if on_output:
+                    on_output(chunk)
+                buffer.write(chunk)
+                end = buffer.tail.find(marker)
+                line_end = buffer.tail.find(b"\n", end + len(marker)) if end >= 0 else -1
+                if line_end >= 0:
+                    status = buffer.tail[end + len(marker):line_end].decode(errors="replace")
+                    code, _, cwd = status.partition(" ")
+                    self.cwd = cwd or self.cwd
+                    return self._result(buffer, bytes(buffer.tail[:end]), exit_code=int(code))
+
+    def _result(self, buffer: _BoundedBuffer, tail: bytes, exit_code: Optional[int]) -> ShellResult:
+        if buffer.dropped and len(tail) > buffer.tail_share:
+            buffer.dropped += len(tail) - buffer.tail_share
+            tail = tail[len(tail) - buffer.tail_share:]
+        if buffer.dropped:
+            text = (bytes(buffer.head).decode(errors="replace") + "\n...\n" + tail.decode(errors="replace"))
+        else:
+            text = (bytes(buffer.head) + tail).decode(errors="replace")
+        return ShellResult(text, exit_code=exit_code, truncated=buffer.dropped, cwd=self.cwd)
+
+    def _timed_out(self, buffer: _BoundedBuffer) -> ShellResult:
+        cwd = self.cwd
+        self._kill()
+        self._start()
+        result = self._result(buffer, bytes(buffer.tail), exit_code=None)
+        result.cwd = cwd
+        return result
+
+
+class ShellPool:
+    """A few ``ShellSession``s for commands that may run concurrently.
+
+    Sessions share the working directory: a borrowed session first ``cd``s to
+    wherever the previous command finished. Exported variables are per session.
+    """
+
+    def __init__(self, size: int = 2, cwd: Optional[str] = None, **session_kwargs):
+        self.cwd = cwd or os.getcwd()
+        self._idle: "queue.Queue[ShellSession]" = queue.Queue()
+        self._sessions = [ShellSession(cwd=self.cwd, **session_kwargs) for _ in range(size)]
+        for session in self._sessions:
+            self._idle.put(session)
+
+    def run(self, cmd: str, timeout: float = DEFAULT_TIMEOUT, cwd: Optional[str] = None, **kwargs) -> ShellResult:
+        """Run ``cmd`` on an idle session; with ``cwd``, run it there and leave the pool's directory alone."""
+        session = self._idle.get()
+        try:
+            start = cwd or self.cwd
+            if session.cwd != start:
+                session.run(f"cd {shlex.quote(start)}", timeout=timeout)
+            result = session.run(cmd, timeout=timeout, **kwargs)
+            if result.cwd and cwd is None:
+                self.cwd = result.cwd
+            return result
+        finally:
+            self._idle.put(session)
+
+    def close(self) -> None:
+        for session in self._sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,10 +1,100 @@
-from smolagents import CodeAgent, MLXModel, tool
-from subprocess import run
+from smolagents import CodeAgent, MLXModel, TransformersModel, tool
+import os
+import platform
+import shlex
 import sys
+import threading
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import daemon
+import files
+from shell import ShellPool, ShellSession
+from toolexec import ToolExecutor, format_step_report, is_read_only_command
+
+COMMON = ("use read_file to read files, grep_file or rg to search, use ls and standard shell commands to explore; "
+          "use run_tools to make several independent calls at once.")
+
+# "mlx" on Apple silicon; "transformers" runs on the CPU anywhere; "tiny" is small enough for smoke tests.
+DEFAULT_MODELS = {
+    "mlx": "mlx-community/Qwen3-Coder-30B-A3B-Instruct-4bit-dwq-v2",
+    "transformers": "Qwen/Qwen2.5-Coder-7B-Instruct",
+    "tiny": "HuggingFaceTB/SmolLM2-135M-Instruct",
+}
+
+# One bash for the whole run: cd/export carry over and no process is spawned per call.
+_shell = None
+# Extra sessions for read-only commands that run_tools executes in parallel; they start in _shell's cwd.
+_readers = None
+# Guards creating both, and is held while _shell runs so readers never see its cwd mid-command.
+_shell_lock = threading.Lock()
+
+def _cwd() -> str:
+    """Where relative paths in file tools point: wherever the sh tool has cd'd to."""
+    with _shell_lock:
+        return _shell.cwd if _shell is not None else os.getcwd()
+
+def _write_file(path: str, content: str) -> str:
+    files.write_file(path, content, cwd=_cwd())
+    return f"saved:{path}"
+
+def _sh(cmd: str) -> str:
+    global _shell, _readers
+    with _shell_lock:
+        if _shell is None:
+            _shell = ShellSession()
+        if not executor.in_worker():
+            return _shell.run(cmd).for_agent()
+        if _readers is None:
+            _readers = ShellPool(size=executor.max_workers, cwd=_shell.cwd)
+        cwd = _shell.cwd
+    return _readers.run(cmd, cwd=cwd).for_agent()
+
+executor = ToolExecutor(max_workers=4)
+# A cd through sh is a mutating call and clears the memo, so keying on the relative path is safe.
+executor.register("read_file", lambda path, start_line=1, end_line=0: files.read_file(path, start_line, end_line or None,
+                                                                                     cwd=_cwd()),
+                  read_only=True)
+executor.register("grep_file", lambda path, pattern, context=0: files.grep_file(path, pattern, context, cwd=_cwd()),
+                  read_only=True)
+executor.register("write_file", _write_file)
+executor.register("sh", _sh, read_only=lambda kwargs: is_read_only_command(kwargs["cmd"]))
+
+@tool
+def read_file(path: str, start_line: int = 1, end_line: int = 0) -> str:
+    """Read a file, or a range of its lines, with line numbers.
+    Args:
+      path (str): File path.
+      start_line (int): First line to return (1-based).
+      end_line (int): Last line to return, inclusive; 0 reads to the end (at most 400 lines per call).
+    Returns:
+      str: Numbered lines, plus a note on how to read further if cut short.
+    """
+    try:
+        return executor.call("read_file", path=path, start_line=start_line, end_line=end_line)
+    except Exception as e:
+        return f"error:{e}"
+
+@tool
+def grep_file(path: str, pattern: str, context: int = 0) -> str:
+    """Search a file for a regular expression.
+    Args:
+      path (str): File path.
+      pattern (str): Python regular expression.
+      context (int): Lines of context to show around each match.
+    Returns:
+      str: Matching lines as line:text, context lines as line-text.
+    """
+    try:
+        return executor.call("grep_file", path=path, pattern=pattern, context=context)
+    except Exception as e:
+        return f"error:{e}"
 
 @tool
 def write_file(path: str, content: str) -> str:
-    """Write text.
+    """Write text, replacing the file atomically.
     Args:
       path (str): File path.
       content (str): Text to write.
@@ -12,35 +102,102 @@ def write_file(path: str, content: str) -> str:
       str: Status.
     """
     try:
-        open(path, "w", encoding="utf-8").write(content)
-        return f"saved:{path}"
+        return executor.call("write_file", path=path, content=content)
     except Exception as e:
         return f"error:{e}"
 
 @tool
 def sh(cmd: str) -> str:
-    """Run a shell command.
+    """Run a shell command in a persistent bash session (cd and export carry over).
     Args:
       cmd (str): Command to execute.
     Returns:
-      str: stdout+stderr.
+      str: stdout+stderr, plus a note on a non-zero exit, timeout or truncation.
     """
     try:
-        r = run(cmd, shell=True, capture_output=True, text=True)
-        return r.stdout + r.stderr
+        return executor.call("sh", cmd=cmd)
     except Exception as e:
         return f"error:{e}"
 
-if __name__ == "__main__":
-    print("que paza")
-    if len(sys.argv) < 2:
-        print("usage: python agent.py 'your prompt'"); sys.exit(1)
-    common = "use cat/head to read files, use rg to search, use ls and standard shell commands to explore."
+@tool
+def run_tools(calls: list) -> list:
+    """Run several independent tool calls in one go; read-only ones run in parallel.
+    Args:
+      calls (list): Items like {"tool": "read_file", "args": {"path": "a.py"}}; tool is read_file, grep_file, write_file or sh.
+    Returns:
+      list: One result per call, in the same order.
+    """
+    try:
+        results = executor.call_many([(c["tool"], c.get("args", {})) for c in calls], return_exceptions=True)
+        return [f"error:{r}" if isinstance(r, Exception) else r for r in results]
+    except Exception as e:
+        return [f"error:{e}"]
+
+def _report_tools(step, agent=None):
+    report = executor.step_report()
+    if report["calls"]:
+        print(format_step_report(report))
+
+def default_backend() -> str:
+    if sys.platform == "darwin" and platform.machine() == "arm64":
+        return "mlx"
+    return "transformers"
+
+def build_model(backend: str, model_id: str = None):
+    model_id = model_id or DEFAULT_MODELS[backend]
+    if backend == "mlx":
+        return MLXModel(model_id=model_id, max_tokens=8192, trust_remote_code=True)
+    from app.core.utils import limit_native_threads
+    # Before torch is imported, so its thread pools are sized to our CPU quota.
+    limit_native_threads()
+    return TransformersModel(
+        model_id=model_id,
+        device_map="cpu",
+        torch_dtype="auto",
+        max_new_tokens=1024 if backend == "tiny" else 8192,
+        trust_remote_code=True,
+    )
+
+def build_runner(backend: str, model_id: str = None):
+    """Load the model once and return ``run(prompt, cwd)`` for the daemon."""
     agent = CodeAgent(
-        model=MLXModel(model_id="mlx-community/Qwen3-Coder-30B-A3B-Instruct-4bit-dwq-v2", max_tokens=8192, trust_remote_code=True),
-        tools=[write_file, sh],
+        model=build_model(backend, model_id),
+        tools=[read_file, grep_file, write_file, sh, run_tools],
         add_base_tools=True,
+        step_callbacks=[_report_tools],
     )
-    print(dir(agent))
-    print(agent.run(" ".join(sys.argv[1:]) + " " + common))
-    
\ No newline at end of file
+
+    def run(prompt: str, cwd: str) -> str:
+        os.chdir(cwd)
+        with _shell_lock:
+            if _shell is not None:
+                _shell.run(f"cd {shlex.quote(cwd)}")
+        # The previous prompt may have run elsewhere, or files changed in between.
+        executor.invalidate()
+        return str(agent.run(prompt + " " + COMMON))
+    return run
+
+USAGE = """usage:
+  python smol.py 'your prompt'                 run on the daemon if one is up, else load the model here
+  python smol.py serve [--backend B] [--model ID] [--socket PATH]
+                                               load the model once and serve prompts (see daemon.py)"""
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(USAGE); sys.exit(1)
+    if sys.argv[1] == "serve":
+        import argparse
+        parser = argparse.ArgumentParser(prog="smol.py serve")
+        parser.add_argument("--backend", choices=sorted(DEFAULT_MODELS), default=default_backend())
+        parser.add_argument("--model", help="model id (default depends on the backend)")
+        parser.add_argument("--socket", default=daemon.default_socket_path())
+        args = parser.parse_args(sys.argv[2:])
+        server = daemon.AgentDaemon(lambda: build_runner(args.backend, args.model), args.socket)
+        print(f"loading {args.model or DEFAULT_MODELS[args.backend]} ({args.backend}); listening on {args.socket}")
+        server.serve_forever()
+        sys.exit(0)
+    prompt = " ".join(sys.argv[1:])
+    if daemon.ping() is not None:
+        print(daemon.ask(prompt))
+    else:
+        print(build_runner(default_backend())(prompt, os.getcwd()))
@@ -0,0 +1,306 @@
+"""
+Tool execution for the agent: memoized read-only calls, parallel batches, step timing.
+
+Each tool is registered as read-only or mutating; ``sh`` is classified per
+command by ``is_read_only_command``. Read-only results are memoized on
+``(tool, arguments)`` until the next mutating call clears the memo.
+``call_many`` runs a batch in order, but consecutive read-only calls run
+concurrently on a thread pool; a mutating call waits for the reads before
+it and the reads after it wait for it.
+
+Every call is timed, and ``step_report`` returns and resets the totals,
+so the agent can print tool time per step.
+"""
+
+import json
+import re
+import shlex
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Commands that only read, when run without output redirection. uniq (with a
+# second operand) and xxd (-r) can write files, so they are not listed.
+READ_ONLY_COMMANDS = frozenset({
+    "ls", "cat", "head", "tail", "wc", "grep", "egrep", "fgrep", "rg", "ag", "fd", "find", "pwd", "echo",
+    "printf", "stat", "file", "du", "df", "tree", "which", "type", "diff", "cmp", "sort", "cut", "tr",
+    "nl", "basename", "dirname", "realpath", "readlink", "printenv", "whoami", "uname", "sed", "jq",
+    "md5sum", "sha1sum", "sha256sum", "od", "hexdump", "true", "false", "test", "[", "column",
+})
+READ_ONLY_GIT = frozenset({"status", "log", "diff", "show", "ls-files", "grep", "blame", "rev-parse", "describe"})
+# Flags that make an otherwise read-only command write (or run another program).
+# One-letter flags also count inside clusters (-ni), long ones as --flag=value
+# or an abbreviation; find's single-dash words only match as a prefix (-fprint0).
+MUTATING_FLAGS = {
+    "sed": ("-i", "--in-place"),
+    "find": ("-delete", "-exec", "-execdir", "-ok", "-okdir", "-fprint", "-fprintf", "-fls"),
+    "sort": ("-o", "--output"),
+    "tree": ("-o",),
+    "fd": ("-x", "-X", "--exec", "--exec-batch"),
+    "rg": ("--pre",),
+    "git": ("--output", "-O", "--open-files-in-pager"),
+}
+SEPARATORS = frozenset({"|", "||", "&&", ";", "&", "|&", "(", ")", ";;"})
+SAFE_REDIRECT_TARGETS = frozenset({"/dev/null", "&1", "&2", "1", "2"})
+
+# sed scripts are parsed just enough to find their w/W/e commands and s///w, s///e flags.
+_SED_SUBSTITUTE = re.compile(r"s(.)(?:\\.|(?!\1).)*\1(?:\\.|(?!\1).)*\1([0-9a-zA-Z]*)", re.S)
+_SED_TRANSLATE = re.compile(r"y(.)(?:\\.|(?!\1).)*\1(?:\\.|(?!\1).)*\1", re.S)
+_SED_ADDRESS = re.compile(r"/(?:\\.|[^/\\])*/", re.S)
+
+ReadOnly = Union[bool, Callable[[Dict[str, Any]], bool]]
+Call = Tuple[str, Dict[str, Any]]
+
+
+def _sed_script_writes(script: str) -> bool:
+    """Whether a sed script may write a file or run a command (``w``/``W``/``e``, or those ``s`` flags)."""
+    for match in _SED_SUBSTITUTE.finditer(script):
+        if set(match.group(2)) & {"w", "e"}:
+            return True
+    rest = _SED_ADDRESS.sub("", _SED_TRANSLATE.sub("", _SED_SUBSTITUTE.sub("", script)))
+    # Labels and a/i/c text also land here; a stray letter errs on the mutating side.
+    return re.search(r"[wWe]", rest) is not None
+
+
+def _sed_writes(args: List[str]) -> bool:
+    scripts: List[str] = []
+    operands: List[str] = []
+    words = iter(args)
+    for word in words:
+        if word.startswith("--"):
+            name, eq, value = word.partition("=")
+            if name in ("--expression", "--file", "--line-length") and not eq:
+                value = next(words, "")
+            if name == "--file":
+                return True  # the script is in a file we cannot see
+            if name == "--expression":
+                scripts.append(value)
+        elif word.startswith("-") and len(word) > 1:
+            # A cluster like -ne: the first of e/f/l takes the rest of the word or the next one.
+            for j, flag in enumerate(word[1:], 2):
+                if flag in "efl":
+                    if flag == "f":
+                        return True
+                    value = word[j:] or next(words, "")
+                    if flag == "e":
+                        scripts.append(value)
+                    break
+        else:
+            operands.append(word)
+    if not scripts and operands:
+        scripts.append(operands[0])
+    return any(_sed_script_writes(script) for script in scripts)
+
+
+def _has_flag(word: str, flag: str) -> bool:
+    if flag.startswith("--"):
+        option = word.partition("=")[0]
+        return len(option) > 2 and option.startswith("--") and flag.startswith(option)
+    if len(flag) == 2:
+        return word.startswith("-") and not word.startswith("--") and flag[1] in word[1:]
+    return word.startswith(flag)
+
+
+def _segment_is_read_only(words: List[str]) -> bool:
+    if not words:
+        return True
+    name = words[0].rsplit("/", 1)[-1]
+    if "=" in name:
+        # Variable assignment changes the session.
+        return False
+    if name == "git":
+        if len(words) < 2 or words[1] not in READ_ONLY_GIT:
+            return False
+    elif name not in READ_ONLY_COMMANDS:
+        return False
+    if name == "sed" and _sed_writes(words[1:]):
+        return False
+    flags = MUTATING_FLAGS.get(name, ())
+    return not any(_has_flag(w, f) for w in words[1:] for f in flags)
+
+
+def is_read_only_command(cmd: str) -> bool:
+    """Best-effort check that a shell command neither writes files nor changes session state.
+
+    Anything it cannot vouch for (unknown commands, ``cd``, ``export``,
+    command substitution, redirection to a file) counts as mutating.
+    """
+    if "`" in cmd or "$(" in cmd:
+        return False
+    # Each line is a command (heredoc bodies too, which errs on the mutating side).
+    lexer = shlex.shlex(cmd.replace("\n", " ; "), posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return False
+    words: List[str] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in SEPARATORS:
+            if not _segment_is_read_only(words):
+                return False
+            words = []
+        elif token in (">", ">>", "&>", ">&", ">|"):
+            target = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if (token.endswith("&") and target.isdigit()) or target in SAFE_REDIRECT_TARGETS:
+                i += 2
+                # Drop a leading fd number ("2>") from the command's words.
+                if words and words[-1].isdigit():
+                    words.pop()
+                continue
+            return False
+        elif token in ("<", "<<", "<<<"):
+            i += 2
+            continue
+        else:
+            words.append(token)
+        i += 1
+    return _segment_is_read_only(words)
+
+
+class ToolExecutor:
+    """Run registered tools with memoization, parallel read-only batches and timing."""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._tools: Dict[str, Tuple[Callable[..., Any], ReadOnly]] = {}
+        self._memo: Dict[Tuple[str, str], Any] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._reset_step()
+
+    def register(self, name: str, func: Callable[..., Any], read_only: ReadOnly = False) -> None:
+        """Add a tool; ``read_only`` may be a predicate over the call's keyword arguments."""
+        self._tools[name] = (func, read_only)
+
+    def is_read_only(self, name: str, kwargs: Dict[str, Any]) -> bool:
+        read_only = self._tools[name][1]
+        return read_only(kwargs) if callable(read_only) else read_only
+
+    def invalidate(self) -> None:
+        """Forget memoized results (e.g. after changes made outside the tools)."""
+        with self._lock:
+            self._memo.clear()
+            self._generation += 1
+
+    def _reset_step(self) -> None:
+        self._step = {"calls": 0, "cached": 0, "tool_seconds": 0.0, "wall_seconds": 0.0,
+                      "by_tool": defaultdict(float)}
+
+    def _record(self, name: str, seconds: float, cached: bool) -> None:
+        with self._lock:
+            self._step["calls"] += 1
+            self._step["cached"] += cached
+            self._step["tool_seconds"] += seconds
+            self._step["by_tool"][name] += seconds
+
+    def _run(self, name: str, kwargs: Dict[str, Any]) -> Any:
+        if name not in self._tools:
+            raise KeyError(f"unknown tool {name!r}")
+        func = self._tools[name][0]
+        if not self.is_read_only(name, kwargs):
+            self.invalidate()
+            start = time.perf_counter()
+            try:
+                return func(**kwargs)
+            finally:
+                self._record(name, time.perf_counter() - start, cached=False)
+                # Reads that overlapped the write must not be memoized either.
+                self.invalidate()
+
+        key = (name, json.dumps(kwargs, sort_keys=True, default=str))
+        with self._lock:
+            generation = self._generation
+            cached = key in self._memo
+            result = self._memo.get(key)
+        if cached:
+            self._record(name, 0.0, cached=True)
+            return result
+        start = time.perf_counter()
+        try:
+            result = func(**kwargs)
+        finally:
+            self._record(name, time.perf_counter() - start, cached=False)
+        with self._lock:
+            if generation == self._generation:
+                self._memo[key] = result
+        return result
+
+    def call(self, name: str, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return self._run(name, kwargs)
+        finally:
+            with self._lock:
+                self._step["wall_seconds"] += time.perf_counter() - start
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=f"smol-tool-{id(self)}")
+        return self._pool
+
+    def in_worker(self) -> bool:
+        """Whether the current thread is running a parallel read-only call for this executor."""
+        return threading.current_thread().name.startswith(f"smol-tool-{id(self)}_")
+
+    def call_many(self, calls: Sequence[Call], return_exceptions: bool = False) -> List[Any]:
+        """Run ``(name, kwargs)`` calls in order, overlapping consecutive read-only ones.
+
+        With ``return_exceptions`` a failed call's exception is returned in
+        its slot instead of being raised.
+        """
+        start = time.perf_counter()
+        results: List[Any] = [None] * len(calls)
+        pending = []
+
+        def settle():
+            for index, future in pending:
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+            pending.clear()
+
+        try:
+            for index, (name, kwargs) in enumerate(calls):
+                if name in self._tools and self.is_read_only(name, kwargs):
+                    pending.append((index, self._executor().submit(self._run, name, kwargs)))
+                    continue
+                settle()
+                try:
+                    results[index] = self._run(name, kwargs)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[index] = e
+            settle()
+        finally:
+            with self._lock:
+                self._step["wall_seconds"] += time.perf_counter() - start
+        return results
+
+    def step_report(self) -> Dict[str, Any]:
+        """Tool totals since the last report: calls, memo hits, summed and wall-clock seconds."""
+        with self._lock:
+            report = dict(self._step, by_tool=dict(self._step["by_tool"]))
+            self._reset_step()
+        return report
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def format_step_report(report: Dict[str, Any]) -> str:
+    by_tool = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(report["by_tool"].items()))
+    return (f"[tools] {report['calls']} call(s), {report['cached']} memoized, "
+            f"{report['tool_seconds']:.2f}s in tools over {report['wall_seconds']:.2f}s wall"
+            + (f" ({by_tool})" if by_tool else ""))
@@ -0,0 +1,10 @@
+"""
+Micro-benchmarks with stored baselines.
+
+    python -m app.bench run --save benchmarks/baseline.json
+    python -m app.bench compare benchmarks/baseline.json --threshold 0.1
+"""
+
+from .runner import *
+
+__all__ = ["benchmark", "discover", "run_benchmark", "run_suite", "compare", "load_baseline", "save_baseline"]
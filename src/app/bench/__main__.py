@@ -0,0 +1,83 @@
+"""
+Command-line interface for ``app.bench``.
+"""
+
+import argparse
+import fnmatch
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+from .runner import compare, discover, load_baseline, run_suite, save_baseline
+
+# Repository root benchmarks/ directory (src/app/bench/__main__.py -> root).
+DEFAULT_PATHS = [str(Path(__file__).resolve().parents[3] / "benchmarks")]
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def _show(name: str, r: Dict[str, Any]) -> None:
+    print(f"{name:<40} {_format_time(r['median_s'])} ±{r['stdev_s'] / r['median_s'] * 100 if r['median_s'] else 0:5.1f}%"
+          f"  x{r['number']:<7} {r['outliers']:>2} outliers  peak {r['peak_bytes'] / 1024:9.1f} KiB")
+
+
+def _run(args) -> Dict[str, Any]:
+    benchmarks = discover(args.paths or DEFAULT_PATHS, args.k)
+    if not benchmarks:
+        sys.exit("no benchmarks found")
+    return run_suite(benchmarks, progress=_show, warmup=args.warmup, repeat=args.repeat, min_time=args.min_time)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bench", description="Run micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run benchmarks and optionally save a baseline")
+    compare_parser = commands.add_parser("compare", help="compare a run (or --current file) with a baseline")
+    compare_parser.add_argument("baseline", help="baseline JSON file")
+    compare_parser.add_argument("--current", help="compare this saved run instead of running now")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    compare_parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed peak-memory growth")
+    for p in (run_parser, compare_parser):
+        p.add_argument("paths", nargs="*", help="bench_*.py files or directories (default: benchmarks/)")
+        p.add_argument("-k", metavar="PATTERN", help="only run benchmarks matching this glob, e.g. 'core.*'")
+        p.add_argument("--warmup", type=int, default=3)
+        p.add_argument("--repeat", type=int, default=20)
+        p.add_argument("--min-time", type=float, default=0.01, help="minimum seconds per sample")
+        p.add_argument("--save", help="write this run to a baseline JSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare" and args.current:
+        current = load_baseline(args.current)
+    else:
+        current = _run(args)
+    if args.save:
+        save_baseline(current, args.save)
+        print(f"saved {len(current['results'])} results to {args.save}")
+    if args.command == "run":
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if args.k:
+        baseline["results"] = {n: r for n, r in baseline["results"].items() if fnmatch.fnmatch(n, args.k)}
+    rows = compare(current, baseline, args.threshold, args.memory_threshold)
+    print(f"\nvs {args.baseline} (commit {baseline.get('commit')}, {baseline.get('created')}):")
+    for row in rows:
+        if "ratio" in row:
+            memory = " (memory)" if row["memory_regressed"] else ""
+            print(f"{row['name']:<40} {row['ratio']:6.2f}x  {row['status']}{memory}")
+        else:
+            print(f"{row['name']:<40} {'':>7}  {row['status']}")
+    regressed = [row["name"] for row in rows if row["status"] == "regressed"]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Discovery, timing and baseline comparison for micro-benchmarks.
+
+A benchmark is a zero-argument function named ``bench_*`` in a ``bench_*.py``
+file. Each one is warmed up, then timed in ``repeat`` samples of ``number``
+calls (``number`` is calibrated so a sample lasts at least ``min_time``).
+Samples further than ``OUTLIER_MADS`` median absolute deviations from the
+median are dropped before the statistics are computed. Memory is measured
+in a separate tracemalloc pass so it does not distort the timings.
+"""
+
+import fnmatch
+import importlib.util
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+OUTLIER_MADS = 3.0
+
+Benchmark = Callable[[], Any]
+
+
+def benchmark(func: Optional[Benchmark] = None, *, number: Optional[int] = None, repeat: Optional[int] = None,
+              name: Optional[str] = None):
+    """Mark a function as a benchmark, optionally fixing its loop counts or name.
+
+    Functions named ``bench_*`` are discovered without the decorator.
+    """
+    def mark(f: Benchmark) -> Benchmark:
+        f.__bench__ = {"number": number, "repeat": repeat, "name": name or f.__name__.removeprefix("bench_")}
+        return f
+    return mark(func) if func is not None else mark
+
+
+def _load(path: Path):
+    # Benchmarks import their neighbours (and scripts/ helpers) like scripts do.
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"bench_suite_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover(paths: Iterable[str], pattern: Optional[str] = None) -> List[Tuple[str, Benchmark]]:
+    """Collect ``(suite.name, function)`` pairs from files or directories, optionally filtered by a glob."""
+    files: List[Path] = []
+    for p in map(Path, paths):
+        files += sorted(p.glob("bench_*.py")) if p.is_dir() else [p]
+
+    found = []
+    for path in files:
+        module = _load(path)
+        suite = path.stem.removeprefix("bench_")
+        for attr, func in vars(module).items():
+            if not callable(func) or getattr(func, "__module__", None) != module.__name__:
+                continue
+            if not (hasattr(func, "__bench__") or attr.startswith("bench_")):
+                continue
+            options = getattr(func, "__bench__", {"name": attr.removeprefix("bench_")})
+            full_name = f"{suite}.{options['name']}"
+            if pattern is None or fnmatch.fnmatch(full_name, pattern):
+                found.append((full_name, func))
+    return found
+
+
+def _calibrate(func: Benchmark, min_time: float) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time or number >= 1_000_000:
+            return number
+        number *= 10 if time.perf_counter() - start < min_time / 10 else 2
+
+
+def reject_outliers(samples: List[float], mads: float = OUTLIER_MADS) -> List[float]:
+    """Drop samples more than ``mads`` median absolute deviations from the median."""
+    median = statistics.median(samples)
+    mad = statistics.median(abs(s - median) for s in samples)
+    if mad == 0:
+        return list(samples)
+    return [s for s in samples if abs(s - median) <= mads * mad]
+
+
+def measure_memory(func: Benchmark) -> Dict[str, int]:
+    """Peak and retained bytes for one call, measured with tracemalloc."""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return {"peak_bytes": max(0, peak - before), "retained_bytes": max(0, after - before)}
+
+
+def run_benchmark(func: Benchmark, warmup: int = 3, repeat: int = 20, min_time: float = 0.01,
+                  number: Optional[int] = None) -> Dict[str, Any]:
+    """Time ``func`` and return per-call statistics in seconds plus memory use."""
+    options = getattr(func, "__bench__", {})
+    repeat = options.get("repeat") or repeat
+    for _ in range(warmup):
+        func()
+    number = options.get("number") or number or _calibrate(func, min_time)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    kept = reject_outliers(samples)
+    return {
+        "median_s": statistics.median(kept),
+        "mean_s": statistics.fmean(kept),
+        "stdev_s": statistics.stdev(kept) if len(kept) > 1 else 0.0,
+        "min_s": min(kept),
+        "number": number,
+        "samples": len(kept),
+        "outliers": len(samples) - len(kept),
+        **measure_memory(func),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(benchmarks: List[Tuple[str, Benchmark]], progress: Optional[Callable[[str, Dict], None]] = None,
+              **options: Any) -> Dict[str, Any]:
+    """Run every benchmark and return a baseline document."""
+    results = {}
+    for name, func in benchmarks:
+        results[name] = run_benchmark(func, **options)
+        if progress:
+            progress(name, results[name])
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": sys.platform,
+        "results": results,
+    }
+
+
+def save_baseline(doc: Dict[str, Any], path: str) -> None:
+    Path(path).write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    doc = json.loads(Path(path).read_text())
+    if doc.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: baseline schema {doc.get('schema_version')} != {SCHEMA_VERSION}; re-record it")
+    return doc
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10,
+            memory_threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """Compare two baseline documents benchmark by benchmark.
+
+    A benchmark regresses when its median time grows by more than
+    ``threshold`` (and by more than the baseline's own spread), or its peak
+    memory grows by more than ``memory_threshold``.
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append({"name": name, "status": "new", "median_s": cur["median_s"]})
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        noise = 2 * base.get("stdev_s", 0.0)
+        slower = ratio > 1 + threshold and cur["median_s"] - base["median_s"] > noise
+        faster = ratio < 1 - threshold and base["median_s"] - cur["median_s"] > noise
+        mem_base, mem_cur = base.get("peak_bytes", 0), cur.get("peak_bytes", 0)
+        more_memory = mem_cur > mem_base * (1 + memory_threshold) and mem_cur - mem_base > 1024
+        status = "regressed" if slower or more_memory else "improved" if faster else "ok"
+        rows.append({
+            "name": name,
+            "status": status,
+            "median_s": cur["median_s"],
+            "baseline_s": base["median_s"],
+            "ratio": ratio,
+            "peak_bytes": mem_cur,
+            "baseline_peak_bytes": mem_base,
+            "memory_regressed": more_memory,
+        })
+    for name in sorted(baseline["results"].keys() - current["results"].keys()):
+        rows.append({"name": name, "status": "missing"})
+    return rows
@@ -4,4 +4,13 @@ Core functionality module for the UV Tests application.
 
 from .utils import *
 
-__all__ = ["get_python_version"] 
\ No newline at end of file
+__all__ = [
+    "get_python_version",
+    "probe_capabilities",
+    "recommended_workers",
+    "available_cores",
+    "recommended_torch_threads",
+    "recommended_batch_size",
+    "limit_native_threads",
+    "configure_torch",
+]
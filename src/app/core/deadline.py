@@ -0,0 +1,160 @@
+"""
+Latency budgets for multi-stage requests.
+
+A ``Deadline`` tracks what is left of a request's budget. Expensive stages
+pick the best ``Profile`` they can still afford with ``choose_profile``.
+Cost estimates come from a ``CostModel`` that learns seconds per unit of
+profile cost from earlier runs. A ``StepWatchdog`` aborts an iterative job
+(e.g. diffusion steps) as soon as its projected finish passes the
+deadline, instead of when the deadline has already gone by.
+``Degradations`` counts which stages fell back to what, for metrics.
+"""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+class DeadlineExceeded(TimeoutError):
+    """A stage could not finish inside the request's deadline.
+
+    ``StepWatchdog`` fills in how far the run got, so its cost can still be
+    learned from; the fields survive pickling to and from worker processes.
+    """
+
+    def __init__(self, message: str = "", completed: int = 0, total_steps: int = 0, seconds: float = 0.0):
+        super().__init__(message)
+        self.completed = completed
+        self.total_steps = total_steps
+        self.seconds = seconds
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the steps done before the abort (0 when unknown)."""
+        return self.completed / self.total_steps if self.total_steps else 0.0
+
+    def __reduce__(self):
+        return type(self), (str(self), self.completed, self.total_steps, self.seconds)
+
+
+class Deadline:
+    """A point in time ``seconds`` from now."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.expires = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, parts: int) -> float:
+        """An even split of the remaining time over ``parts`` stages still to run."""
+        return self.remaining() / max(1, parts)
+
+
+@dataclass(frozen=True)
+class Profile:
+    """One way to run a stage; ``cost`` is in arbitrary units, proportional to expected time."""
+
+    name: str
+    cost: float
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+class CostModel:
+    """Exponentially weighted seconds per unit of ``Profile.cost``."""
+
+    def __init__(self, alpha: float = 0.3, seconds_per_unit: Optional[float] = None):
+        self.alpha = alpha
+        self.seconds_per_unit = seconds_per_unit
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, cost: float, seconds: float) -> None:
+        if cost <= 0:
+            return
+        rate = seconds / cost
+        with self._lock:
+            self.samples += 1
+            if self.seconds_per_unit is None:
+                self.seconds_per_unit = rate
+            else:
+                self.seconds_per_unit += self.alpha * (rate - self.seconds_per_unit)
+
+    def estimate(self, cost: float) -> Optional[float]:
+        """Expected seconds for ``cost`` units, or None before anything was observed."""
+        rate = self.seconds_per_unit
+        return None if rate is None else rate * cost
+
+
+def choose_profile(profiles: Sequence[Profile], budget: float, model: CostModel,
+                   margin: float = 0.1) -> Optional[Profile]:
+    """The first (best) profile expected to finish within ``budget``, or None.
+
+    With no estimate yet the best profile is chosen; pair it with a
+    ``StepWatchdog`` so a bad guess is cut short.
+    """
+    if budget <= 0:
+        return None
+    for profile in profiles:
+        estimate = model.estimate(profile.cost)
+        if estimate is None or estimate * (1 + margin) <= budget:
+            return profile
+    return None
+
+
+class StepWatchdog:
+    """Raise ``DeadlineExceeded`` once ``total_steps`` cannot finish before ``deadline``."""
+
+    def __init__(self, deadline: Deadline, total_steps: int, clock: Callable[[], float] = time.monotonic):
+        self.deadline = deadline
+        self.total_steps = total_steps
+        self.clock = clock
+        self.started = clock()
+        self.completed = 0
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def check(self, completed: int) -> None:
+        """Call after each step with the number of steps done so far."""
+        self.completed = completed
+        if completed >= self.total_steps:
+            return
+        per_step = self.elapsed / max(1, completed)
+        if per_step * (self.total_steps - completed) > self.deadline.remaining():
+            elapsed = self.elapsed
+            raise DeadlineExceeded(
+                f"{completed}/{self.total_steps} steps in {elapsed:.2f}s; "
+                f"{self.deadline.remaining():.2f}s left is not enough",
+                completed, self.total_steps, elapsed,
+            )
+
+
+class Degradations:
+    """Thread-safe counters of requests and of the fallbacks each stage took."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, mode: str) -> None:
+        with self._lock:
+            self._counts[f"{stage}:{mode}"] += 1
+
+    def record_request(self, degraded: bool) -> None:
+        with self._lock:
+            self._counts["requests"] += 1
+            self._counts["degraded_requests"] += degraded
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
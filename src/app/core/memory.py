@@ -0,0 +1,294 @@
+"""
+Opt-in memory profiling around named regions.
+
+Set ``APP_MEMPROF`` to turn it on:
+
+  * unset or ``0``  disabled; ``memory_region`` returns a shared no-op context
+  * ``1``           enabled, summary printed to stderr at exit
+  * a file path     enabled, and every region is also appended to that file as
+                    JSON lines as soon as it starts and ends, so the last
+                    region before an OOM kill is on disk
+
+For each region the profiler records wall time, the tracemalloc delta and
+peak, RSS and peak-RSS growth, torch CUDA/MPS allocator stats when torch is
+loaded, and the source lines that allocated the most. tracemalloc only sees
+Python allocations; tensors and other native buffers show up in RSS and the
+torch stats instead. ``APP_MEMPROF_TOP`` (default 10) and
+``APP_MEMPROF_FRAMES`` (default 1) tune the allocator listing.
+
+Regions may nest and may run in several threads at once. The tracemalloc
+and torch peaks are process-wide, so a region's peak includes whatever
+other threads allocated while it was open.
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+_state: Dict[str, Any] = {"enabled": False, "path": None, "top": 10, "frames": 1}
+_regions: List["RegionStats"] = []
+_lock = threading.Lock()
+_open: List["_Region"] = []
+"""Regions entered and not yet exited, in any thread; guarded by ``_lock``."""
+_NOOP = contextlib.nullcontext()
+
+
+@dataclass
+class RegionStats:
+    name: str
+    seconds: float = 0.0
+    traced_delta: int = 0
+    """Net Python allocations (bytes) still alive at the end of the region."""
+    traced_peak: int = 0
+    """Peak Python allocations above the level at region start."""
+    rss_before: int = 0
+    rss_delta: int = 0
+    peak_rss_delta: int = 0
+    """Growth of the process's high-water RSS during the region."""
+    torch: Optional[Dict[str, int]] = None
+    top: List[Dict[str, Any]] = field(default_factory=list)
+    """Largest allocation sites: ``{"where", "size_diff", "count_diff"}``."""
+
+
+def _rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return _peak_rss()
+
+
+def _peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _torch_stats() -> Optional[Dict[str, int]]:
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return None
+    if torch.cuda.is_available():
+        return {
+            "allocated": torch.cuda.memory_allocated(),
+            "reserved": torch.cuda.memory_reserved(),
+            "max_allocated": torch.cuda.max_memory_allocated(),
+        }
+    mps = getattr(torch, "mps", None)
+    if mps is not None and torch.backends.mps.is_available():
+        return {"allocated": mps.current_allocated_memory(), "reserved": mps.driver_allocated_memory()}
+    return None
+
+
+def _reset_peaks() -> None:
+    """Start new tracemalloc/CUDA peaks, first carrying the old ones over to every open region.
+
+    Call with ``_lock`` held. The peaks are process-wide, so without the
+    carry-over a region entered in one thread (or nested in another region)
+    would erase the peaks of the regions already open.
+    """
+    _, peak = tracemalloc.get_traced_memory()
+    torch_peak = (_torch_stats() or {}).get("max_allocated", 0)
+    for region in _open:
+        region.peak = max(region.peak, peak)
+        region.torch_peak = max(region.torch_peak, torch_peak)
+    tracemalloc.reset_peak()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.reset_peak_memory_stats()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    # Leave out the profiler's own bookkeeping.
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    )
+
+
+def _write(record: Dict[str, Any]) -> None:
+    if _state["path"]:
+        with _lock, open(_state["path"], "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def enable(path: Optional[str] = None, top: int = 10, frames: int = 1) -> None:
+    """Turn profiling on; ``path`` receives one JSON line per region start and end."""
+    _state.update(enabled=True, path=path, top=top, frames=frames)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def disable() -> None:
+    _state["enabled"] = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _state["enabled"]
+
+
+def regions() -> List[RegionStats]:
+    """Stats for every completed region, in completion order."""
+    with _lock:
+        return list(_regions)
+
+
+def reset() -> None:
+    with _lock:
+        _regions.clear()
+
+
+class _Region:
+    __slots__ = ("name", "start", "snapshot", "traced_start", "rss_before", "peak_rss_before", "peak",
+                 "torch_peak")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.snapshot = _snapshot()
+        # Measured after the snapshot so its own memory is not counted.
+        self.traced_start, _ = tracemalloc.get_traced_memory()
+        self.rss_before = _rss()
+        self.peak_rss_before = _peak_rss()
+        _write({"event": "enter", "region": self.name, "rss": self.rss_before, "time": time.time()})
+        with _lock:
+            self.peak = self.torch_peak = 0
+            _reset_peaks()
+            _open.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        with _lock:
+            _open.remove(self)
+            current, peak = tracemalloc.get_traced_memory()
+            # Peaks from before a later region's reset were carried over into self.peak.
+            peak = max(peak, self.peak)
+            torch = _torch_stats()
+        if torch and "max_allocated" in torch:
+            torch["max_allocated"] = max(torch["max_allocated"], self.torch_peak)
+
+        top = [
+            {"where": str(s.traceback), "size_diff": s.size_diff, "count_diff": s.count_diff}
+            for s in _snapshot().compare_to(self.snapshot, "lineno")[:_state["top"]]
+            if s.size_diff
+        ]
+        self.snapshot = None
+        rss_after = _rss()
+        stats = RegionStats(
+            name=self.name,
+            seconds=seconds,
+            traced_delta=current - self.traced_start,
+            traced_peak=max(0, peak - self.traced_start),
+            rss_before=self.rss_before,
+            rss_delta=rss_after - self.rss_before,
+            peak_rss_delta=_peak_rss() - self.peak_rss_before,
+            torch=torch,
+            top=top,
+        )
+        with _lock:
+            _regions.append(stats)
+        _write({"event": "exit", "region": self.name, **asdict(stats)})
+        return False
+
+
+def memory_region(name: str):
+    """Context manager profiling the enclosed block as ``name`` (a no-op when disabled)."""
+    if not _state["enabled"]:
+        return _NOOP
+    return _Region(name)
+
+
+def profile_memory(name: Optional[str] = None) -> Callable:
+    """Decorator form of ``memory_region``; the region defaults to the function's name."""
+    def decorate(func: Callable) -> Callable:
+        region = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with _Region(region):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1 << 20):+.1f} MiB"
+
+
+def summarize() -> List[Dict[str, Any]]:
+    """Aggregate completed regions by name, largest peak first."""
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for r in regions():
+        agg = by_name.setdefault(r.name, {
+            "region": r.name, "calls": 0, "seconds": 0.0, "traced_delta": 0, "traced_peak": 0,
+            "rss_delta": 0, "peak_rss_delta": 0, "torch": None, "top": {},
+        })
+        agg["calls"] += 1
+        agg["seconds"] += r.seconds
+        agg["traced_delta"] += r.traced_delta
+        agg["traced_peak"] = max(agg["traced_peak"], r.traced_peak)
+        agg["rss_delta"] += r.rss_delta
+        agg["peak_rss_delta"] += r.peak_rss_delta
+        agg["torch"] = r.torch or agg["torch"]
+        for site in r.top:
+            agg["top"][site["where"]] = agg["top"].get(site["where"], 0) + site["size_diff"]
+    rows = sorted(by_name.values(), key=lambda a: max(a["traced_peak"], a["peak_rss_delta"]), reverse=True)
+    for agg in rows:
+        agg["top"] = sorted(agg["top"].items(), key=lambda kv: -abs(kv[1]))[:_state["top"]]
+    return rows
+
+
+def report() -> str:
+    """Human-readable per-region summary with the top allocation sites."""
+    lines = ["=== memory profile ==="]
+    for agg in summarize():
+        lines.append(
+            f"{agg['region']}: {agg['calls']} call(s), {agg['seconds']:.2f}s, "
+            f"python {_mib(agg['traced_delta'])} (peak {_mib(agg['traced_peak'])}), "
+            f"rss {_mib(agg['rss_delta'])} (peak {_mib(agg['peak_rss_delta'])})"
+        )
+        if agg["torch"]:
+            lines.append("    torch: " + ", ".join(f"{k} {_mib(v)}" for k, v in agg["torch"].items()))
+        for where, size in agg["top"]:
+            if abs(size) < 1024:
+                continue
+            lines.append(f"    {_mib(size):>14}  {where}")
+    return "\n".join(lines)
+
+
+def dump_report(path: str) -> None:
+    """Write ``summarize()`` as JSON (``.json``) or ``report()`` as text."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            json.dump(summarize(), f, indent=2)
+        else:
+            f.write(report() + "\n")
+
+
+def _enable_from_env() -> None:
+    setting = os.environ.get("APP_MEMPROF", "")
+    if setting in ("", "0"):
+        return
+    enable(
+        path=None if setting == "1" else setting,
+        top=int(os.environ.get("APP_MEMPROF_TOP", 10)),
+        frames=int(os.environ.get("APP_MEMPROF_FRAMES", 1)),
+    )
+    atexit.register(lambda: regions() and print(report(), file=sys.stderr))
+
+
+_enable_from_env()
@@ -0,0 +1,381 @@
+"""
+Image rendering in a pool of worker processes.
+
+A pipeline inside the web process renders one image at a time, and its
+Python-side work competes with request handling for the GIL. A
+``RenderPool`` instead starts ``workers`` processes. Each is pinned to its
+own subset of the cores, with the native thread pools sized to match, and
+builds its own renderer with ``factory()``:
+
+    pool = RenderPool(functools.partial(load_pipeline, model_id), workers=4)
+    pool.wait_ready()
+    with pool.submit(prompt="a lighthouse", num_inference_steps=20).result() as frame:
+        frame.save("out.png")
+
+The renderer returns an ``HxWxC`` uint8 array. The worker copies it into a
+new shared-memory block and sends back only the block's name, shape and
+dtype. The parent maps the block, encodes it, and unlinks it once the
+``Frame`` is closed, so pixels are never pickled. Workers are spawned, so
+``factory`` and the job arguments must be picklable, and ``factory`` must
+not be defined in ``__main__``.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .utils import NATIVE_THREAD_VARS, available_cores
+
+
+class RenderError(RuntimeError):
+    """A worker failed to start or died during a job."""
+
+
+def split_cores(cores: Sequence[int], workers: int) -> List[List[int]]:
+    """Contiguous, near-equal core groups; with fewer cores than workers, cores are shared."""
+    cores = list(cores)
+    if workers <= len(cores):
+        return [[int(c) for c in group] for group in np.array_split(cores, workers)]
+    return [[cores[i % len(cores)]] for i in range(workers)]
+
+
+def _picklable(error: BaseException) -> BaseException:
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RenderError(f"{type(error).__name__}: {error}")
+
+
+def _worker_main(index: int, factory: Callable[[], Callable[..., np.ndarray]], cores: List[int],
+                 tasks, results, current) -> None:
+    """Worker process: pin, build the renderer, then render jobs until told to stop."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # NATIVE_THREAD_VARS were sized by the parent (see _child_environ).
+    try:
+        render = factory()
+    except BaseException as e:
+        results.put(("failed", index, os.getpid(), _picklable(e)))
+        return
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(len(cores))
+    results.put(("ready", index, os.getpid(), None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, kwargs = task
+        # Shared memory rather than a message, so it is visible even if this process dies mid-job.
+        current[index] = job_id
+        start = time.perf_counter()
+        try:
+            array = np.ascontiguousarray(render(**kwargs))
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            block.close()
+            # The parent unlinks the block once it is done with the frame.
+            results.put(("done", index, job_id, (block.name, array.shape, array.dtype.str,
+                                                 time.perf_counter() - start)))
+        except Exception as e:
+            results.put(("error", index, job_id, _picklable(e)))
+        current[index] = -1
+
+
+@contextmanager
+def _without_main_script():
+    """Spawn children without re-running the parent's ``__main__`` script.
+
+    Spawned processes normally import the parent's main module first, and the
+    scripts that use a pool load their models at import time.
+    """
+    main = sys.modules["__main__"]
+    saved = {name: main.__dict__[name] for name in ("__file__", "__spec__") if name in main.__dict__}
+    main.__spec__ = None
+    main.__dict__.pop("__file__", None)
+    try:
+        yield
+    finally:
+        main.__dict__.update(saved)
+
+
+_spawn_lock = threading.Lock()
+
+
+@contextmanager
+def _child_environ(threads: int):
+    """Size the native thread pools of a child started inside the block.
+
+    A spawned child unpickles its target and arguments, importing numpy and
+    whatever ``factory`` needs, before ``_worker_main`` runs, so the
+    variables must already be in the environment it inherits.
+    """
+    saved = {var: os.environ.get(var) for var in NATIVE_THREAD_VARS}
+    os.environ.update({var: str(threads) for var in NATIVE_THREAD_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+class Frame:
+    """A rendered image in shared memory; close it (or use ``with``) to free the block."""
+
+    def __init__(self, name: str, shape, dtype: str, seconds: float, worker: int):
+        self._block = shared_memory.SharedMemory(name=name)
+        self.array: Optional[np.ndarray] = np.ndarray(shape, np.dtype(dtype), buffer=self._block.buf)
+        self.seconds = seconds
+        """Render time in the worker."""
+        self.worker = worker
+
+    def to_image(self):
+        """A PIL image of the frame; copies the pixels, so it stays valid after ``close``."""
+        from PIL import Image
+
+        return Image.fromarray(self.array.copy())
+
+    def save(self, path: str, **params: Any) -> None:
+        """Encode and write the frame with PIL (format from ``path``)."""
+        from PIL import Image
+
+        image = Image.fromarray(self.array)  # wraps the shared buffer, no copy
+        try:
+            image.save(path, **params)
+        finally:
+            image.close()
+
+    def close(self) -> None:
+        if self._block is None:
+            return
+        self.array = None
+        block, self._block = self._block, None
+        try:
+            block.close()
+        except BufferError:
+            pass  # a view is still alive; the mapping goes away with it
+        block.unlink()
+
+    def __enter__(self) -> "Frame":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class RenderPool:
+    """Worker processes, each pinned to its own cores and holding its own renderer."""
+
+    def __init__(self, factory: Callable[[], Callable[..., np.ndarray]], workers: Optional[int] = None,
+                 threads_per_worker: int = 4, cores: Optional[Sequence[int]] = None,
+                 start_method: str = "spawn"):
+        cores = list(cores) if cores else available_cores()
+        workers = workers or max(1, len(cores) // threads_per_worker)
+        self.factory = factory
+        self.cores = split_cores(cores, workers)
+        self._ctx = mp.get_context(start_method)
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._processes: List[Any] = [None] * workers
+        self._pids: List[Optional[int]] = [None] * workers
+        self._ready = set()
+        self._current = self._ctx.RawArray("q", [-1] * workers)
+        self._jobs = [0] * workers
+        self._busy = [0.0] * workers
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self.load_error: Optional[BaseException] = None
+        self.completed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._closed = False
+        for index in range(workers):
+            self._spawn(index)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="render-pool-results", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def workers(self) -> int:
+        return len(self._processes)
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.factory, self.cores[index], self._tasks, self._results, self._current),
+            name=f"render-worker-{index}", daemon=True,
+        )
+        # Workers are respawned from the dispatcher thread, so starts must not interleave.
+        with _spawn_lock, _without_main_script(), _child_environ(len(self.cores[index])):
+            process.start()
+        self._processes[index] = process
+
+    def wait_ready(self, timeout: Optional[float] = None) -> None:
+        """Block until every worker has built its renderer; raises ``RenderError`` if one could not."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._ready) == self.workers or self.load_error,
+                                       timeout):
+                raise TimeoutError(f"{len(self._ready)}/{self.workers} render workers ready after {timeout}s")
+            if self.load_error is not None:
+                raise RenderError(f"render worker failed to start: {self.load_error}") from self.load_error
+
+    def submit(self, **kwargs: Any) -> "Future[Frame]":
+        """Queue a render of ``factory()(**kwargs)``; the future resolves to a ``Frame``."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("render pool is closed")
+            if self.load_error is not None:
+                raise RenderError(f"render worker failed to start: {self.load_error}")
+            job_id = next(self._ids)
+            self._pending[job_id] = future
+        self._tasks.put((job_id, kwargs))
+        return future
+
+    # -- results ---------------------------------------------------------
+
+    def _dispatch(self) -> None:
+        while True:
+            try:
+                kind, index, ref, payload = self._results.get(timeout=0.2)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                return
+            if kind == "exit":
+                return
+            future = None
+            with self._cond:
+                if kind == "ready":
+                    self._ready.add(index)
+                    self._pids[index] = ref
+                elif kind == "failed":
+                    self.load_error = payload
+                    self._fail_pending(RenderError(f"render worker failed to start: {payload}"))
+                else:
+                    future = self._pending.pop(ref, None)
+                    if kind == "done":
+                        self.completed += 1
+                        self._jobs[index] += 1
+                        self._busy[index] += payload[3]
+                    else:
+                        self.failed += 1
+                self._cond.notify_all()
+            if future is not None:
+                self._resolve(future, kind, index, payload)
+            elif kind == "done":
+                # Nobody is waiting (the pool was closed); free the block.
+                Frame(*payload, worker=index).close()
+
+    @staticmethod
+    def _resolve(future: Future, kind: str, index: int, payload) -> None:
+        if kind == "done":
+            frame = Frame(*payload, worker=index)
+            if future.cancelled():
+                frame.close()
+            else:
+                future.set_result(frame)
+        elif not future.cancelled():
+            future.set_exception(payload)
+
+    def _fail_pending(self, error: BaseException) -> None:
+        for future in self._pending.values():
+            if not future.cancelled():
+                future.set_exception(error)
+        self._pending.clear()
+
+    def _check_workers(self) -> None:
+        """Fail the job of a worker that died, and replace the worker if it had loaded before."""
+        for index, process in enumerate(self._processes):
+            if process.is_alive() or self._closed:
+                continue
+            with self._cond:
+                job_id, self._current[index] = self._current[index], -1
+                future = self._pending.pop(job_id, None)
+                had_loaded = index in self._ready
+                self._ready.discard(index)
+                if future is not None:
+                    self.failed += 1
+            if future is not None and not future.cancelled():
+                future.set_exception(RenderError(f"render worker {index} exited with code {process.exitcode}"))
+            if had_loaded:
+                self._spawn(index)
+
+    # -- reporting -------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-worker cores, jobs and busy time, plus throughput since the pool started."""
+        with self._cond:
+            elapsed = time.monotonic() - self.started
+            return {
+                "workers": [
+                    {
+                        "index": i,
+                        "pid": self._pids[i],
+                        "cores": self.cores[i],
+                        "ready": i in self._ready,
+                        "job": self._current[i] if self._current[i] >= 0 else None,
+                        "jobs": self._jobs[i],
+                        "busy_seconds": round(self._busy[i], 3),
+                    }
+                    for i in range(self.workers)
+                ],
+                "queued": len(self._pending) - sum(job >= 0 for job in self._current),
+                "completed": self.completed,
+                "failed": self.failed,
+                "images_per_minute": round(self.completed * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+                "load_error": repr(self.load_error) if self.load_error else None,
+            }
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the workers after their current job and fail anything still queued."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
+        self._results.put(("exit", -1, None, None))
+        self._dispatcher.join(timeout)
+        with self._cond:
+            self._fail_pending(RenderError("render pool closed"))
+        for q in (self._tasks, self._results):
+            q.close()
+            q.join_thread()
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,181 @@
+"""
+A CPU budget for in-process model inference.
+
+Models that each use torch's default thread pool oversubscribe the CPU
+when they run at the same time. An ``InferenceScheduler`` owns a budget of
+threads (default: the usable CPUs). Each registered model gets a fixed
+thread count and a default priority:
+
+    scheduler = InferenceScheduler()
+    scheduler.register("summarizer", threads=2, priority=SHORT)
+    scheduler.register("diffusion", threads=6, priority=BULK)
+
+    with scheduler.slot("summarizer") as job:
+        summary = summarizer(text)
+    job.wait_seconds, job.compute_seconds
+
+A job starts once its model's threads fit in the budget. Waiting jobs
+start in priority order, then FIFO, so a short summary queued behind
+image renders goes first. Running jobs are never interrupted. Inside the
+slot, ``torch.set_num_threads`` is applied to the calling thread when torch
+is loaded. Queue wait and compute time are recorded separately for each
+job and aggregated per model.
+"""
+
+import heapq
+import itertools
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .utils import probe_capabilities
+
+# Priorities: lower runs first.
+SHORT = 0
+BULK = 10
+
+
+@dataclass
+class JobStats:
+    model: str
+    priority: int
+    threads: int
+    wait_seconds: float = 0.0
+    """Time between asking for a slot and getting it."""
+    compute_seconds: float = 0.0
+    """Time spent inside the slot."""
+    queued_behind: int = 0
+    """Jobs waiting or running when this one was queued."""
+
+
+@dataclass
+class _Model:
+    threads: int
+    priority: int
+    jobs: int = 0
+    wait_seconds: float = 0.0
+    compute_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class _Slot:
+    __slots__ = ("scheduler", "job", "timeout", "start")
+
+    def __init__(self, scheduler: "InferenceScheduler", job: JobStats, timeout: Optional[float]):
+        self.scheduler = scheduler
+        self.job = job
+        self.timeout = timeout
+
+    def __enter__(self) -> JobStats:
+        self.scheduler._acquire(self.job, self.timeout)
+        self.start = time.perf_counter()
+        return self.job
+
+    def __exit__(self, *exc):
+        self.job.compute_seconds = time.perf_counter() - self.start
+        self.scheduler._release(self.job)
+        return False
+
+
+class InferenceScheduler:
+    """Admit inference jobs into a shared thread budget, by priority."""
+
+    def __init__(self, total_threads: Optional[int] = None, set_torch_threads: bool = True, history: int = 100):
+        self.total_threads = total_threads or probe_capabilities().usable_cpus
+        self.set_torch_threads = set_torch_threads
+        self.free_threads = self.total_threads
+        self.running = 0
+        self.timeouts = 0
+        self._models: Dict[str, _Model] = {}
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._recent: Deque[JobStats] = deque(maxlen=history)
+
+    def register(self, model: str, threads: int, priority: int = BULK) -> int:
+        """Give ``model`` a thread count (capped at the budget); returns the count used."""
+        threads = max(1, min(threads, self.total_threads))
+        with self._cond:
+            self._models[model] = _Model(threads=threads, priority=priority)
+        return threads
+
+    def slot(self, model: str, priority: Optional[int] = None, timeout: Optional[float] = None) -> _Slot:
+        """Context manager that waits for ``model``'s threads and yields its ``JobStats``.
+
+        Raises ``TimeoutError`` if the job is still queued after ``timeout`` seconds.
+        """
+        config = self._models[model]
+        return _Slot(self, JobStats(
+            model=model,
+            priority=config.priority if priority is None else priority,
+            threads=config.threads,
+        ), timeout)
+
+    def run(self, model: str, fn: Callable[..., Any], *args: Any, priority: Optional[int] = None,
+            **kwargs: Any) -> Any:
+        """Call ``fn(*args, **kwargs)`` inside a slot for ``model``."""
+        with self.slot(model, priority):
+            return fn(*args, **kwargs)
+
+    # -- admission -------------------------------------------------------
+
+    def _acquire(self, job: JobStats, timeout: Optional[float] = None) -> None:
+        queued = time.perf_counter()
+        with self._cond:
+            ticket = (job.priority, next(self._seq), job)
+            job.queued_behind = len(self._waiters) + self.running
+            heapq.heappush(self._waiters, ticket)
+            try:
+                # Only the head may start, so a wide job is not starved by narrow ones behind it.
+                while self._waiters[0] is not ticket or self.free_threads < job.threads:
+                    remaining = None if timeout is None else queued + timeout - time.perf_counter()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{job.model}: no slot within {timeout:.2f}s")
+                    self._cond.wait(remaining)
+            except BaseException as e:
+                self.timeouts += isinstance(e, TimeoutError)
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            self.free_threads -= job.threads
+            self.running += 1
+            self._cond.notify_all()
+        job.wait_seconds = time.perf_counter() - queued
+        self._apply_threads(job.threads)
+
+    def _release(self, job: JobStats) -> None:
+        with self._cond:
+            self.free_threads += job.threads
+            self.running -= 1
+            model = self._models[job.model]
+            model.jobs += 1
+            model.wait_seconds += job.wait_seconds
+            model.compute_seconds += job.compute_seconds
+            model.max_wait_seconds = max(model.max_wait_seconds, job.wait_seconds)
+            self._recent.append(job)
+            self._cond.notify_all()
+
+    def _apply_threads(self, threads: int) -> None:
+        torch = sys.modules.get("torch") if self.set_torch_threads else None
+        if torch is not None and torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+
+    # -- reporting -------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget use, per-model totals and the most recent jobs."""
+        with self._cond:
+            return {
+                "total_threads": self.total_threads,
+                "free_threads": self.free_threads,
+                "running": self.running,
+                "waiting": len(self._waiters),
+                "timeouts": self.timeouts,
+                "models": {name: asdict(m) for name, m in self._models.items()},
+                "recent": [asdict(j) for j in self._recent],
+            }
@@ -2,8 +2,50 @@
 Utility functions for the UV Tests application.
 """
 
+import os
+import platform
 import sys
-from typing import Dict, Any
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# SIMD extensions worth knowing about for numpy/torch kernels.
+SIMD_FLAGS = (
+    "sse4_2", "avx", "avx2", "fma", "f16c", "avx512f", "avx512bw", "avx512_vnni", "avx512_bf16",
+    "avx_vnni", "amx_tile", "amx_bf16", "asimd", "asimdhp", "asimddp", "sve", "sve2", "bf16", "i8mm",
+)
+
+# Thread-count variables read by OpenMP, MKL, OpenBLAS and friends at import time.
+NATIVE_THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+                      "NUMEXPR_NUM_THREADS")
+
+
+@dataclass(frozen=True)
+class Capabilities:
+    """What this process may actually use, as opposed to what the host has."""
+
+    cpu_count: Optional[int]
+    """Logical CPUs on the host (``os.cpu_count()``)."""
+    affinity_cpus: Optional[int]
+    """CPUs in this process's affinity mask."""
+    cgroup_cpus: Optional[float]
+    """CPU quota from the cgroup (e.g. ``docker --cpus``), if any."""
+    usable_cpus: int
+    """Whole CPUs this process can keep busy: the smallest of the above."""
+    physical_memory: Optional[int]
+    """Host memory in bytes."""
+    memory_limit: Optional[int]
+    """Bytes this process may use: the cgroup limit if lower than host memory."""
+    simd_flags: Tuple[str, ...]
+    machine: str
+    blas: Optional[str]
+    """BLAS library numpy was built against, if numpy is already imported."""
+    torch_threads: Optional[int]
+    """``torch.get_num_threads()``, if torch is already imported."""
+    torch_interop_threads: Optional[int]
 
 
 def get_python_version() -> str:
@@ -11,16 +53,189 @@ def get_python_version() -> str:
     return sys.version
 
 
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_dirs(root: Path, controller: str) -> list:
+    """Candidate cgroup directories for ``controller``: this process's own, then the mount root."""
+    dirs = []
+    for line in (_read(Path("/proc/self/cgroup")) or "").splitlines():
+        _, controllers, path = line.split(":", 2)
+        if controllers == "" or controller in controllers.split(","):
+            relative = path.lstrip("/")
+            dirs += [root / relative, root / controller / relative]
+    return dirs + [root, root / controller]
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """Get the CPU quota (in CPUs) from cgroup v2 ``cpu.max`` or v1 ``cpu.cfs_quota_us``."""
+    for d in _cgroup_dirs(root, "cpu"):
+        cpu_max = _read(d / "cpu.max")
+        if cpu_max:
+            quota, _, period = cpu_max.partition(" ")
+            return None if quota == "max" else int(quota) / int(period or 100000)
+        quota = _read(d / "cpu.cfs_quota_us")
+        if quota:
+            period = _read(d / "cpu.cfs_period_us") or "100000"
+            return None if int(quota) <= 0 else int(quota) / int(period)
+    return None
+
+
+def cgroup_memory_limit(root: Path = CGROUP_ROOT) -> Optional[int]:
+    """Get the memory limit in bytes from cgroup v2 ``memory.max`` or v1 ``memory.limit_in_bytes``."""
+    for d in _cgroup_dirs(root, "memory"):
+        limit = _read(d / "memory.max") or _read(d / "memory.limit_in_bytes")
+        if limit:
+            # v1 reports "no limit" as a huge page-aligned number.
+            return None if limit == "max" or int(limit) >= 1 << 60 else int(limit)
+    return None
+
+
+def _physical_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _simd_flags() -> Tuple[str, ...]:
+    cpuinfo = _read(Path("/proc/cpuinfo")) or ""
+    for line in cpuinfo.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() in ("flags", "Features"):
+            present = set(value.split())
+            return tuple(f for f in SIMD_FLAGS if f in present)
+    if platform.machine() in ("arm64", "aarch64"):
+        return ("asimd",)
+    return ()
+
+
+def _blas() -> Optional[str]:
+    numpy = sys.modules.get("numpy")
+    if numpy is None:
+        return None
+    try:
+        config = numpy.show_config(mode="dicts")
+        return config["Build Dependencies"]["blas"]["name"]
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _static_capabilities() -> Dict[str, Any]:
+    cpu_count = os.cpu_count()
+    affinity = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    cgroup_cpus = cgroup_cpu_limit()
+    usable = min(c for c in (cpu_count or 1, affinity, cgroup_cpus) if c is not None)
+    physical = _physical_memory()
+    limit = cgroup_memory_limit()
+    return {
+        "cpu_count": cpu_count,
+        "affinity_cpus": affinity,
+        "cgroup_cpus": cgroup_cpus,
+        "usable_cpus": max(1, int(usable)),
+        "physical_memory": physical,
+        "memory_limit": min(limit, physical) if limit and physical else limit or physical,
+        "simd_flags": _simd_flags(),
+        "machine": platform.machine(),
+    }
+
+
+@lru_cache(maxsize=1)
+def _native_capabilities(numpy_loaded: bool, torch_loaded: bool) -> Dict[str, Any]:
+    torch = sys.modules.get("torch") if torch_loaded else None
+    return {
+        "blas": _blas() if numpy_loaded else None,
+        "torch_threads": torch.get_num_threads() if torch else None,
+        "torch_interop_threads": torch.get_num_interop_threads() if torch else None,
+    }
+
+
+def probe_capabilities() -> Capabilities:
+    """Probe CPU, memory, SIMD, BLAS and torch threading, cached per process.
+
+    numpy and torch are never imported here; their fields are filled in
+    once the caller has imported them.
+    """
+    native = _native_capabilities("numpy" in sys.modules, "torch" in sys.modules)
+    return Capabilities(**_static_capabilities(), **native)
+
+
 def get_system_info() -> Dict[str, Any]:
     """Get system information."""
     return {
         "python_version": sys.version,
         "platform": sys.platform,
         "executable": sys.executable,
-        "path": sys.path
+        "path": sys.path,
+        **asdict(probe_capabilities()),
     }
 
 
+def recommended_workers(kind: str = "cpu", caps: Optional[Capabilities] = None) -> int:
+    """Recommend an executor size: ``"cpu"`` for compute, ``"io"`` for network/disk-bound work."""
+    caps = caps or probe_capabilities()
+    if kind == "cpu":
+        return caps.usable_cpus
+    if kind == "io":
+        return min(32, caps.usable_cpus + 4)
+    raise ValueError(f"Unknown worker kind: {kind!r}")
+
+
+def available_cores(caps: Optional[Capabilities] = None) -> List[int]:
+    """CPU ids this process may run on, trimmed to ``usable_cpus`` (e.g. under a cgroup quota)."""
+    caps = caps or probe_capabilities()
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    return cores[:caps.usable_cpus]
+
+
+def recommended_torch_threads(concurrent_models: int = 1, caps: Optional[Capabilities] = None) -> Tuple[int, int]:
+    """Recommend ``(intra_op, inter_op)`` torch threads so concurrent models share the usable CPUs."""
+    caps = caps or probe_capabilities()
+    intra = max(1, caps.usable_cpus // max(1, concurrent_models))
+    return intra, 1 if intra < 4 else 2
+
+
+def recommended_batch_size(item_bytes: int, max_batch: int = 64, memory_fraction: float = 0.25,
+                           caps: Optional[Capabilities] = None) -> int:
+    """Recommend a batch size that keeps ``item_bytes`` per item within a fraction of the memory limit."""
+    caps = caps or probe_capabilities()
+    if not caps.memory_limit:
+        return max_batch
+    return max(1, min(max_batch, int(caps.memory_limit * memory_fraction) // max(1, item_bytes)))
+
+
+def limit_native_threads(threads: Optional[int] = None) -> int:
+    """Cap OpenMP/BLAS thread pools at ``threads`` (default: usable CPUs).
+
+    Must run before numpy or torch is imported; variables that are already
+    set are left alone.
+    """
+    threads = threads or probe_capabilities().usable_cpus
+    for var in NATIVE_THREAD_VARS:
+        os.environ.setdefault(var, str(threads))
+    return threads
+
+
+def configure_torch(concurrent_models: int = 1) -> Tuple[int, int]:
+    """Apply ``recommended_torch_threads`` to an imported torch and return the setting."""
+    import torch
+
+    intra, inter = recommended_torch_threads(concurrent_models)
+    torch.set_num_threads(intra)
+    try:
+        torch.set_num_interop_threads(inter)
+    except RuntimeError:
+        # Only settable before the first parallel op; keep whatever is in place.
+        inter = torch.get_num_interop_threads()
+    _native_capabilities.cache_clear()
+    return intra, inter
+
+
 def format_version_info(version: str) -> str:
     """Format version information for display."""
-    return f"Python Version: {version}" 
\ No newline at end of file
+    return f"Python Version: {version}"
\ No newline at end of file
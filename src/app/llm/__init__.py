@@ -0,0 +1,6 @@
+"""
+LLM helpers shared by the langchain and langgraph scripts.
+
+Submodules import langchain lazily relative to ``app.core``, so import the
+module you need directly (e.g. ``from app.llm.history import SlidingWindow``).
+"""
@@ -0,0 +1,221 @@
+"""
+Persistent LLM response cache shared by the langchain and langgraph scripts.
+
+``enable_llm_cache()`` installs a SQLite-backed cache as langchain's global LLM
+cache, so every chat model created afterwards (``ChatOpenAI``,
+``init_chat_model`` ...) answers repeated prompts from disk. Entries are keyed
+on the model string (model name and parameters) plus the prompt messages with
+volatile fields such as message ids stripped.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence, Union
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration
+
+# ``loads`` is flagged beta but is what langchain's own SQLite cache uses.
+warnings.filterwarnings("ignore", message="The function `loads` is in beta", category=LangChainBetaWarning)
+
+DEFAULT_PATH = Path.home() / ".cache" / "uv-tests" / "llm_cache.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Message fields that change between otherwise identical calls.
+_VOLATILE_KWARGS = ("id", "response_metadata", "usage_metadata")
+
+
+def _normalize(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [_normalize(item) for item in obj]
+    if isinstance(obj, dict):
+        if "lc" in obj and isinstance(obj.get("kwargs"), dict):
+            kwargs = {k: v for k, v in obj["kwargs"].items() if k not in _VOLATILE_KWARGS and v not in ({}, [])}
+            obj = {**obj, "kwargs": kwargs}
+        return {k: _normalize(v) for k, v in obj.items()}
+    return obj
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash a serialized prompt and model string into a cache key."""
+    try:
+        prompt = json.dumps(_normalize(json.loads(prompt)), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        pass
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """LLM cache stored in SQLite with TTL and size-based eviction.
+
+    A small in-process LRU sits in front of the database so hot entries are
+    returned without touching disk. The database runs in WAL mode with a busy
+    timeout, so several processes can share one cache file.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_PATH,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_entries: int = 10_000,
+        memory_entries: int = 256,
+    ):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key: str, created: float, generations: Sequence[Any]) -> None:
+        self._memory[key] = (created, generations)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and not self._expired(cached[0], now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return [g.model_copy(deep=True) for g in cached[1]]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            generations = loads(row[0])
+            self._remember(key, row[1], generations)
+            self.hits += 1
+            return [g.model_copy(deep=True) for g in generations]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        generations = [g.model_copy(deep=True) for g in return_val]
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                # The run id of the first call must not leak into later replays.
+                message.id = None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, dumps(generations), now, now),
+            )
+            self._remember(key, now, generations)
+            self._inserts += 1
+            if self._inserts % 64 == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN "
+            "(SELECT key FROM llm_cache ORDER BY accessed ASC "
+            "LIMIT MAX(0, (SELECT COUNT(*) FROM llm_cache) - ?))",
+            (self.max_entries,),
+        )
+
+    def evict(self) -> None:
+        """Drop expired entries and trim the cache to ``max_entries`` now."""
+        with self._lock:
+            self._evict(time.time())
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def count(self) -> int:
+        """Return the number of entries stored on disk."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def enable_llm_cache(path: Union[str, Path, None] = None, **kwargs: Any) -> SQLiteLLMCache:
+    """Install a ``SQLiteLLMCache`` as langchain's global LLM cache.
+
+    ``path`` defaults to ``$LLM_CACHE_PATH`` or ``~/.cache/uv-tests/llm_cache.sqlite``;
+    other keyword arguments are passed to ``SQLiteLLMCache``.
+    """
+    path = Path(path or os.environ.get("LLM_CACHE_PATH") or DEFAULT_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cache = SQLiteLLMCache(path, **kwargs)
+    set_llm_cache(cache)
+    return cache
+
+
+def cached_stream(llm: Any, messages: Any) -> Iterator[BaseMessage]:
+    """Stream ``llm``'s reply to ``messages`` through the LLM cache.
+
+    langchain only consults the cache on ``invoke``; this serves a cached
+    reply as a single chunk, and otherwise streams from the model and stores
+    the reply once the stream has been fully consumed. A stream closed early
+    (for example because its output failed validation) is never cached.
+    """
+    cache = llm.cache if isinstance(llm.cache, BaseCache) else get_llm_cache()
+    if cache is None or llm.cache is False:
+        yield from llm.stream(messages)
+        return
+
+    messages = llm._convert_input(messages).to_messages()
+    prompt, llm_string = dumps(messages), llm._get_llm_string()
+    cached = cache.lookup(prompt, llm_string)
+    if cached:
+        for generation in cached:
+            yield generation.message
+        return
+
+    stream = llm.stream(messages)
+    try:
+        reply = None
+        for chunk in stream:
+            reply = chunk if reply is None else reply + chunk
+            yield chunk
+    finally:
+        stream.close()
+    if reply is not None:
+        cache.update(prompt, llm_string, [ChatGeneration(message=message_chunk_to_message(reply))])
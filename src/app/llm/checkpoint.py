@@ -0,0 +1,116 @@
+"""
+Compact SQLite persistence for chat sessions.
+
+Each message is one row, so a turn only appends the messages it produced
+instead of rewriting the whole conversation state.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union
+
+from langchain_core.messages import BaseMessage, convert_to_messages, message_to_dict, messages_from_dict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID
+"""
+
+
+class SQLiteSessionStore:
+    """Append-only message log keyed by session id.
+
+    The store is safe to share between threads; writes are serialized by a
+    lock and the database runs in WAL mode so readers don't block writers.
+    """
+
+    def __init__(self, path: Union[str, Path] = "sessions.db"):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def append(self, session_id: str, messages: Sequence[Any]) -> int:
+        """Append messages to a session; return how many it has ever received."""
+        rows = [
+            json.dumps(message_to_dict(m), separators=(",", ":"))
+            for m in convert_to_messages(messages)
+        ]
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE session_id = ?",
+                (session_id,),
+            )
+            start = cur.fetchone()[0]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, payload) VALUES (?, ?, ?)",
+                    [(session_id, start + i, row) for i, row in enumerate(rows)],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return start + len(rows)
+
+    def load(self, session_id: str, limit: Optional[int] = None) -> List[BaseMessage]:
+        """Load a session's messages in order, optionally only the last ``limit``."""
+        with self._lock:
+            if limit is None:
+                cur = self._conn.execute(
+                    "SELECT payload FROM messages WHERE session_id = ? ORDER BY seq",
+                    (session_id,),
+                )
+                payloads = [row[0] for row in cur]
+            else:
+                cur = self._conn.execute(
+                    "SELECT payload FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                    (session_id, limit),
+                )
+                payloads = [row[0] for row in cur][::-1]
+        return messages_from_dict([json.loads(p) for p in payloads])
+
+    def count(self, session_id: str) -> int:
+        """Return the number of stored messages for a session."""
+        with self._lock:
+            cur = self._conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,))
+            return cur.fetchone()[0]
+
+    def prune(self, session_id: str, keep: int) -> int:
+        """Delete all but the last ``keep`` messages of a session; return rows removed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq < "
+                "(SELECT COALESCE(MAX(seq), -1) + 1 - ? FROM messages WHERE session_id = ?)",
+                (session_id, keep, session_id),
+            )
+            return cur.rowcount
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session entirely."""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def sessions(self) -> List[str]:
+        """List known session ids."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT session_id FROM messages")]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,220 @@
+"""
+Deterministic local chat model for tests, batch dry-runs and benchmarks.
+
+``FakeChatModel`` never touches the network. Plain calls echo the last
+message (or return ``reply_fn(text)``); when tools are bound (which is how ``with_structured_output`` works)
+it answers with a tool call whose arguments are derived from the tool's JSON
+schema, so graphs that parse structured output run unchanged.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _pick(options: Sequence[Any], text: str) -> Any:
+    """Choose an option deterministically from the text."""
+    return options[zlib.crc32(text.encode("utf-8")) % len(options)]
+
+
+def fake_arguments(parameters: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Build arguments that satisfy a JSON schema ``parameters`` object."""
+    args = {}
+    for name, prop in parameters.get("properties", {}).items():
+        if "enum" in prop:
+            args[name] = _pick(prop["enum"], text)
+        elif prop.get("type") == "string":
+            args[name] = text[:50]
+        elif prop.get("type") == "integer":
+            args[name] = max(prop.get("minimum", 0), min(len(text), prop.get("maximum", len(text))))
+        elif prop.get("type") == "number":
+            args[name] = float(len(text))
+        elif prop.get("type") == "boolean":
+            args[name] = True
+        elif prop.get("type") == "array":
+            args[name] = []
+        else:
+            args[name] = {}
+    return args
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with deterministic output and optional simulated latency."""
+
+    latency: float = 0.0
+    """Seconds to sleep per call, to simulate a remote model."""
+    reply_prefix: str = "echo: "
+    reply_fn: Optional[Callable[[str], str]] = None
+    """Maps the last message's text to the reply, instead of echoing it."""
+    chunk_size: int = 8
+    """Characters per chunk when streaming."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency": self.latency, "reply_prefix": self.reply_prefix}
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> ChatResult:
+        text = str(messages[-1].content) if messages else ""
+        if tools:
+            function = tools[0]["function"]
+            message = AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": function["name"],
+                    "args": fake_arguments(function.get("parameters", {}), text),
+                    "id": f"call_{zlib.crc32(text.encode('utf-8')):08x}",
+                }],
+            )
+        else:
+            message = AIMessage(content=self.reply_fn(text) if self.reply_fn else self.reply_prefix + text)
+
+        input_tokens = sum(_count_tokens(str(m.content)) for m in messages)
+        output_tokens = _count_tokens(str(message.content) or str(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, kwargs.get("tools"))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, kwargs.get("tools"))
+
+    def _chunks(self, result: ChatResult) -> Iterator[ChatGenerationChunk]:
+        message = result.generations[0].message
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                    for i, c in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            ))
+            return
+        text = message.content
+        for start in range(0, len(text), self.chunk_size):
+            last = start + self.chunk_size >= len(text)
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=text[start:start + self.chunk_size],
+                usage_metadata=message.usage_metadata if last else None,
+            ))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages, kwargs.get("tools"))):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._respond(messages, kwargs.get("tools"))):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeRateLimitError(Exception):
+    """429 raised by ``ThrottlingFakeChatModel``, shaped like ``openai.RateLimitError``."""
+
+    status_code = 429
+
+    def __init__(self, message: str = "rate limit exceeded", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ThrottlingFakeChatModel(FakeChatModel):
+    """``FakeChatModel`` that answers 429 like a provider enforcing a concurrency cap."""
+
+    max_concurrency: int = 4
+    """Calls beyond this many in flight fail with ``FakeRateLimitError``."""
+    retry_after: Optional[float] = None
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _in_flight: int = PrivateAttr(default=0)
+    throttled: int = 0
+    peak: int = 0
+
+    def _enter(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_concurrency:
+                self.throttled += 1
+                raise FakeRateLimitError(retry_after=self.retry_after)
+            self._in_flight += 1
+            self.peak = max(self.peak, self._in_flight)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        finally:
+            self._exit()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        finally:
+            self._exit()
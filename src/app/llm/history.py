@@ -0,0 +1,104 @@
+"""
+Conversation history policies.
+
+A policy is a callable that takes the full message list and returns the
+(possibly shorter) list that should be kept in memory and sent to the graph.
+"""
+
+from typing import Any, Callable, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, SystemMessage, convert_to_messages
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+class SlidingWindow:
+    """Keep only the last ``max_messages`` messages."""
+
+    def __init__(self, max_messages: int = 20):
+        if max_messages < 1:
+            raise ValueError("max_messages must be at least 1")
+        self.max_messages = max_messages
+
+    def __call__(self, messages: Sequence[Any]) -> List[BaseMessage]:
+        return convert_to_messages(messages)[-self.max_messages:]
+
+
+class TokenBudget:
+    """Keep the most recent messages that fit in ``max_tokens``."""
+
+    def __init__(self, max_tokens: int = 2000, token_counter: Optional[Callable] = None):
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter or count_tokens_approximately
+
+    def __call__(self, messages: Sequence[Any]) -> List[BaseMessage]:
+        trimmed = trim_messages(
+            convert_to_messages(messages),
+            max_tokens=self.max_tokens,
+            token_counter=self.token_counter,
+            strategy="last",
+            include_system=True,
+            allow_partial=False,
+        )
+        if not trimmed and messages:
+            # Always keep the newest message, even if it alone exceeds the budget.
+            return convert_to_messages(messages)[-1:]
+        return trimmed
+
+
+class RollingSummary:
+    """Fold older messages into a single summary message once history grows.
+
+    When there are more than ``max_messages`` messages, everything but the last
+    ``keep_last`` is summarized by ``llm`` into one ``SystemMessage`` that
+    replaces them. A previous summary is folded into the next one.
+    """
+
+    def __init__(self, llm: Any, max_messages: int = 20, keep_last: int = 6):
+        if not 0 < keep_last < max_messages:
+            raise ValueError("keep_last must be between 1 and max_messages - 1")
+        self.llm = llm
+        self.max_messages = max_messages
+        self.keep_last = keep_last
+
+    def __call__(self, messages: Sequence[Any]) -> List[BaseMessage]:
+        messages = convert_to_messages(messages)
+        if len(messages) <= self.max_messages:
+            return messages
+
+        old, recent = messages[:-self.keep_last], messages[-self.keep_last:]
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in old)
+        reply = self.llm.invoke([
+            {
+                "role": "system",
+                "content": "Summarize the conversation below in a few sentences. "
+                           "Keep facts, names and open questions.",
+            },
+            {"role": "user", "content": transcript},
+        ])
+        return [SystemMessage(content=SUMMARY_PREFIX + reply.content)] + recent
+
+
+def parse_policy(spec: str, llm: Any = None) -> Callable[[Sequence[Any]], List[BaseMessage]]:
+    """Build a policy from a ``kind:size`` string.
+
+    Supported kinds are ``window:<messages>``, ``tokens:<max tokens>`` and
+    ``summary:<messages>`` (the latter needs ``llm``).
+    """
+    kind, _, size = spec.partition(":")
+    if kind == "window":
+        return SlidingWindow(int(size or 20))
+    if kind == "tokens":
+        return TokenBudget(int(size or 2000))
+    if kind == "summary":
+        if llm is None:
+            raise ValueError("summary policy requires an llm")
+        max_messages = int(size or 20)
+        if max_messages < 2:
+            raise ValueError(f"summary policy needs at least 2 messages (a summary plus one kept), got {spec!r}")
+        # About a third verbatim; with max_messages >= 2 that leaves room for the summary.
+        return RollingSummary(llm, max_messages=max_messages, keep_last=max(1, max_messages // 3))
+    raise ValueError(f"Unknown history policy: {spec!r}")
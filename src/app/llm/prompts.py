@@ -0,0 +1,169 @@
+"""
+Prompts built once and formatted many times.
+
+Building a ``ChatPromptTemplate`` and calling
+``PydanticOutputParser.get_format_instructions()`` (which re-derives the
+JSON schema) costs a few hundred microseconds per call, which dominates
+batch loops that do it for every item. ``output_parser``,
+``format_instructions`` and ``json_schema`` are cached per model class.
+A ``PromptRegistry`` compiles each named prompt once, with its format
+instructions already filled in:
+
+    prompts = PromptRegistry()
+    prompts.register("country", "Provide information about {country}.\\n{format_instructions}", model=Country)
+    prompt = prompts.get("country")
+    prompt.format_messages(country="France")
+    prompt.format_many([{"country": c} for c in names])
+    chain = prompt.chain(llm)                       # template | llm | parser
+
+When every message is a plain f-string human/system/AI template, formatting
+skips langchain's per-call validation and builds the messages directly;
+the output equals ``template.format_messages``. Other templates (message
+placeholders, mustache, multimodal content) go through langchain.
+"""
+
+import string
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type, Union
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import (
+    AIMessagePromptTemplate,
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+    PromptTemplate,
+    SystemMessagePromptTemplate,
+)
+from pydantic import BaseModel
+
+_MESSAGE_TYPES = {
+    HumanMessagePromptTemplate: HumanMessage,
+    SystemMessagePromptTemplate: SystemMessage,
+    AIMessagePromptTemplate: AIMessage,
+}
+
+TemplateSpec = Union[str, ChatPromptTemplate, Sequence[Any]]
+
+
+@lru_cache(maxsize=None)
+def output_parser(model: Type[BaseModel]) -> PydanticOutputParser:
+    """A shared ``PydanticOutputParser`` for ``model``."""
+    return PydanticOutputParser(pydantic_object=model)
+
+
+@lru_cache(maxsize=None)
+def format_instructions(model: Type[BaseModel]) -> str:
+    """``get_format_instructions()`` for ``model``, computed once."""
+    return output_parser(model).get_format_instructions()
+
+
+@lru_cache(maxsize=None)
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """``model.model_json_schema()``, computed once; treat the result as read-only."""
+    return model.model_json_schema()
+
+
+def _fast_path(template: ChatPromptTemplate) -> Optional[List[Tuple[type, str]]]:
+    """``(message class, f-string)`` per message, or None if langchain must do the formatting."""
+    compiled = []
+    for message in template.messages:
+        message_type = _MESSAGE_TYPES.get(type(message))
+        prompt = getattr(message, "prompt", None)
+        if message_type is None or type(prompt) is not PromptTemplate or prompt.template_format != "f-string":
+            return None
+        if prompt.partial_variables or message.additional_kwargs:
+            return None
+        for _, field, spec, conversion in string.Formatter().parse(prompt.template):
+            # Only bare names; attribute/index access and format specs are left to langchain.
+            if field is not None and (spec or conversion or not field.isidentifier()):
+                return None
+        compiled.append((message_type, prompt.template))
+    return compiled
+
+
+class CompiledPrompt:
+    """A chat prompt (and optional output parser) ready to format repeatedly."""
+
+    def __init__(self, template: ChatPromptTemplate, model: Optional[Type[BaseModel]] = None):
+        if model is not None and "format_instructions" in template.input_variables:
+            template = template.partial(format_instructions=format_instructions(model))
+        self.template = template
+        self.model = model
+        self.parser = output_parser(model) if model is not None else None
+        self.input_variables = frozenset(template.input_variables)
+        partials = template.partial_variables
+        self._partials = dict(partials) if all(isinstance(v, str) for v in partials.values()) else None
+        self._messages = _fast_path(template) if self._partials is not None else None
+
+    def _check(self, variables: Mapping[str, Any]) -> None:
+        missing = self.input_variables.difference(variables)
+        if missing:
+            raise KeyError(f"Input to ChatPromptTemplate is missing variables {sorted(missing)}")
+
+    def format_messages(self, **variables: Any) -> List[BaseMessage]:
+        if self._messages is None:
+            return self.template.format_messages(**variables)
+        self._check(variables)
+        values = {**self._partials, **variables}
+        return [message_type(content=text.format_map(values)) for message_type, text in self._messages]
+
+    def format_many(self, variable_sets: Iterable[Mapping[str, Any]]) -> List[List[BaseMessage]]:
+        """``format_messages`` for each mapping, in order."""
+        if self._messages is None:
+            return [self.template.format_messages(**variables) for variables in variable_sets]
+        partials, messages, check = self._partials, self._messages, self._check
+        out = []
+        for variables in variable_sets:
+            check(variables)
+            values = {**partials, **variables}
+            out.append([message_type(content=text.format_map(values)) for message_type, text in messages])
+        return out
+
+    def chain(self, llm):
+        """``template | llm | parser`` (without the parser when there is no model)."""
+        runnable = self.template | llm
+        return runnable | self.parser if self.parser is not None else runnable
+
+
+def build_template(spec: TemplateSpec) -> ChatPromptTemplate:
+    """A ``ChatPromptTemplate`` from a human-message string, message specs or a template."""
+    if isinstance(spec, ChatPromptTemplate):
+        return spec
+    if isinstance(spec, str):
+        return ChatPromptTemplate.from_messages([HumanMessagePromptTemplate.from_template(spec)])
+    return ChatPromptTemplate.from_messages(list(spec))
+
+
+class PromptRegistry:
+    """Named prompts, each compiled once on registration."""
+
+    def __init__(self):
+        self._prompts: Dict[str, CompiledPrompt] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, spec: TemplateSpec, model: Optional[Type[BaseModel]] = None,
+                 replace: bool = False) -> CompiledPrompt:
+        """Compile and store a prompt; re-registering an existing name returns the stored one."""
+        with self._lock:
+            if name in self._prompts and not replace:
+                return self._prompts[name]
+        compiled = CompiledPrompt(build_template(spec), model)
+        with self._lock:
+            if replace or name not in self._prompts:
+                self._prompts[name] = compiled
+            return self._prompts[name]
+
+    def get(self, name: str) -> CompiledPrompt:
+        try:
+            return self._prompts[name]
+        except KeyError:
+            raise KeyError(f"no prompt registered as {name!r}") from None
+
+    def names(self) -> List[str]:
+        return sorted(self._prompts)
+
+
+# Shared by the scripts, so each prompt is compiled once per process.
+prompts = PromptRegistry()
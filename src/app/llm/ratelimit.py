@@ -0,0 +1,325 @@
+"""
+Rate-limit-aware concurrency control for chat model calls.
+
+One ``AdaptiveController`` is shared by every model that talks to the same
+provider account. Before each request it waits for:
+
+  * a token-bucket slot for requests per minute,
+  * a token-bucket slot for the estimated tokens per minute,
+  * a concurrency slot, in priority order (lower ``priority`` goes first).
+
+The concurrency limit follows AIMD: it grows by roughly one slot per window
+of successful calls and halves on a 429 or when latency exceeds
+``latency_threshold``. ``limit_chat_model`` wraps any chat model so its calls
+go through the controller and 429s are retried after backing off.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatResult
+from pydantic import ConfigDict
+
+# Priority lanes; any int works, lower runs first.
+INTERACTIVE = 0
+BATCH = 10
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` tokens per minute."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until ``amount`` tokens are available (0 if they are now)."""
+        self._refill(time.monotonic() if now is None else now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact; may go into debt."""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Return True for provider 429 errors (``openai.RateLimitError`` and friends)."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else getattr(error, "retry_after", None)
+    except ValueError:
+        return None
+
+
+class AdaptiveController:
+    """Shared request/token budgets plus an AIMD concurrency window with priority lanes."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        latency_threshold: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+        default_backoff: float = 1.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.default_backoff = default_backoff
+        self.in_flight = 0
+        self.stats = {"requests": 0, "throttled": 0, "decreases": 0, "errors": 0, "cancelled": 0}
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    # -- admission -------------------------------------------------------
+
+    def _try_admit(self, ticket: tuple, tokens: float) -> Optional[float]:
+        """Admit ``ticket`` if possible; else return how long to wait (None = until notified)."""
+        now = time.monotonic()
+        if self._waiters[0] is not ticket:
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        wait = max(
+            self.requests.wait_time(1, now) if self.requests else 0.0,
+            self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+        )
+        if wait > 0:
+            return wait
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens:
+            self.tokens.consume(tokens)
+        heapq.heappop(self._waiters)
+        self.in_flight += 1
+        self.stats["requests"] += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def _enqueue(self, priority: int) -> tuple:
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: tuple) -> None:
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def acquire(self, tokens: float = 0, priority: int = INTERACTIVE) -> None:
+        """Block until a request carrying ``tokens`` estimated tokens may start."""
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_admit(ticket, tokens)
+                    if wait == 0.0:
+                        return
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+
+    async def aacquire(self, tokens: float = 0, priority: int = INTERACTIVE) -> None:
+        """Async ``acquire``; polls instead of blocking the event loop."""
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket, tokens)
+                if wait == 0.0:
+                    return
+                await asyncio.sleep(min(wait, 0.05) if wait is not None else 0.005)
+        except BaseException:
+            with self._cond:
+                self._dequeue(ticket)
+            raise
+
+    # -- feedback --------------------------------------------------------
+
+    def _decrease(self, now: float) -> None:
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+            self._last_decrease = now
+            self.stats["decreases"] += 1
+
+    def release(self, latency: float, tokens_charged: float = 0, tokens_used: Optional[float] = None,
+                throttled: bool = False, retry_after: Optional[float] = None, error: bool = False,
+                cancelled: bool = False) -> None:
+        """Finish a request and feed its outcome into the AIMD window.
+
+        A ``cancelled`` request only frees its slot; it says nothing about the
+        provider's capacity.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            if cancelled:
+                self.stats["cancelled"] += 1
+            elif throttled:
+                self.stats["throttled"] += 1
+                self._paused_until = max(self._paused_until, now + (retry_after or self.default_backoff))
+                self._decrease(now)
+            elif error:
+                self.stats["errors"] += 1
+            elif self.latency_threshold is not None and latency > self.latency_threshold:
+                self._decrease(now)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            if self.tokens and tokens_used is not None:
+                self.tokens.adjust(tokens_used - tokens_charged)
+            self._cond.notify_all()
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """Chat model wrapper that routes every call through an ``AdaptiveController``.
+
+    Build the inner model with its own retries off (``max_retries=0`` for
+    ``ChatOpenAI``) so 429s reach the controller instead of being retried blindly.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseChatModel
+    controller: AdaptiveController
+    priority: int = INTERACTIVE
+    max_retries: int = 5
+    expected_output_tokens: int = 256
+
+    @property
+    def _llm_type(self) -> str:
+        return f"rate-limited-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Let the inner model format the tools, then bind the same kwargs to the wrapper.
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def _estimate(self, messages: List[BaseMessage]) -> int:
+        return count_tokens_approximately(messages) + self.expected_output_tokens
+
+    @staticmethod
+    def _used_tokens(result: ChatResult) -> Optional[int]:
+        usage = getattr(result.generations[0].message, "usage_metadata", None) if result.generations else None
+        return usage.get("total_tokens") if usage else None
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimate = self._estimate(messages)
+        for attempt in range(self.max_retries + 1):
+            self.controller.acquire(estimate, self.priority)
+            start = time.monotonic()
+            try:
+                result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+                self.controller.release(time.monotonic() - start, estimate, 0, throttled=throttled,
+                                        retry_after=_retry_after(e), error=not throttled)
+                if throttled and attempt < self.max_retries:
+                    continue
+                raise
+            except BaseException:
+                # Cancelled (a client went away) or interrupted: the slot must still be freed.
+                self.controller.release(time.monotonic() - start, estimate, cancelled=True)
+                raise
+            self.controller.release(time.monotonic() - start, estimate, self._used_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimate = self._estimate(messages)
+        for attempt in range(self.max_retries + 1):
+            await self.controller.aacquire(estimate, self.priority)
+            start = time.monotonic()
+            try:
+                result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+                self.controller.release(time.monotonic() - start, estimate, 0, throttled=throttled,
+                                        retry_after=_retry_after(e), error=not throttled)
+                if throttled and attempt < self.max_retries:
+                    continue
+                raise
+            except BaseException:
+                # Cancelled (a client went away) or interrupted: the slot must still be freed.
+                self.controller.release(time.monotonic() - start, estimate, cancelled=True)
+                raise
+            self.controller.release(time.monotonic() - start, estimate, self._used_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+
+_default_controller: Optional[AdaptiveController] = None
+
+
+def default_controller() -> AdaptiveController:
+    """Process-wide controller configured from ``$LLM_RPM``, ``$LLM_TPM`` and ``$LLM_MAX_CONCURRENCY``."""
+    global _default_controller
+    if _default_controller is None:
+        rpm, tpm = os.environ.get("LLM_RPM"), os.environ.get("LLM_TPM")
+        _default_controller = AdaptiveController(
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 64)),
+        )
+    return _default_controller
+
+
+def limit_chat_model(llm: BaseChatModel, controller: Optional[AdaptiveController] = None,
+                     priority: int = INTERACTIVE, **kwargs: Any) -> RateLimitedChatModel:
+    """Wrap ``llm`` so its calls share ``controller`` (the default one if omitted)."""
+    return RateLimitedChatModel(inner=llm, controller=controller or default_controller(), priority=priority, **kwargs)
@@ -0,0 +1,203 @@
+"""
+Incremental structured-output parsing for streamed completions.
+
+``PydanticOutputParser`` only sees the completion once it is finished, and
+langchain's partial-JSON streaming re-parses the whole buffer on every chunk.
+``StreamingPydanticParser`` scans each character once, validates every
+top-level field against the model as soon as its value is complete, and
+raises ``OutputParserException`` on the first violation so the caller can stop
+the generation early.
+"""
+
+import json
+from typing import Annotated, Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+FieldCallback = Callable[[str, Any], None]
+
+_ADAPTERS: Dict[Tuple[type, str], TypeAdapter] = {}
+
+
+def _field_adapter(model: Type[BaseModel], name: str) -> TypeAdapter:
+    key = (model, name)
+    adapter = _ADAPTERS.get(key)
+    if adapter is None:
+        field = model.model_fields[name]
+        adapter = _ADAPTERS[key] = TypeAdapter(Annotated[field.annotation, field])
+    return adapter
+
+
+class StreamingPydanticParser:
+    """Parse a JSON object for ``pydantic_object`` from text arriving in chunks.
+
+    ``feed`` returns the ``(field, value)`` pairs completed by the chunk, with
+    values validated against the field's type and constraints. ``finish``
+    validates the whole object (including model validators) and returns it.
+    Text before the opening brace, such as a ```json fence, is ignored.
+    """
+
+    def __init__(self, pydantic_object: Type[BaseModel]):
+        self.pydantic_object = pydantic_object
+        self.values: Dict[str, Any] = {}
+        self.done = False
+        # All chunks, joined only when the text is read, so feeding stays linear.
+        self._chunks: List[str] = []
+        self._length = 0
+        # Chunks from ``_window_start`` on, kept while a key or value is still open.
+        self._window: List[str] = []
+        self._window_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def _text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks[:] = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def _slice(self, start: int, end: int) -> str:
+        """Text between absolute offsets ``start`` and ``end``, which must be in the window."""
+        if len(self._window) > 1:
+            self._window[:] = ["".join(self._window)]
+        return self._window[0][start - self._window_start:end - self._window_start]
+
+    def _drop_before(self, start: int) -> None:
+        """Forget window text before absolute offset ``start``."""
+        if len(self._window) > 1:
+            self._window[:] = ["".join(self._window)]
+        if self._window:
+            self._window[0] = self._window[0][start - self._window_start:]
+        self._window_start = start
+
+    def feed(self, chunk: Any) -> List[Tuple[str, Any]]:
+        """Consume a text (or message) chunk and return newly completed fields."""
+        if self.done:
+            return []
+        chunk = chunk if isinstance(chunk, str) else str(getattr(chunk, "content", chunk))
+        self._chunks.append(chunk)
+        self._window.append(chunk)
+        offset = self._length
+        self._length += len(chunk)
+        completed = []
+        for j, c in enumerate(chunk):
+            i = offset + j
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None and self._key is None:
+                        self._key = json.loads(self._slice(self._key_start, i + 1))
+                continue
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = i
+            elif self._depth > 1:
+                if c in "{[":
+                    self._depth += 1
+                elif c in "}]":
+                    self._depth -= 1
+            elif c == ":" and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif c in ",}":
+                if self._value_start is not None:
+                    completed.append(self._complete(self._key, self._slice(self._value_start, i)))
+                    self._key_start = self._key = self._value_start = None
+                    self._drop_before(i + 1)
+                if c == "}":
+                    self.done = True
+                    self._window.clear()
+                    return completed
+            elif c in "{[":
+                self._depth += 1
+        if self._key_start is None and self._value_start is None:
+            # Nothing open, so nothing fed so far will be sliced again.
+            self._window.clear()
+            self._window_start = self._length
+        return completed
+
+    def _complete(self, name: str, raw: str) -> Tuple[str, Any]:
+        try:
+            value = json.loads(raw)
+        except ValueError as e:
+            raise OutputParserException(f"Invalid JSON for field {name!r}: {e}", llm_output=self._text)
+
+        if name not in self.pydantic_object.model_fields:
+            if self.pydantic_object.model_config.get("extra") == "forbid":
+                raise OutputParserException(f"Unexpected field {name!r}", llm_output=self._text)
+            self.values[name] = value
+            return name, value
+        try:
+            validated = _field_adapter(self.pydantic_object, name).validate_python(value)
+        except ValidationError as e:
+            raise OutputParserException(f"Invalid value for field {name!r}: {e}", llm_output=self._text)
+        self.values[name] = value
+        return name, validated
+
+    def finish(self) -> BaseModel:
+        """Validate and return the complete object."""
+        if not self.done:
+            raise OutputParserException("Incomplete JSON object in output", llm_output=self._text)
+        try:
+            return self.pydantic_object.model_validate(self.values)
+        except ValidationError as e:
+            raise OutputParserException(str(e), llm_output=self._text)
+
+
+def parse_stream(stream: Iterable[Any], pydantic_object: Type[BaseModel],
+                 on_field: Optional[FieldCallback] = None) -> BaseModel:
+    """Parse ``llm.stream(...)`` output into ``pydantic_object``.
+
+    ``on_field`` is called for each field as soon as it completes. The stream
+    is closed as soon as a field fails validation. Once the object is
+    complete the rest of the reply is read without parsing, so wrappers such
+    as ``cached_stream`` see it finish and can store it.
+    """
+    parser = StreamingPydanticParser(pydantic_object)
+    try:
+        for chunk in stream:
+            for name, value in parser.feed(chunk):
+                if on_field:
+                    on_field(name, value)
+            if parser.done:
+                for _ in stream:
+                    pass
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+    return parser.finish()
+
+
+async def aparse_stream(stream: AsyncIterable[Any], pydantic_object: Type[BaseModel],
+                        on_field: Optional[FieldCallback] = None) -> BaseModel:
+    """Async version of ``parse_stream`` for ``llm.astream(...)``."""
+    parser = StreamingPydanticParser(pydantic_object)
+    try:
+        async for chunk in stream:
+            for name, value in parser.feed(chunk):
+                if on_field:
+                    on_field(name, value)
+            if parser.done:
+                async for _ in stream:
+                    pass
+                break
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose:
+            await aclose()
+    return parser.finish()
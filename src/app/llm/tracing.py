@@ -0,0 +1,222 @@
+"""
+Per-node tracing for compiled LangGraph graphs.
+
+``GraphTracer`` is a langchain callback handler that turns graph, node, model
+and output-parser runs into spans (wall time, token counts, retries, errors)
+and hands each finished span to one or more exporters:
+
+    graph = traced(build_graph(llm), JsonlExporter("spans.jsonl"))
+
+``traced`` returns the graph untouched when tracing is off, so there is no
+overhead unless it is enabled (explicitly, or with ``$GRAPH_TRACE=<file>``).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+ENV_VAR = "GRAPH_TRACE"
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Return the ``q``-th percentile (0-100) of ``values`` by linear interpolation."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class JsonlExporter:
+    """Append spans to a JSONL file, one object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Aggregator:
+    """Keep per ``kind/node`` statistics in memory and report percentiles.
+
+    Only the last ``window`` durations per key are kept, so memory stays
+    bounded however long the process runs.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def export(self, span: Dict[str, Any]) -> None:
+        key = f"{span['kind']}/{span['node']}"
+        with self._lock:
+            self._durations[key].append(span["duration_ms"])
+            totals = self._totals[key]
+            totals["count"] += 1
+            totals["total_ms"] += span["duration_ms"]
+            totals["input_tokens"] += span.get("input_tokens") or 0
+            totals["output_tokens"] += span.get("output_tokens") or 0
+            totals["retries"] += span.get("retries", 0)
+            totals["errors"] += 1 if span.get("error") else 0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count, totals and p50/p90/p99/max duration per key."""
+        with self._lock:
+            result = {}
+            for key, durations in self._durations.items():
+                totals = self._totals[key]
+                result[key] = {
+                    **{k: int(v) if k != "total_ms" else round(v, 4) for k, v in totals.items()},
+                    "mean_ms": round(totals["total_ms"] / totals["count"], 4),
+                    "p50_ms": round(percentile(durations, 50), 4),
+                    "p90_ms": round(percentile(durations, 90), 4),
+                    "p99_ms": round(percentile(durations, 99), 4),
+                    "max_ms": round(max(durations), 4),
+                }
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+
+
+class GraphTracer(BaseCallbackHandler):
+    """Callback handler that emits one span per graph, node, model and parser run."""
+
+    def __init__(self, *exporters: Any):
+        self.exporters = list(exporters)
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self._traces: Dict[UUID, UUID] = {}
+
+    def _link(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        self._parents[run_id] = parent_run_id
+        self._traces[run_id] = self._traces.get(parent_run_id, run_id) if parent_run_id else run_id
+
+    def _nearest_span(self, run_id: Optional[UUID]) -> Optional[Dict[str, Any]]:
+        while run_id is not None and run_id not in self._open:
+            run_id = self._parents.get(run_id)
+        return self._open.get(run_id) if run_id is not None else None
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], kind: str, name: str, node: str) -> None:
+        self._link(run_id, parent_run_id)
+        parent = self._nearest_span(parent_run_id)
+        self._open[run_id] = {
+            "trace_id": str(self._traces[run_id]),
+            "span_id": str(run_id),
+            "parent_id": parent["span_id"] if parent else None,
+            "kind": kind,
+            "name": name,
+            "node": node,
+            "start": time.time(),
+            "retries": 0,
+            "_t0": time.perf_counter(),
+        }
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **fields: Any) -> None:
+        self._parents.pop(run_id, None)
+        self._traces.pop(run_id, None)
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        span["duration_ms"] = (time.perf_counter() - span.pop("_t0")) * 1000
+        span["error"] = f"{type(error).__name__}: {error}" if error else None
+        span.update(fields)
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    def _count_retry(self, parent_run_id: Optional[UUID], tags: Optional[List[str]]) -> None:
+        # ``Runnable.with_retry`` tags every attempt after the first with ``retry:attempt:<n>``.
+        if tags and any(tag.startswith("retry:attempt:") for tag in tags):
+            span = self._nearest_span(parent_run_id)
+            if span is not None:
+                span["retries"] += 1
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._count_retry(parent_run_id, tags)
+        name = kwargs.get("name") or ""
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._start(run_id, None, "graph", name, "")
+        elif node and name == node:
+            self._start(run_id, parent_run_id, "node", name, node)
+        elif node and name.endswith("Parser"):
+            self._start(run_id, parent_run_id, "parser", name, node)
+        else:
+            # Not reported, but its children still need the trace and parent span.
+            self._link(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs
+    ):
+        self._count_retry(parent_run_id, tags)
+        metadata = metadata or {}
+        name = metadata.get("ls_model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, parent_run_id, "llm", name, metadata.get("langgraph_node", ""))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens = output_tokens = None
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens = (input_tokens or 0) + usage.get("input_tokens", 0)
+                    output_tokens = (output_tokens or 0) + usage.get("output_tokens", 0)
+        if input_tokens is None and response.llm_output:
+            usage = response.llm_output.get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens")
+            output_tokens = usage.get("completion_tokens")
+        self._end(run_id, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retry(self, retry_state, *, run_id, parent_run_id=None, **kwargs):
+        span = self._nearest_span(run_id)
+        if span is not None:
+            span["retries"] += 1
+
+
+def tracing_enabled() -> bool:
+    """Return True when ``$GRAPH_TRACE`` asks for tracing."""
+    return bool(os.environ.get(ENV_VAR))
+
+
+def traced(graph: Any, *exporters: Any, enabled: Optional[bool] = None) -> Any:
+    """Attach a ``GraphTracer`` to a compiled graph.
+
+    With no exporters, spans go to the JSONL file named by ``$GRAPH_TRACE``.
+    When tracing is disabled the graph is returned unchanged.
+    """
+    if enabled is None:
+        enabled = bool(exporters) or tracing_enabled()
+    if not enabled:
+        return graph
+    exporters_list: List[Any] = list(exporters) or [JsonlExporter(os.environ[ENV_VAR])]
+    return graph.with_config(callbacks=[GraphTracer(*exporters_list)])
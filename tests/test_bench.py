@@ -0,0 +1,124 @@
+"""
+Tests for the app.bench micro-benchmark framework.
+"""
+
+import json
+
+import pytest
+
+from app.bench import benchmark, compare, discover, load_baseline, run_benchmark, run_suite, save_baseline
+from app.bench.__main__ import main as bench_main
+from app.bench.runner import SCHEMA_VERSION, reject_outliers
+
+SUITE = '''
+from app.bench import benchmark
+
+calls = []
+
+
+def bench_append():
+    calls.append(1)
+
+
+@benchmark(number=5, repeat=4, name="fixed")
+def sum_small():
+    sum(range(100))
+
+
+def helper():
+    raise AssertionError("not a benchmark")
+'''
+
+
+@pytest.fixture
+def suite(tmp_path):
+    (tmp_path / "bench_sample.py").write_text(SUITE)
+    (tmp_path / "helpers.py").write_text("raise AssertionError('not a suite')\n")
+    return tmp_path
+
+
+def test_discover(suite):
+    """Test bench_* functions and decorated functions are found in bench_*.py files."""
+    names = [name for name, _ in discover([str(suite)])]
+    assert names == ["sample.append", "sample.fixed"]
+    assert [name for name, _ in discover([str(suite)], "*.fix*")] == ["sample.fixed"]
+
+
+def test_reject_outliers():
+    """Test samples far from the median are dropped."""
+    samples = [1.0, 1.1, 0.9, 1.05, 0.95, 10.0]
+    assert reject_outliers(samples) == [1.0, 1.1, 0.9, 1.05, 0.95]
+    assert reject_outliers([2.0, 2.0, 2.0]) == [2.0, 2.0, 2.0]
+
+
+def test_run_benchmark_reports_time_and_memory():
+    """Test statistics, loop counts and memory are recorded."""
+    @benchmark(number=3, repeat=5)
+    def allocate():
+        return bytearray(200_000)
+
+    result = run_benchmark(allocate, warmup=1)
+    assert result["number"] == 3
+    assert result["samples"] + result["outliers"] == 5
+    assert 0 < result["min_s"] <= result["median_s"]
+    assert result["peak_bytes"] >= 200_000
+
+
+def _doc(**medians):
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "results": {name: {"median_s": m, "stdev_s": 0.0, "peak_bytes": 1000} for name, m in medians.items()},
+    }
+
+
+def test_compare_flags_regressions():
+    """Test slowdowns beyond the threshold regress, and new/missing benchmarks are reported."""
+    baseline = _doc(a=1.0, b=1.0, c=1.0, gone=1.0)
+    current = _doc(a=1.05, b=1.5, c=0.5, new=1.0)
+    current["results"]["a"]["peak_bytes"] = 100_000
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.10)}
+    assert rows["a"]["status"] == "regressed" and rows["a"]["memory_regressed"]
+    assert rows["b"]["status"] == "regressed"
+    assert rows["c"]["status"] == "improved"
+    assert rows["new"]["status"] == "new"
+    assert rows["gone"]["status"] == "missing"
+
+
+def test_baseline_round_trip_and_schema(tmp_path, suite):
+    """Test baselines are saved with metadata and old schemas are rejected."""
+    doc = run_suite(discover([str(suite)]), warmup=0, repeat=3, min_time=0.0001)
+    path = tmp_path / "baseline.json"
+    save_baseline(doc, str(path))
+    loaded = load_baseline(str(path))
+    assert loaded["results"].keys() == {"sample.append", "sample.fixed"}
+    assert loaded["python"] and loaded["created"]
+
+    path.write_text(json.dumps({**doc, "schema_version": 0}))
+    with pytest.raises(ValueError, match="schema"):
+        load_baseline(str(path))
+
+
+def test_cli_exit_code(tmp_path, suite, capsys):
+    """Test compare exits non-zero only when something regressed."""
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    assert bench_main(["run", str(suite), "--repeat", "3", "--min-time", "0.0001", "--save", str(baseline)]) == 0
+    assert bench_main(["compare", str(baseline), "--current", str(baseline)]) == 0
+
+    doc = json.loads(baseline.read_text())
+    for result in doc["results"].values():
+        result["median_s"] *= 3
+    current.write_text(json.dumps(doc))
+    assert bench_main(["compare", str(baseline), "--current", str(current)]) == 1
+    assert "regression" in capsys.readouterr().out
+
+
+def test_repo_benchmarks_run_once():
+    """Test every benchmark in benchmarks/ can be discovered and called."""
+    pytest.importorskip("langgraph")
+    from app.bench.__main__ import DEFAULT_PATHS
+
+    found = dict(discover(DEFAULT_PATHS))
+    assert {"core.get_system_info", "llm.cache_key", "scripts.router_turn"} <= found.keys()
+    for func in found.values():
+        func()
@@ -0,0 +1,36 @@
+"""
+Tests for the LangGraph overhead benchmark.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "langgraph"))
+
+from bench_graphs import compare, run
+
+
+def test_run_reports_every_node():
+    """Test run returns per-node metrics for both graphs."""
+    results = run(turns=4, workers=2)
+    router = results["graphs"]["router"]
+    assert set(router["nodes"]) >= {"classifier", "router"}
+    assert router["nodes"]["classifier"]["parse_ms"] > 0
+    for n in router["nodes"].values():
+        # Overhead excludes parse time and uses the same (mean) statistic as the node time.
+        assert n["overhead_ms"] == pytest.approx(max(0.0, n["node_ms"] - n["llm_ms"] - n["parse_ms"]), abs=1e-3)
+    assert set(results["graphs"]["example"]["nodes"]) == {"chatbot"}
+    assert router["throughput_seq"] > 0
+
+
+def test_compare_flags_regressions():
+    """Test compare respects direction and threshold."""
+    baseline = {"graphs": {"router": {"turn_ms": 1.0, "throughput_seq": 100.0}}}
+    current = {"graphs": {"router": {"turn_ms": 1.05, "throughput_seq": 80.0}}}
+    regressions = compare(current, baseline, threshold=0.10)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("router.throughput_seq")
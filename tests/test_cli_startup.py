@@ -0,0 +1,75 @@
+"""
+Tests for the main.py subcommand dispatcher and its import-time budget.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+import main as cli
+
+# Import time (us) that main.py may add on top of a bare interpreter for light commands.
+IMPORT_BUDGET_US = 50_000
+HEAVY_MODULES = {
+    "torch", "transformers", "diffusers", "smolagents", "numpy", "pydantic",
+    "langchain", "langchain_core", "langgraph", "fastapi", "uvicorn", "httpx",
+}
+
+
+def _top_level_imports(args):
+    """Run python -X importtime and return {top-level module: cumulative us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+@pytest.mark.parametrize("command", [["--help"], ["info"], []])
+def test_light_commands_import_budget(command):
+    """Test --help and info import nothing heavy and stay within the startup budget."""
+    baseline = _top_level_imports(["-c", "pass"])
+    imports = _top_level_imports(["main.py", *command])
+    added = {name: us for name, us in imports.items() if name not in baseline}
+
+    heavy = {name for name in added if name.split(".")[0] in HEAVY_MODULES}
+    assert not heavy, f"light command imported {sorted(heavy)}"
+    total = sum(added.values())
+    assert total < IMPORT_BUDGET_US, f"startup imports took {total}us: {sorted(added.items(), key=lambda x: -x[1])[:10]}"
+
+
+def test_info_is_default(capsys):
+    """Test running without a subcommand prints system info."""
+    cli.main([])
+    out = capsys.readouterr().out
+    assert "=== UV Tests Application ===" in out
+    assert "System Information:" in out
+
+
+def test_script_commands_pass_arguments_through(monkeypatch):
+    """Test script subcommands forward all remaining arguments, including --help."""
+    calls = []
+    monkeypatch.setattr(cli, "run_script", lambda path, argv: calls.append((path, argv)))
+    cli.main(["router", "--history", "tokens:2000", "--help"])
+    cli.main(["smol", "list the files"])
+    assert calls == [
+        ("scripts/langgraph/router.py", ["--history", "tokens:2000", "--help"]),
+        ("scripts/smol/smol.py", ["list the files"]),
+    ]
+
+
+def test_unknown_arguments_rejected():
+    """Test extra arguments to built-in commands are an error."""
+    with pytest.raises(SystemExit):
+        cli.main(["info", "--bogus"])
@@ -0,0 +1,106 @@
+"""
+Tests for the hardware/runtime capability probe in app.core.utils.
+"""
+
+import os
+
+import pytest
+
+from app.core import utils
+from app.core.utils import (
+    Capabilities,
+    available_cores,
+    cgroup_cpu_limit,
+    cgroup_memory_limit,
+    get_system_info,
+    limit_native_threads,
+    probe_capabilities,
+    recommended_batch_size,
+    recommended_torch_threads,
+    recommended_workers,
+)
+
+
+def _caps(usable_cpus=8, memory_limit=8 << 30):
+    return Capabilities(
+        cpu_count=64, affinity_cpus=usable_cpus, cgroup_cpus=None, usable_cpus=usable_cpus,
+        physical_memory=256 << 30, memory_limit=memory_limit, simd_flags=("avx2",), machine="x86_64",
+        blas=None, torch_threads=None, torch_interop_threads=None,
+    )
+
+
+def test_cgroup_v2_limits(tmp_path):
+    """Test cpu.max and memory.max are read from a cgroup v2 tree."""
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+    (tmp_path / "memory.max").write_text("2147483648\n")
+    assert cgroup_cpu_limit(tmp_path) == 2.5
+    assert cgroup_memory_limit(tmp_path) == 2 << 30
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    (tmp_path / "memory.max").write_text("max\n")
+    assert cgroup_cpu_limit(tmp_path) is None
+    assert cgroup_memory_limit(tmp_path) is None
+
+
+def test_cgroup_v1_limits(tmp_path):
+    """Test CFS quota and memory.limit_in_bytes are read from a cgroup v1 tree."""
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+    assert cgroup_cpu_limit(tmp_path) == 2.0
+    assert cgroup_memory_limit(tmp_path) is None
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cgroup_cpu_limit(tmp_path) is None
+
+
+def test_probe_is_cached_and_consistent():
+    """Test the probe is cached and usable CPUs never exceed what the host or affinity allow."""
+    caps = probe_capabilities()
+    assert probe_capabilities() == caps
+    assert 1 <= caps.usable_cpus <= (caps.affinity_cpus or caps.cpu_count or caps.usable_cpus)
+    info = get_system_info()
+    assert info["usable_cpus"] == caps.usable_cpus
+    assert "simd_flags" in info
+
+
+def test_probe_reports_blas_once_numpy_is_loaded():
+    """Test the BLAS field is filled in when numpy has been imported."""
+    pytest.importorskip("numpy")
+    assert isinstance(probe_capabilities().blas, str)
+
+
+def test_recommendations():
+    """Test executor, torch thread and batch sizes follow the probe."""
+    caps = _caps(usable_cpus=8)
+    assert recommended_workers("cpu", caps) == 8
+    assert recommended_workers("io", caps) == 12
+    assert recommended_torch_threads(1, caps) == (8, 2)
+    assert recommended_torch_threads(2, caps) == (4, 2)
+    assert recommended_torch_threads(16, _caps(usable_cpus=2)) == (1, 1)
+    assert recommended_batch_size(1 << 30, max_batch=64, caps=caps) == 2
+    assert recommended_batch_size(1, max_batch=64, caps=caps) == 64
+    assert recommended_batch_size(1 << 40, caps=caps) == 1
+    with pytest.raises(ValueError):
+        recommended_workers("gpu", caps)
+
+
+def test_available_cores():
+    """Test cores come from the affinity mask and are trimmed to the usable count."""
+    cores = available_cores()
+    assert cores and len(cores) == probe_capabilities().usable_cpus
+    if hasattr(os, "sched_getaffinity"):
+        assert set(cores) <= os.sched_getaffinity(0)
+    assert len(available_cores(_caps(usable_cpus=1))) == 1
+
+
+def test_limit_native_threads_keeps_existing(monkeypatch):
+    """Test thread variables are set only when not already configured."""
+    for var in utils.NATIVE_THREAD_VARS:
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("OMP_NUM_THREADS", "3")
+    assert limit_native_threads(5) == 5
+    assert os.environ["OMP_NUM_THREADS"] == "3"
+    assert os.environ["OPENBLAS_NUM_THREADS"] == "5"
@@ -0,0 +1,100 @@
+"""
+Tests for deadline budgets, cost-based profile choice and the step watchdog.
+"""
+
+import pickle
+
+import pytest
+
+from app.core.deadline import (
+    CostModel, Deadline, DeadlineExceeded, Degradations, Profile, StepWatchdog, choose_profile,
+)
+
+PROFILES = (Profile("full", cost=10.0), Profile("fast", cost=4.0), Profile("draft", cost=1.0))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_remaining_and_share():
+    """Test remaining time never goes negative and is split evenly."""
+    clock = FakeClock()
+    deadline = Deadline(10.0, clock=clock)
+    clock.now += 4
+    assert deadline.remaining() == 6.0
+    assert deadline.share(3) == 2.0
+    assert not deadline.expired
+    clock.now += 10
+    assert deadline.remaining() == 0.0 and deadline.expired
+
+
+def test_cost_model_learns_an_exponential_average():
+    """Test the first observation seeds the rate and later ones move it by alpha."""
+    model = CostModel(alpha=0.5)
+    assert model.estimate(10) is None
+    model.observe(cost=10, seconds=20)
+    assert model.estimate(1) == 2.0
+    model.observe(cost=1, seconds=4)
+    assert model.estimate(1) == 3.0
+    model.observe(cost=0, seconds=5)
+    assert model.samples == 2
+
+
+def test_choose_profile_degrades_with_the_budget():
+    """Test the best affordable profile is chosen, and none when nothing fits."""
+    model = CostModel(seconds_per_unit=1.0)
+    assert choose_profile(PROFILES, 20, model).name == "full"
+    assert choose_profile(PROFILES, 5, model).name == "fast"
+    assert choose_profile(PROFILES, 1.5, model).name == "draft"
+    assert choose_profile(PROFILES, 1.0, model) is None  # margin
+    assert choose_profile(PROFILES, 0, model) is None
+    assert choose_profile(PROFILES, 0.1, CostModel()).name == "full"  # no estimate yet
+
+
+def test_watchdog_aborts_on_projected_overrun():
+    """Test the watchdog stops a run as soon as the remaining steps cannot fit."""
+    clock = FakeClock()
+    deadline = Deadline(10.0, clock=clock)
+    watchdog = StepWatchdog(deadline, total_steps=10, clock=clock)
+    for step in range(1, 5):
+        clock.now += 0.9
+        watchdog.check(step)
+    clock.now += 0.5  # step 5 was quick: 4.1s for 5 steps, ~4.1s more needed, 5.9s left
+    watchdog.check(5)
+    clock.now += 3.0  # 7.1s for 6 steps: ~4.7s more needed, 2.9s left
+    with pytest.raises(DeadlineExceeded, match="6/10 steps") as raised:
+        watchdog.check(6)
+    assert watchdog.completed == 6
+    assert isinstance(DeadlineExceeded(), TimeoutError)
+
+    # Partial progress travels with the error, also across a process boundary.
+    error = pickle.loads(pickle.dumps(raised.value))
+    assert (error.completed, error.total_steps, error.progress) == (6, 10, 0.6)
+    assert error.seconds == pytest.approx(7.1)
+    assert str(error) == str(raised.value)
+
+
+def test_watchdog_allows_the_final_step():
+    """Test completing the last step never raises, even past the deadline."""
+    clock = FakeClock()
+    watchdog = StepWatchdog(Deadline(1.0, clock=clock), total_steps=2, clock=clock)
+    clock.now += 5
+    watchdog.check(2)
+
+
+def test_degradation_counters():
+    """Test per-stage fallback counts and request totals."""
+    counts = Degradations()
+    counts.record("image", "draft")
+    counts.record("image", "draft")
+    counts.record("summary", "extractive")
+    counts.record_request(degraded=True)
+    counts.record_request(degraded=False)
+    assert counts.snapshot() == {
+        "image:draft": 2, "summary:extractive": 1, "requests": 2, "degraded_requests": 1,
+    }
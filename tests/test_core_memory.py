@@ -0,0 +1,108 @@
+"""
+Tests for the opt-in memory profiler in app.core.memory.
+"""
+
+import json
+import threading
+
+import pytest
+
+from app.core import memory
+from app.core.memory import dump_report, memory_region, profile_memory, regions, report
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    path = tmp_path / "memprof.jsonl"
+    memory.reset()
+    memory.enable(str(path))
+    yield path
+    memory.disable()
+    memory.reset()
+
+
+def test_disabled_is_a_noop():
+    """Test nothing is recorded and the same no-op context is reused when disabled."""
+    assert not memory.is_enabled()
+    assert memory_region("a") is memory_region("b")
+
+    @profile_memory()
+    def work():
+        return 42
+
+    with memory_region("a"):
+        assert work() == 42
+    assert regions() == []
+
+
+def test_regions_record_python_and_rss(profiler):
+    """Test nested regions record deltas, peaks and the allocating line."""
+    kept = []
+
+    @profile_memory("allocate")
+    def allocate():
+        return [bytes(1000) for _ in range(2000)]
+
+    with memory_region("outer"):
+        kept.append(allocate())
+        with memory_region("spike"):
+            spike = bytearray(8_000_000)
+            del spike
+
+    by_name = {r.name: r for r in regions()}
+    assert [r.name for r in regions()] == ["allocate", "spike", "outer"]
+    assert by_name["allocate"].traced_delta >= 2_000_000
+    assert by_name["spike"].traced_peak >= 8_000_000
+    assert by_name["spike"].traced_delta < 100_000
+    # The nested spike counts towards the enclosing region's peak.
+    assert by_name["outer"].traced_peak >= 8_000_000
+    assert any("test_core_memory.py" in site["where"] for site in by_name["allocate"].top)
+
+
+def test_region_in_another_thread_keeps_peak(profiler):
+    """Test a region entered in another thread does not erase an open region's peak."""
+    spiked, entered = threading.Event(), threading.Event()
+
+    def other():
+        spiked.wait()
+        with memory_region("other"):
+            entered.set()
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    with memory_region("main"):
+        spike = bytearray(8_000_000)
+        del spike
+        spiked.set()
+        entered.wait()
+    thread.join()
+
+    by_name = {r.name: r for r in regions()}
+    assert by_name["main"].traced_peak >= 8_000_000
+    assert by_name["other"].traced_peak < 1_000_000
+
+
+def test_jsonl_written_as_regions_run(profiler):
+    """Test enter/exit records are appended immediately, innermost exit first."""
+    with memory_region("outer"):
+        with memory_region("inner"):
+            pass
+        events = [json.loads(line) for line in profiler.read_text().splitlines()]
+        assert [(e["event"], e["region"]) for e in events] == [
+            ("enter", "outer"), ("enter", "inner"), ("exit", "inner"),
+        ]
+    assert json.loads(profiler.read_text().splitlines()[-1])["region"] == "outer"
+
+
+def test_report_and_dump(profiler, tmp_path):
+    """Test the text and JSON reports aggregate calls per region."""
+    for _ in range(3):
+        with memory_region("summarize"):
+            data = [bytes(512) for _ in range(100)]
+            del data
+
+    text = report()
+    assert "summarize: 3 call(s)" in text
+    dump_report(str(tmp_path / "report.json"))
+    summary = json.loads((tmp_path / "report.json").read_text())
+    assert summary[0]["region"] == "summarize" and summary[0]["calls"] == 3
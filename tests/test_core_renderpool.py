@@ -0,0 +1,125 @@
+"""
+Tests for the multi-process render pool in app.core.renderpool.
+"""
+
+import os
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.renderpool import RenderError, RenderPool, split_cores
+from app.core.utils import available_cores
+
+# In a worker this module is imported while its factory is unpickled, before _worker_main runs.
+IMPORT_THREADS = os.environ.get("OMP_NUM_THREADS")
+
+
+# Factories run in spawned workers, so they live at module level.
+def solid_renderer():
+    def render(height=4, width=6, value=0, mode="solid", seconds=0.0):
+        if mode == "env":
+            cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+            return np.array([int(os.environ["OMP_NUM_THREADS"]), int(IMPORT_THREADS), *cores], dtype=np.int32)
+        if mode == "error":
+            raise ValueError("bad prompt")
+        if mode == "crash":
+            os._exit(3)
+        if mode == "busy":
+            end = time.process_time() + seconds
+            while time.process_time() < end:
+                pass
+        return np.full((height, width, 3), value, dtype=np.uint8)
+    return render
+
+
+def broken_factory():
+    raise RuntimeError("no weights")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = RenderPool(solid_renderer, workers=2)
+    pool.wait_ready(timeout=60)
+    yield pool
+    pool.close()
+
+
+def test_split_cores():
+    """Test cores are split into contiguous groups, and shared when there are too few."""
+    assert split_cores(range(8), 3) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert split_cores([4, 5], 2) == [[4], [5]]
+    assert split_cores([0], 3) == [[0], [0], [0]]
+
+
+def test_frames_come_back_through_shared_memory(pool):
+    """Test pixels arrive intact and the shared block is freed when the frame is closed."""
+    futures = [pool.submit(height=64, width=32, value=v) for v in range(6)]
+    for value, future in enumerate(futures):
+        with future.result(timeout=30) as frame:
+            assert frame.array.shape == (64, 32, 3) and frame.array.dtype == np.uint8
+            assert (frame.array == value).all()
+            name = frame._block.name
+        assert frame.array is None
+        if os.path.isdir("/dev/shm"):
+            assert not os.path.exists(f"/dev/shm/{name.lstrip('/')}")
+    stats = pool.stats()
+    assert stats["completed"] >= 6 and sum(w["jobs"] for w in stats["workers"]) == stats["completed"]
+
+
+def test_workers_are_pinned(pool):
+    """Test each worker runs on its own cores with native thread settings in place before its imports."""
+    for _ in range(4):
+        with pool.submit(mode="env").result(timeout=30) as frame:
+            threads, import_threads, *cores = frame.array.tolist()
+            assert threads == import_threads == len(pool.cores[frame.worker])
+            if hasattr(os, "sched_getaffinity"):
+                assert cores == pool.cores[frame.worker]
+    # Only the children's environment was changed.
+    assert os.environ.get("OMP_NUM_THREADS") == IMPORT_THREADS
+
+
+def test_errors_and_crashes(pool):
+    """Test a renderer error is re-raised and a dead worker fails its job and is replaced."""
+    with pytest.raises(ValueError, match="bad prompt"):
+        pool.submit(mode="error").result(timeout=30)
+    with pytest.raises(RenderError, match="exited"):
+        pool.submit(mode="crash").result(timeout=30)
+    pool.wait_ready(timeout=60)
+    with pool.submit(value=7).result(timeout=30) as frame:
+        assert (frame.array == 7).all()
+
+
+def test_broken_factory():
+    """Test a worker that cannot build its renderer is reported, not waited on forever."""
+    with RenderPool(broken_factory, workers=1) as broken:
+        with pytest.raises(RenderError, match="no weights"):
+            broken.wait_ready(timeout=60)
+        with pytest.raises(RenderError):
+            broken.submit()
+
+
+def test_save_encodes_in_the_parent(pool, tmp_path):
+    """Test the parent encodes a frame with PIL."""
+    Image = pytest.importorskip("PIL.Image")
+    with pool.submit(height=8, width=8, value=200).result(timeout=30) as frame:
+        frame.save(str(tmp_path / "out.png"))
+    with Image.open(tmp_path / "out.png") as image:
+        assert image.size == (8, 8) and image.getpixel((0, 0)) == (200, 200, 200)
+
+
+def _busy_seconds(pool, jobs=4, seconds=0.3):
+    start = time.perf_counter()
+    for future in [pool.submit(mode="busy", seconds=seconds) for _ in range(jobs)]:
+        future.result(timeout=30).close()
+    return time.perf_counter() - start
+
+
+@pytest.mark.skipif(len(available_cores()) < 2, reason="needs at least two cores")
+def test_throughput_scales_with_workers(pool):
+    """Test two pinned workers render CPU-bound jobs nearly twice as fast as one."""
+    with RenderPool(solid_renderer, workers=1, cores=pool.cores[0]) as single:
+        single.wait_ready(timeout=60)
+        one = _busy_seconds(single)
+    assert _busy_seconds(pool) < 0.75 * one
@@ -0,0 +1,147 @@
+"""
+Tests for the priority-aware CPU inference scheduler.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.core.scheduler import BULK, SHORT, InferenceScheduler
+
+
+@pytest.fixture
+def scheduler():
+    s = InferenceScheduler(total_threads=4, set_torch_threads=False)
+    s.register("summarizer", threads=2, priority=SHORT)
+    s.register("diffusion", threads=3, priority=BULK)
+    return s
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_register_caps_threads(scheduler):
+    """Test that a model never gets more threads than the budget."""
+    assert scheduler.register("huge", threads=64) == 4
+    assert scheduler.register("tiny", threads=0) == 1
+
+
+def test_budget_prevents_oversubscription(scheduler):
+    """Test that jobs only overlap while their threads fit in the budget."""
+    peak = {"threads": 0}
+    lock = threading.Lock()
+    in_use = {"threads": 0}
+
+    def job(model, threads):
+        with scheduler.slot(model):
+            with lock:
+                in_use["threads"] += threads
+                peak["threads"] = max(peak["threads"], in_use["threads"])
+            time.sleep(0.05)
+            with lock:
+                in_use["threads"] -= threads
+
+    threads = [_start(job, "summarizer", 2) for _ in range(2)] + [_start(job, "diffusion", 3) for _ in range(2)]
+    for t in threads:
+        t.join()
+    assert peak["threads"] <= 4
+    stats = scheduler.stats()
+    assert stats["free_threads"] == 4 and stats["running"] == 0
+    assert stats["models"]["summarizer"]["jobs"] == 2
+    assert stats["models"]["diffusion"]["jobs"] == 2
+
+
+def test_short_jobs_jump_queued_renders(scheduler):
+    """Test that a summary queued after renders starts before them."""
+    order = []
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("diffusion"):
+            release.wait(5)
+
+    def job(model, name):
+        with scheduler.slot(model):
+            order.append(name)
+
+    running = _start(blocker)
+    _wait_for(lambda: scheduler.stats()["running"] == 1)
+    queued = [_start(job, "diffusion", "render-1"), _start(job, "diffusion", "render-2")]
+    _wait_for(lambda: scheduler.stats()["waiting"] == 2)
+    queued.append(_start(job, "summarizer", "summary"))
+    _wait_for(lambda: scheduler.stats()["waiting"] == 3)
+    release.set()
+    for t in [running, *queued]:
+        t.join()
+    assert order[0] == "summary"
+    assert order[1:] == ["render-1", "render-2"]
+
+
+def test_wait_and_compute_are_reported_separately(scheduler):
+    """Test that queue wait and compute time are measured independently."""
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("diffusion"):
+            release.wait(5)
+
+    running = _start(blocker)
+    _wait_for(lambda: scheduler.stats()["running"] == 1)
+    threading.Timer(0.2, release.set).start()
+    with scheduler.slot("diffusion") as job:
+        time.sleep(0.05)
+    running.join()
+
+    assert job.wait_seconds >= 0.15
+    assert 0.04 <= job.compute_seconds < 0.15
+    assert job.queued_behind == 1
+    recent = scheduler.stats()["recent"][-1]
+    assert recent["model"] == "diffusion" and recent["wait_seconds"] == job.wait_seconds
+
+
+def test_priority_override_and_run(scheduler):
+    """Test run() returns the result and a per-call priority is used."""
+    assert scheduler.run("diffusion", lambda x: x * 2, 21, priority=SHORT) == 42
+    assert scheduler.stats()["recent"][-1]["priority"] == SHORT
+
+
+def test_failed_job_releases_its_threads(scheduler):
+    """Test that an exception inside a slot returns the threads to the budget."""
+    with pytest.raises(RuntimeError):
+        with scheduler.slot("diffusion"):
+            raise RuntimeError("render failed")
+    assert scheduler.stats()["free_threads"] == 4
+
+
+def test_slot_timeout_leaves_the_queue(scheduler):
+    """Test that a job still queued after its timeout raises and does not block later jobs."""
+    release = threading.Event()
+
+    def blocker():
+        with scheduler.slot("diffusion"):
+            release.wait(5)
+
+    running = _start(blocker)
+    _wait_for(lambda: scheduler.stats()["running"] == 1)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        with scheduler.slot("diffusion", timeout=0.1):
+            pass
+    assert 0.09 <= time.perf_counter() - start < 0.5
+    stats = scheduler.stats()
+    assert stats["waiting"] == 0 and stats["timeouts"] == 1
+    release.set()
+    running.join()
+    with scheduler.slot("diffusion", timeout=0.1):
+        pass
@@ -0,0 +1,73 @@
+"""
+Tests for the bulk mode of countries_example.py using the local fake chat model.
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langchain")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "langchain"))
+
+from countries_example import build_chain, bulk_lookup, read_names
+from app.llm.fake import FakeChatModel
+
+
+def _answer(prompt):
+    country = re.search(r"information about (.+?)\.", prompt).group(1)
+    if country == "Atlantis":
+        return "I don't know that country."
+    return json.dumps({"name": country, "capital": f"{country} City"})
+
+
+def _names(tmp_path, names):
+    path = tmp_path / "names.txt"
+    path.write_text("\n".join(names) + "\n\n")
+    return read_names(str(path))
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_bulk_lookup_resumes(tmp_path, suffix):
+    """Test bulk_lookup writes valid rows and only fetches missing names on rerun."""
+    chain = build_chain(FakeChatModel(reply_fn=_answer))
+    out = str(tmp_path / f"countries{suffix}")
+
+    stats = bulk_lookup(chain, _names(tmp_path, ["Chile", "Peru", "Atlantis", "Peru"]), out, concurrency=4)
+    assert stats == {"skipped": 0, "fetched": 2, "failed": 1}
+
+    stats = bulk_lookup(chain, _names(tmp_path, ["Chile", "Peru", "Atlantis", "Bolivia"]), out, concurrency=4)
+    assert stats == {"skipped": 2, "fetched": 1, "failed": 1}
+
+    text = Path(out).read_text()
+    assert "Bolivia City" in text
+    assert text.count("Chile City") == 1
+
+    # Only input rows count as skipped, not every row already in the output file.
+    stats = bulk_lookup(chain, _names(tmp_path, ["Chile"]), out, concurrency=4)
+    assert stats == {"skipped": 1, "fetched": 0, "failed": 0}
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_bulk_lookup_resumes_after_torn_write(tmp_path, suffix):
+    """Test a partial last row from a crash is cut off and its name fetched again."""
+    chain = build_chain(FakeChatModel(reply_fn=_answer))
+    out = tmp_path / f"countries{suffix}"
+    bulk_lookup(chain, ["Chile", "Peru"], str(out), concurrency=1)
+    complete = out.read_text()
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"query": "Bolivia", "na' if suffix == ".jsonl" else "Bolivia,Boliv")
+
+    stats = bulk_lookup(chain, ["Chile", "Peru", "Bolivia"], str(out), concurrency=1)
+    assert stats == {"skipped": 2, "fetched": 1, "failed": 0}
+    text = out.read_text()
+    assert text.startswith(complete)
+    new_rows = text[len(complete):].splitlines()
+    assert len(new_rows) == 1
+    if suffix == ".jsonl":
+        assert json.loads(new_rows[0])["capital"] == "Bolivia City"
+    else:
+        assert sorted(new_rows[0].split(",")) == ["Bolivia", "Bolivia", "Bolivia City"]
@@ -0,0 +1,101 @@
+"""
+Tests for the columnar DataPointSeries in pydantic_examples.py.
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "langchain"))
+
+from pydantic_examples import DataPoint, DataPointSeries
+
+
+def _points(n=6):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    return [DataPoint(timestamp=start + timedelta(minutes=i), value=i * 1.5, unit=["C", "F", "K"][i % 3])
+            for i in range(n)]
+
+
+def test_round_trips_match_per_object_path():
+    """Test records, dict and JSON conversions agree with DataPoint.to_dict/from_dict."""
+    points = _points()
+    series = DataPointSeries.from_points(points)
+
+    assert series.to_records() == [p.to_dict() for p in points]
+    assert DataPointSeries.from_records(series.to_records()).to_dict() == series.to_dict()
+    assert DataPointSeries.from_json(series.to_json()).to_records() == series.to_records()
+    assert list(series) == points
+    assert series.units == ("C", "F", "K")
+    assert series.unit_codes.tolist() == [0, 1, 2, 0, 1, 2]
+
+
+def test_single_unit_and_fractional_seconds():
+    """Test a scalar unit column and microsecond timestamps."""
+    series = DataPointSeries.from_columns(["2024-01-01T00:00:00.250000", "2024-01-01T00:00:01"], [1, 2], "m")
+    assert series.to_dict() == {
+        "time": ["2024-01-01T00:00:00.250000", "2024-01-01T00:00:01.000000"],
+        "value": [1.0, 2.0],
+        "unit": ["m", "m"],
+    }
+    assert series[0].timestamp == datetime(2024, 1, 1, 0, 0, 0, 250000)
+
+
+def test_timezone_aware_input_is_normalized_to_utc():
+    """Test offsets are converted to UTC rather than dropped."""
+    aware = datetime(2024, 1, 1, 1, 0, tzinfo=timezone(timedelta(hours=1)))
+    series = DataPointSeries.from_columns([aware, "2024-01-01T02:00:00+02:00"], [1.0, 2.0], "C")
+    assert series.to_dict()["time"] == ["2024-01-01T00:00:00", "2024-01-01T00:00:00"]
+
+
+def test_slices_are_zero_copy():
+    """Test basic slices share memory and rows are built on demand."""
+    series = DataPointSeries.from_points(_points(10))
+    window = series[2:8:2]
+    assert len(window) == 3
+    assert np.shares_memory(window.values, series.values)
+    assert np.shares_memory(window.timestamps, series.timestamps)
+    assert window[1] == series[4]
+
+    masked = series[series.values > 9]
+    assert [p.value for p in masked] == [10.5, 12.0, 13.5]
+
+
+def test_bulk_validation_errors():
+    """Test invalid columns are rejected for the whole series."""
+    with pytest.raises(ValueError):
+        DataPointSeries.from_columns(["2024-01-01", "not a date"], [1.0, 2.0], "C")
+    with pytest.raises(ValueError):
+        DataPointSeries.from_columns(["2024-01-01"], [1.0, 2.0], "C")
+    with pytest.raises(ValueError):
+        DataPointSeries.from_columns(["2024-01-01"], ["abc"], "C")
+    with pytest.raises(ValueError, match="unit code"):
+        DataPointSeries(np.array(["2024-01-01"], dtype="datetime64[us]"), [1.0], [3], ["C"])
+    with pytest.raises(ValueError, match="Missing timestamp"):
+        DataPointSeries.from_columns(["NaT"], [1.0], "C")
+
+
+def _instant(text):
+    t = datetime.fromisoformat(text)
+    return t if t.tzinfo is not None else t.replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("timestamp", [
+    1_700_000_000,
+    1_700_000_000.5,
+    datetime(2024, 1, 1, 1, 0, tzinfo=timezone(timedelta(hours=1))),
+    "2024-01-01T02:00:00+02:00",
+    "2024-01-01T00:00:00Z",
+    datetime(2024, 1, 1, 12, 30),
+    "2024-01-01T12:30:00",
+])
+def test_series_and_datapoint_agree(timestamp):
+    """Test epoch numbers, aware and naive inputs give the same instant as DataPoint."""
+    point = DataPoint(timestamp=timestamp, value=1.0, unit="C")
+    record = DataPointSeries.from_columns([timestamp], [1.0], "C").to_records()[0]
+    assert _instant(record["time"]) == _instant(point.to_dict()["time"])
+    if point.timestamp.tzinfo is None:
+        assert record == point.to_dict()
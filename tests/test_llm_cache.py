@@ -0,0 +1,105 @@
+"""
+Tests for the persistent SQLite LLM cache.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import HumanMessage
+
+from app.llm.cache import SQLiteLLMCache, cache_key
+from app.llm.fake import FakeChatModel
+
+
+def test_cache_key_ignores_message_ids():
+    """Test cache_key normalizes volatile message fields."""
+    from langchain_core.load import dumps
+
+    a = dumps([HumanMessage(content="hi", id="1")])
+    b = dumps([HumanMessage(content="hi", id="2")])
+    c = dumps([HumanMessage(content="hello", id="1")])
+    assert cache_key(a, "model") == cache_key(b, "model")
+    assert cache_key(a, "model") != cache_key(c, "model")
+    assert cache_key(a, "model") != cache_key(a, "other-model")
+
+
+def test_cache_hit_skips_model(tmp_path):
+    """Test a repeated prompt is answered from the cache."""
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    llm = FakeChatModel(latency=0.2, cache=cache)
+
+    first = llm.invoke([HumanMessage(content="hi", id="a")])
+    start = time.perf_counter()
+    second = llm.invoke([HumanMessage(content="hi", id="b")])
+    assert time.perf_counter() - start < 0.1
+    assert second.content == first.content
+    assert second.id != first.id or second.id is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A fresh process only has the on-disk copy.
+    reopened = FakeChatModel(latency=0.2, cache=SQLiteLLMCache(tmp_path / "cache.sqlite"))
+    assert reopened.invoke("hi").content == first.content
+    assert reopened.cache.hits == 1
+
+
+def test_cache_ttl_and_size_eviction(tmp_path):
+    """Test expired entries miss and eviction trims to max_entries."""
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite", ttl=0.05, max_entries=3)
+    llm = FakeChatModel(cache=cache)
+    llm.invoke("one")
+    time.sleep(0.1)
+    llm.invoke("one")
+    assert cache.hits == 0
+
+    cache.ttl = None
+    for i in range(6):
+        llm.invoke(f"prompt {i}")
+    cache.evict()
+    assert cache.count() == 3
+
+
+def test_cached_stream(tmp_path):
+    """Test cached_stream stores fully consumed streams and replays them."""
+    from app.llm.cache import cached_stream
+
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    llm = FakeChatModel(cache=cache)
+
+    stream = cached_stream(llm, "partial")
+    next(stream)
+    stream.close()
+    assert cache.count() == 0
+
+    chunks = list(cached_stream(llm, "full reply"))
+    assert len(chunks) > 1
+    replay = list(cached_stream(llm, "full reply"))
+    assert len(replay) == 1
+    assert replay[0].content == "".join(c.content for c in chunks)
+
+
+def test_parse_stream_over_cached_stream(tmp_path):
+    """Test a reply parsed with parse_stream is cached even though parsing stops at the closing brace."""
+    from pydantic import BaseModel
+
+    from app.llm.cache import cached_stream
+    from app.llm.streaming import parse_stream
+
+    class Capital(BaseModel):
+        name: str
+        capital: str
+
+    calls = []
+
+    def reply(prompt):
+        calls.append(prompt)
+        return '```json\n{"name": "Chile", "capital": "Santiago"}\n```\nHope this helps!'
+
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    llm = FakeChatModel(cache=cache, reply_fn=reply)
+    for _ in range(3):
+        assert parse_stream(cached_stream(llm, "Chile?"), Capital).capital == "Santiago"
+    assert len(calls) == 1
+    assert cache.count() == 1
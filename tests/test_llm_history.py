@@ -0,0 +1,88 @@
+"""
+Tests for conversation history policies and the SQLite session store.
+"""
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.llm.checkpoint import SQLiteSessionStore
+from app.llm.history import SUMMARY_PREFIX, RollingSummary, SlidingWindow, TokenBudget, parse_policy
+
+
+def _conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i}"})
+        messages.append(AIMessage(content=f"answer {i}"))
+    return messages
+
+
+def test_sliding_window():
+    """Test SlidingWindow keeps the newest messages."""
+    kept = SlidingWindow(3)(_conversation(5))
+    assert [m.content for m in kept] == ["answer 3", "question 4", "answer 4"]
+    assert isinstance(kept[1], HumanMessage)
+
+
+def test_token_budget():
+    """Test TokenBudget trims to the budget but keeps the last message."""
+    messages = _conversation(50)
+    kept = TokenBudget(40)(messages)
+    assert 0 < len(kept) < len(messages)
+    assert kept[-1].content == "answer 49"
+    assert TokenBudget(1)([{"role": "user", "content": "a long message " * 20}])
+
+
+def test_rolling_summary():
+    """Test RollingSummary folds older messages into one system message."""
+    policy = RollingSummary(FakeListChatModel(responses=["they talked"]), max_messages=6, keep_last=2)
+    short = _conversation(2)
+    assert len(policy(short)) == 4
+
+    kept = policy(_conversation(5))
+    assert len(kept) == 3
+    assert isinstance(kept[0], SystemMessage)
+    assert kept[0].content == SUMMARY_PREFIX + "they talked"
+
+
+def test_parse_policy():
+    """Test parse_policy builds policies from strings."""
+    assert parse_policy("window:5").max_messages == 5
+    assert parse_policy("tokens:100").max_tokens == 100
+    with pytest.raises(ValueError):
+        parse_policy("summary:10")
+    with pytest.raises(ValueError):
+        parse_policy("bogus")
+
+
+def test_parse_policy_small_summaries():
+    """Test tiny summary sizes keep at least one message or fail with a clear error."""
+    llm = FakeListChatModel(responses=["summary"])
+    assert parse_policy("summary:2", llm).keep_last == 1
+    assert parse_policy("summary:3", llm).keep_last == 1
+    assert parse_policy("summary:20", llm).keep_last == 6
+    with pytest.raises(ValueError, match="at least 2 messages"):
+        parse_policy("summary:1", llm)
+
+
+def test_session_store_roundtrip(tmp_path):
+    """Test SQLiteSessionStore appends incrementally and loads the tail."""
+    with SQLiteSessionStore(tmp_path / "sessions.db") as store:
+        assert store.append("a", _conversation(2)) == 4
+        assert store.append("a", [{"role": "user", "content": "more"}]) == 5
+        store.append("b", _conversation(1))
+
+        assert [m.content for m in store.load("a", limit=2)] == ["answer 1", "more"]
+        assert isinstance(store.load("a")[0], HumanMessage)
+        assert sorted(store.sessions()) == ["a", "b"]
+
+        assert store.prune("a", keep=2) == 3
+        assert store.count("a") == 2
+        assert store.append("a", [AIMessage(content="next")]) == 6
+
+        store.delete("b")
+        assert store.load("b") == []
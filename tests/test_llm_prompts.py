@@ -0,0 +1,91 @@
+"""
+Tests for the precompiled prompt registry.
+"""
+
+from typing import List
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field
+
+from app.llm.prompts import CompiledPrompt, PromptRegistry, format_instructions, json_schema, output_parser
+
+
+class Country(BaseModel):
+    capital: str = Field(description="capital of the country")
+    languages: List[str]
+
+
+def test_compiled_output_matches_langchain():
+    """Test that the fast path produces the same messages as ChatPromptTemplate."""
+    template = ChatPromptTemplate.from_messages([
+        ("system", "You answer questions about {kind}."),
+        ("human", "Tell me about {country}.\n{format_instructions}"),
+        ("ai", "Sure: {{literal braces}} for {country}"),
+    ])
+    prompt = CompiledPrompt(template, model=Country)
+    assert prompt._messages is not None
+    assert prompt.input_variables == {"kind", "country"}
+    expected = template.format_messages(kind="geography", country="France",
+                                        format_instructions=output_parser(Country).get_format_instructions())
+    assert prompt.format_messages(kind="geography", country="France") == expected
+
+
+def test_model_caches_are_shared():
+    """Test that parsers, format instructions and schemas are built once per model."""
+    assert output_parser(Country) is output_parser(Country)
+    assert format_instructions(Country) is format_instructions(Country)
+    assert json_schema(Country) is json_schema(Country)
+    assert '"capital"' in format_instructions(Country)
+
+
+def test_registry_compiles_once():
+    """Test that registering a name again returns the stored prompt unless replaced."""
+    registry = PromptRegistry()
+    first = registry.register("country", "About {country}. {format_instructions}", model=Country)
+    assert registry.register("country", "ignored {x}") is first
+    assert registry.get("country") is first
+    replaced = registry.register("country", "About {country}.", replace=True)
+    assert registry.get("country") is replaced
+    assert registry.names() == ["country"]
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_format_many():
+    """Test bulk formatting returns one message list per variable set, in order."""
+    prompt = PromptRegistry().register("c", "About {country}.")
+    assert prompt.format_many([{"country": "France"}, {"country": "Peru"}]) == [
+        [HumanMessage(content="About France.")],
+        [HumanMessage(content="About Peru.")],
+    ]
+    with pytest.raises(KeyError):
+        prompt.format_many([{"country": "France"}, {}])
+
+
+def test_missing_variable_raises_key_error():
+    """Test that a missing variable fails the same way on both paths."""
+    fast = PromptRegistry().register("c", "About {country}.")
+    slow = CompiledPrompt(ChatPromptTemplate.from_messages([
+        MessagesPlaceholder("history"), ("human", "About {country}."),
+    ]))
+    assert slow._messages is None
+    for prompt in (fast, slow):
+        with pytest.raises(KeyError):
+            prompt.format_messages()
+
+
+def test_unsupported_templates_fall_back_to_langchain():
+    """Test that placeholders and format specs are formatted by langchain."""
+    template = ChatPromptTemplate.from_messages([MessagesPlaceholder("history"), ("human", "{question}")])
+    prompt = CompiledPrompt(template)
+    history = [HumanMessage(content="earlier")]
+    assert prompt.format_messages(history=history, question="q") == template.format_messages(
+        history=history, question="q")
+
+    attribute = CompiledPrompt(ChatPromptTemplate.from_messages([("human", "{country.name}")]))
+    assert attribute._messages is None
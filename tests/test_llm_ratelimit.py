@@ -0,0 +1,150 @@
+"""
+Tests for the adaptive rate-limit controller.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from pydantic import BaseModel
+
+from app.llm.fake import FakeChatModel, ThrottlingFakeChatModel
+from app.llm.ratelimit import BATCH, INTERACTIVE, AdaptiveController, TokenBucket, limit_chat_model
+
+
+def test_token_bucket_refill():
+    """Test a drained bucket reports the time until it refills."""
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    assert bucket.wait_time(60, now) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0, abs=0.01)
+    assert bucket.wait_time(1, now + 1.0) == 0
+
+
+def test_request_budget_paces_calls():
+    """Test requests per minute are enforced once the burst is spent."""
+    controller = AdaptiveController(requests_per_minute=600)
+    controller.requests.tokens = 0
+    start = time.monotonic()
+    for _ in range(3):
+        controller.acquire()
+        controller.release(0.0)
+    assert time.monotonic() - start >= 0.25
+
+
+def test_aimd_adjusts_limit():
+    """Test success grows the window and 429s or slow calls halve it."""
+    controller = AdaptiveController(initial_concurrency=8, latency_threshold=1.0, cooldown=0)
+    controller.acquire()
+    controller.release(0.1)
+    assert controller.limit > 8
+    controller.acquire()
+    controller.release(0.1, throttled=True, retry_after=0)
+    assert controller.limit == pytest.approx(8 / 2 + 1 / 16)
+    before = controller.limit
+    controller.acquire()
+    controller.release(2.0)
+    assert controller.limit == pytest.approx(before / 2)
+    assert controller.stats["throttled"] == 1
+    assert controller.stats["decreases"] == 2
+
+
+def test_priority_lanes():
+    """Test waiting interactive calls are admitted before earlier batch calls."""
+    controller = AdaptiveController(initial_concurrency=1, max_concurrency=1)
+    controller.acquire()
+    order = []
+
+    def worker(priority, name):
+        controller.acquire(priority=priority)
+        order.append(name)
+        controller.release(0.0)
+
+    threads = [threading.Thread(target=worker, args=(BATCH, f"batch-{i}")) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    urgent = threading.Thread(target=worker, args=(INTERACTIVE, "interactive"))
+    urgent.start()
+    time.sleep(0.05)
+    controller.release(0.0)
+    for t in threads + [urgent]:
+        t.join(timeout=2)
+    assert order[0] == "interactive"
+    assert sorted(order[1:]) == ["batch-0", "batch-1", "batch-2"]
+
+
+def test_wrapper_recovers_from_429s():
+    """Test concurrent calls against a throttling model all succeed and the window shrinks."""
+    stub = ThrottlingFakeChatModel(max_concurrency=2, latency=0.02, retry_after=0.01)
+    controller = AdaptiveController(initial_concurrency=16, cooldown=0.05)
+    llm = limit_chat_model(stub, controller)
+
+    results = llm.batch([f"message {i}" for i in range(20)], config={"max_concurrency": 16})
+    assert [r.content for r in results] == [f"echo: message {i}" for i in range(20)]
+    assert stub.throttled > 0
+    assert controller.stats["throttled"] == stub.throttled
+    assert controller.limit < 16
+    assert controller.in_flight == 0
+
+
+def test_wrapper_async_and_structured_output():
+    """Test the async path and with_structured_output go through the controller."""
+
+    class Label(BaseModel):
+        label: str
+
+    stub = ThrottlingFakeChatModel(max_concurrency=3, latency=0.01, retry_after=0.01)
+    controller = AdaptiveController(initial_concurrency=12, cooldown=0.05)
+    llm = limit_chat_model(stub, controller)
+
+    async def run():
+        structured = llm.with_structured_output(Label)
+        return await asyncio.gather(*[structured.ainvoke(f"m{i}") for i in range(12)])
+
+    labels = asyncio.run(run())
+    assert all(isinstance(label, Label) for label in labels)
+    assert controller.stats["requests"] >= 12
+    assert stub.peak <= 3
+
+
+def test_wrapper_raises_other_errors():
+    """Test non-429 errors are not retried."""
+    calls = []
+
+    def reply(text):
+        calls.append(text)
+        raise ValueError("boom")
+
+    controller = AdaptiveController()
+    llm = limit_chat_model(FakeChatModel(reply_fn=reply), controller)
+    with pytest.raises(ValueError):
+        llm.invoke("hi")
+    assert len(calls) == 1
+    assert controller.stats["errors"] == 1
+    assert controller.in_flight == 0
+
+
+def test_cancelled_calls_free_their_slots():
+    """Test cancelling in-flight async calls releases them so later calls can run."""
+    controller = AdaptiveController(initial_concurrency=2, max_concurrency=2)
+    llm = limit_chat_model(FakeChatModel(latency=5.0), controller)
+    fast = limit_chat_model(FakeChatModel(), controller)
+
+    async def run():
+        calls = [asyncio.create_task(llm.ainvoke(f"m{i}")) for i in range(2)]
+        await asyncio.sleep(0.05)
+        assert controller.in_flight == 2
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        assert controller.in_flight == 0
+        return await asyncio.wait_for(fast.ainvoke("next"), timeout=2)
+
+    assert asyncio.run(run()).content == "echo: next"
+    assert controller.stats["cancelled"] == 2
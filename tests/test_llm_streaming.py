@@ -0,0 +1,94 @@
+"""
+Tests for the incremental streaming Pydantic parser.
+"""
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, Field
+
+from app.llm.streaming import StreamingPydanticParser, aparse_stream, parse_stream
+
+
+class Review(BaseModel):
+    score: int = Field(..., ge=1, le=10)
+    issues: List[str]
+    complexity: str
+
+
+def _chunks(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_fields_surface_as_they_complete():
+    """Test each field is reported once its value is complete."""
+    text = '```json\n{"score": 7, "issues": ["a, b", "c}"], "complexity": "Med\\"ium"}\n```'
+    parser = StreamingPydanticParser(Review)
+    seen = []
+    for chunk in _chunks(text):
+        seen.extend(name for name, _ in parser.feed(chunk))
+        if parser.done:
+            break
+    assert seen == ["score", "issues", "complexity"]
+    review = parser.finish()
+    assert review.issues == ["a, b", "c}"]
+    assert review.complexity == 'Med"ium'
+
+
+def test_parse_stream_aborts_on_violation():
+    """Test a schema violation stops consuming the stream."""
+    consumed = []
+
+    def stream():
+        for chunk in _chunks(json.dumps({"score": 42, "issues": ["x"] * 50, "complexity": "High"})):
+            consumed.append(chunk)
+            yield chunk
+
+    with pytest.raises(OutputParserException, match="score"):
+        parse_stream(stream(), Review)
+    assert len(consumed) < 10
+
+
+def test_parse_stream_incomplete_and_callbacks():
+    """Test on_field callbacks and the incomplete-output error."""
+    fields = {}
+    review = parse_stream(iter(['{"score": 3, "issues": [], ', '"complexity": "Low"}']), Review,
+                          on_field=fields.__setitem__)
+    assert review.score == 3
+    assert fields == {"score": 3, "issues": [], "complexity": "Low"}
+
+    with pytest.raises(OutputParserException, match="Incomplete"):
+        parse_stream(iter(['{"score": 3, "issues": []']), Review)
+
+
+def test_aparse_stream():
+    """Test the async variant."""
+    async def stream():
+        for chunk in _chunks('{"score": 5, "issues": ["y"], "complexity": "Low"}'):
+            yield chunk
+
+    review = asyncio.run(aparse_stream(stream(), Review))
+    assert review.issues == ["y"]
+
+
+def test_long_output_in_tiny_chunks():
+    """Test long values split across many chunks are reassembled, and errors carry the full text."""
+    text = json.dumps({"score": 7, "issues": [f"issue {i}" for i in range(2000)], "complexity": "x" * 20000})
+    parser = StreamingPydanticParser(Review)
+    for chunk in _chunks(text, size=2):
+        parser.feed(chunk)
+    review = parser.finish()
+    assert len(review.issues) == 2000 and review.complexity == "x" * 20000
+
+    parser, fed = StreamingPydanticParser(Review), []
+    with pytest.raises(OutputParserException) as info:
+        for chunk in _chunks('noise {"score": 99, "issues": []}', size=2):
+            fed.append(chunk)
+            parser.feed(chunk)
+    assert info.value.llm_output == "".join(fed)
@@ -0,0 +1,95 @@
+"""
+Tests for LangGraph span tracing.
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from app.llm.fake import FakeChatModel
+from app.llm.tracing import Aggregator, JsonlExporter, percentile, traced
+
+
+class State(TypedDict):
+    text: str
+    reply: str
+
+
+def _graph(flaky_failures=0):
+    llm = FakeChatModel()
+    calls = {"n": 0}
+
+    def flaky(text):
+        calls["n"] += 1
+        if calls["n"] <= flaky_failures:
+            raise RuntimeError("transient")
+        return text
+
+    cleaner = RunnableLambda(flaky).with_retry(stop_after_attempt=3, wait_exponential_jitter=False)
+
+    def clean(state: State):
+        return {"text": cleaner.invoke(state["text"])}
+
+    def answer(state: State):
+        return {"reply": llm.invoke(state["text"]).content}
+
+    builder = StateGraph(State)
+    builder.add_node("clean", clean)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "clean")
+    builder.add_edge("clean", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile()
+
+
+def test_percentile():
+    """Test percentile interpolation."""
+    assert percentile([], 50) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
+
+
+def test_traced_disabled_returns_graph(monkeypatch):
+    """Test traced is a no-op when tracing is off."""
+    monkeypatch.delenv("GRAPH_TRACE", raising=False)
+    graph = _graph()
+    assert traced(graph) is graph
+
+
+def test_spans_and_aggregator(tmp_path):
+    """Test spans cover graph, nodes and model calls with tokens and retries."""
+    spans = Aggregator()
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonlExporter(str(path))
+    graph = traced(_graph(flaky_failures=1), spans, exporter)
+
+    graph.invoke({"text": "hello"})
+    graph.invoke({"text": "again"})
+    exporter.close()
+
+    summary = spans.summary()
+    assert summary["graph/"]["count"] == 2
+    assert summary["node/clean"]["retries"] == 1
+    assert summary["llm/answer"]["input_tokens"] > 0
+    assert summary["node/answer"]["p99_ms"] >= summary["node/answer"]["p50_ms"]
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    graph_span = next(r for r in rows if r["kind"] == "graph")
+    llm_span = next(r for r in rows if r["kind"] == "llm" and r["trace_id"] == graph_span["trace_id"])
+    node_span = next(r for r in rows if r["span_id"] == llm_span["parent_id"])
+    assert node_span["name"] == "answer"
+    assert node_span["parent_id"] == graph_span["span_id"]
+
+
+def test_traced_from_environment(tmp_path, monkeypatch):
+    """Test $GRAPH_TRACE enables JSONL export."""
+    path = tmp_path / "env.jsonl"
+    monkeypatch.setenv("GRAPH_TRACE", str(path))
+    traced(_graph()).invoke({"text": "hi"})
+    assert any(json.loads(line)["kind"] == "node" for line in path.read_text().splitlines())
@@ -0,0 +1,180 @@
+"""
+Tests for the briefing's article fetch stage, against a local static-file server.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "news"))
+
+from articles import ArticleFetcher, FetchResult, TextExtractor, extract_text, source_text
+
+BODY = "The committee published its findings on Tuesday after a two year review of the program."
+PAGE = f"""<!doctype html>
+<html><head><title>t</title><style>p {{ color: red }}</style><script>var x = "{'no ' * 30}";</script></head>
+<body>
+<nav><ul><li>Home and a very long navigation entry that should not appear</li></ul></nav>
+<p>Site-wide banner text that is long enough to count as a paragraph.</p>
+<article>
+  <h1>Short</h1>
+  <p>{BODY}</p>
+  <p>Second paragraph with &amp; an entity and <b>inline markup</b> that continues the story.</p>
+  <aside>Related: something else entirely, which is long enough to be a paragraph.</aside>
+</article>
+<footer>Copyright notice that is also long enough to be counted as text.</footer>
+</body></html>
+"""
+
+
+class Handler(SimpleHTTPRequestHandler):
+    """Static files with an ETag; ``/slow/<seconds>/...`` serves the story after a delay."""
+
+    requests_seen = []
+    active = {}
+    max_active = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        key = self.path
+        with self.lock:
+            self.requests_seen.append((key, self.headers.get("If-None-Match")))
+            self.active[key] = self.active.get(key, 0) + 1
+            self.max_active["all"] = max(self.max_active.get("all", 0), sum(self.active.values()))
+        try:
+            if self.path.startswith("/slow/"):
+                time.sleep(float(self.path.split("/")[2]))
+                self.path = "/story.html"
+            path = self.translate_path(self.path)
+            if os.path.isfile(path):
+                etag = f'"{os.stat(path).st_mtime_ns}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                with open(path, "rb") as f:
+                    data = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", self.guess_type(path))
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            super().do_GET()
+        finally:
+            with self.lock:
+                self.active[key] = self.active.get(key, 1) - 1
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "story.html").write_text(PAGE, encoding="utf-8")
+    (tmp_path / "big.html").write_text("<p>" + "x" * 200_000 + "</p>", encoding="utf-8")
+    (tmp_path / "data.bin").write_bytes(b"\0" * 100)
+    for i in range(20):
+        (tmp_path / f"a{i}.html").write_text(PAGE.replace("Tuesday", f"day {i}"), encoding="utf-8")
+    Handler.requests_seen, Handler.active, Handler.max_active = [], {}, {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", tmp_path
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = ArticleFetcher(max_workers=8, per_domain=4, timeout=2.0)
+    yield fetcher
+    fetcher.close()
+
+
+def test_extractor_prefers_article_text():
+    """Test that the main text is extracted and page chrome is dropped."""
+    text = extract_text(PAGE)
+    assert text.splitlines()[0] == BODY
+    assert "an entity and inline markup" in text
+    for junk in ("banner", "navigation", "Related", "Copyright", "no no", "color"):
+        assert junk not in text
+
+
+def test_extractor_streams_and_stops_early():
+    """Test that chunked feeding gives the same text and reports when it has enough."""
+    extractor = TextExtractor()
+    for i in range(0, len(PAGE), 7):
+        extractor.feed(PAGE[i:i + 7])
+    extractor.close()
+    assert extractor.text() == extract_text(PAGE)
+
+    extractor = TextExtractor(max_chars=100)
+    extractor.feed("<article>" + f"<p>{BODY}</p>" * 3)
+    assert extractor.done
+    assert len(extractor.text()) <= 100
+
+
+def test_fetch_and_revalidate_with_etag(site, fetcher):
+    """Test that a second fetch sends If-None-Match and reuses the cached text on 304."""
+    base, _ = site
+    first = fetcher.fetch(f"{base}/story.html")
+    assert first.error is None and first.text.startswith(BODY) and not first.cached
+    second = fetcher.fetch(f"{base}/story.html")
+    assert second.status == 304 and second.cached and second.text == first.text
+    assert Handler.requests_seen[1][1] is not None
+    assert fetcher.stats()["not_modified"] == 1
+
+
+def test_limits_and_failures(site):
+    """Test size limits, content types, HTTP errors and timeouts become errors, not exceptions."""
+    base, _ = site
+    fetcher = ArticleFetcher(timeout=0.5, max_bytes=100_000)
+    try:
+        assert "bytes" in fetcher.fetch(f"{base}/big.html").error
+        assert "not a text page" in fetcher.fetch(f"{base}/data.bin").error
+        assert fetcher.fetch(f"{base}/missing.html").error
+        slow = fetcher.fetch(f"{base}/slow/2/x")
+        assert slow.error and slow.seconds < 1.5
+    finally:
+        fetcher.close()
+
+
+def test_fetch_many_is_concurrent_and_ordered(site, fetcher):
+    """Test that 20 slow pages take about one page's time, in input order, within the domain cap."""
+    base, _ = site
+    urls = [f"{base}/slow/0.2/{i}" for i in range(8)] + [f"{base}/a{i}.html" for i in range(20)] + [None]
+    start = time.perf_counter()
+    results = fetcher.fetch_many(urls)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0  # 8 x 0.2s serially, 4 at a time in parallel
+    assert Handler.max_active["all"] <= 4
+    assert [r.url for r in results[:-1]] == urls[:-1]
+    assert all(r.text and r.text.startswith(BODY) for r in results[:8])
+    assert "day 7" in results[8 + 7].text
+    assert results[-1].error
+
+
+def test_fetch_many_budget(site, fetcher):
+    """Test that pages still loading when the budget runs out come back as timed out."""
+    base, _ = site
+    start = time.perf_counter()
+    results = fetcher.fetch_many([f"{base}/story.html", f"{base}/slow/1.5/x"], budget=0.3)
+    assert time.perf_counter() - start < 1.0
+    assert results[0].text and results[1].error
+
+
+def test_source_text_falls_back_to_snippet():
+    """Test that the NewsAPI snippet is used when the page gave nothing better."""
+    article = {"title": "T", "description": "D", "content": "Short snippet [+1234 chars]"}
+    assert source_text(FetchResult("u", text=BODY), article) == (BODY, None)
+    assert source_text(FetchResult("u", error="timed out"), article) == (article["content"], "snippet")
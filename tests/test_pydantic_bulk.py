@@ -0,0 +1,88 @@
+"""
+Tests for bulk JSON/JSONL validation of the example Pydantic models.
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "langchain"))
+
+from pydantic_bulk import benchmark, iter_jsonl, list_adapter, load_jsonl, sample_rows, validate_json_array
+from pydantic_examples import Company, Product, User
+
+
+def test_adapter_is_cached():
+    """Test the list adapter is built once per model."""
+    assert list_adapter(User) is list_adapter(User)
+
+
+def test_json_array_collects_row_errors():
+    """Test invalid rows are reported while valid rows are still returned."""
+    rows = sample_rows(Product, 10)
+    rows[3]["name"] = "not title case"
+    rows[7]["tags"] = ["a", "a"]
+    result = validate_json_array(Product, json.dumps(rows))
+
+    assert result.rows == [0, 1, 2, 4, 5, 6, 8, 9]
+    assert [p.name for p in result.items] == [rows[i]["name"] for i in result.rows]
+    assert [e.row for e in result.errors] == [3, 7]
+    assert result.errors[0].errors[0]["loc"] == ("name",)
+    assert "Tags must be unique" in result.errors[1].errors[0]["msg"]
+
+
+def test_json_array_rejects_non_arrays():
+    """Test a document that is not an array fails as a whole."""
+    with pytest.raises(ValidationError):
+        validate_json_array(User, b'{"name": "A"}')
+
+
+def test_jsonl_chunks_keep_row_numbers():
+    """Test JSONL is validated in chunks with global row numbers, including broken lines."""
+    rows = sample_rows(Company, 25)
+    lines = [json.dumps(r) for r in rows]
+    lines[4] = '{"name": "Truncated'
+    lines[17] = json.dumps({**rows[17], "founded_year": 1200})
+    stream = io.BytesIO(("\n".join(lines[:10]) + "\n\n" + "\n".join(lines[10:]) + "\n").encode("utf-8"))
+
+    chunks = list(iter_jsonl(Company, stream, chunk_size=10))
+    assert len(chunks) == 3
+    assert [e.row for c in chunks for e in c.errors] == [4, 17]
+    assert [r for c in chunks for r in c.rows] == [i for i in range(25) if i not in (4, 17)]
+    assert chunks[2].items[0].address.city == "Springfield"
+
+
+def test_jsonl_line_with_two_objects_is_one_bad_row():
+    """Test a line holding two objects is a single invalid row and later rows keep their numbers."""
+    rows = sample_rows(User, 9)
+    lines = [json.dumps(r) for r in rows]
+    for i in (2, 4):  # the second is in a chunk validated after errors were seen
+        lines[i] = json.dumps(rows[i]) + ", " + json.dumps(rows[i])
+
+    chunks = list(iter_jsonl(User, io.StringIO("\n".join(lines)), chunk_size=3))
+    assert [e.row for c in chunks for e in c.errors] == [2, 4]
+    assert [r for c in chunks for r in c.rows] == [0, 1, 3, 5, 6, 7, 8]
+    assert [u for c in chunks for u in c.items][3] == User(**rows[5])
+
+
+def test_load_jsonl(tmp_path):
+    """Test loading a whole file matches the per-object models."""
+    path = tmp_path / "users.jsonl"
+    rows = sample_rows(User, 50, invalid_every=10)
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+    result = load_jsonl(User, str(path), chunk_size=16)
+    assert len(result.items) == 45
+    assert [e.row for e in result.errors] == [9, 19, 29, 39, 49]
+    assert result.items[0] == User(**rows[0])
+
+
+def test_benchmark_runs():
+    """Test the benchmark agrees with the per-object path on a small input."""
+    results = benchmark(rows=200, chunk_size=50, invalid_every=20)
+    assert [r["model"] for r in results] == ["User", "Company", "Product"]
+    assert all(r["errors"] == 10 for r in results)
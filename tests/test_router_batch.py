@@ -0,0 +1,104 @@
+"""
+End-to-end tests for the router batch CLI using the local fake chat model.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "langgraph"))
+
+from router_batch import main, run_batch
+from router import build_graph
+from app.llm.fake import FakeChatModel
+
+
+def _write_input(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"m{i}", "message": f"message number {i}"}) + "\n")
+        f.write("\n")
+        f.write(json.dumps({"id": "bad"}) + "\n")
+
+
+def _read_output(path):
+    return [json.loads(line) for line in open(path)]
+
+
+def test_run_batch_routes_every_line(tmp_path):
+    """Test run_batch writes one result per input line."""
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 30)
+
+    stats = run_batch(build_graph(FakeChatModel()), str(src), str(out), workers=4)
+    assert stats == {"skipped": 0, "routed": 30, "errors": 1}
+
+    rows = _read_output(out)
+    assert len(rows) == 31
+    by_id = {r["id"]: r for r in rows}
+    assert by_id["m3"]["message_type"] in ("emotional", "logical")
+    assert by_id["m3"]["reply"] == "echo: message number 3"
+    assert by_id["bad"]["error"] == "missing message field"
+
+
+def test_run_batch_resumes_after_crash(tmp_path):
+    """Test a rerun skips finished lines and repairs a torn last line."""
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 10)
+    run_batch(build_graph(FakeChatModel()), str(src), str(out), workers=2)
+
+    lines = out.read_text().splitlines(keepends=True)
+    out.write_text("".join(lines[:4]) + lines[4][:10])
+
+    stats = run_batch(build_graph(FakeChatModel()), str(src), str(out), workers=2)
+    assert stats["skipped"] == 4
+    assert stats["routed"] + stats["errors"] == 7
+
+    rows = _read_output(out)
+    assert sorted(r["line"] for r in rows) == [*range(10), 11]
+
+
+def test_malformed_line_gets_an_error_row(tmp_path):
+    """Test a line that is not JSON is reported in place instead of stopping the batch."""
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 3)
+    with open(src, "a") as f:
+        f.write("{not json\n[1, 2]\n")
+
+    stats = run_batch(build_graph(FakeChatModel()), str(src), str(out), workers=2)
+    assert stats == {"skipped": 0, "routed": 3, "errors": 3}
+    by_line = {r["line"]: r for r in _read_output(out)}
+    assert by_line[5]["error"].startswith("invalid JSON")
+    assert by_line[6]["error"].startswith("invalid JSON")
+
+    # Input errors are permanent, so a rerun skips them.
+    assert run_batch(build_graph(FakeChatModel()), str(src), str(out), workers=2)["skipped"] == 6
+
+
+def test_transient_errors_are_retried_on_resume(tmp_path):
+    """Test rows that failed with an exception are routed again, input errors are not."""
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 3)
+    out.write_text(
+        json.dumps({"line": 0, "id": "m0", "message_type": None, "reply": None, "error": "RateLimitError: 429"}) + "\n"
+        + json.dumps({"line": 1, "id": "m1", "message_type": "logical", "reply": "ok", "error": None}) + "\n"
+        + json.dumps({"line": 4, "id": "bad", "message_type": None, "reply": None,
+                      "error": "missing message field"}) + "\n"
+    )
+
+    stats = run_batch(build_graph(FakeChatModel()), str(src), str(out), workers=2)
+    assert stats == {"skipped": 2, "routed": 2, "errors": 0}
+    rows = [r for r in _read_output(out) if r["line"] == 0]
+    assert rows[-1]["error"] is None
+
+
+def test_main_with_fake_model(tmp_path, capsys):
+    """Test the CLI entry point with --fake."""
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, 3)
+    main([str(src), str(out), "--fake", "--workers", "2"])
+    assert "routed=3 errors=1 skipped=0" in capsys.readouterr().out
@@ -0,0 +1,143 @@
+"""
+Tests for the multi-session router service using the local fake chat model.
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("langgraph")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "langgraph"))
+
+from fastapi.testclient import TestClient
+
+from router import build_graph
+from router_loadtest import run
+from router_service import Overloaded, SessionManager, TurnLimiter, create_app, make_llm
+from app.llm.checkpoint import SQLiteSessionStore
+from app.llm.history import SlidingWindow
+
+
+def test_sessions_are_isolated(tmp_path):
+    """Test each session keeps its own bounded history and persists turns."""
+    store = SQLiteSessionStore(tmp_path / "sessions.db")
+    sessions = SessionManager(history=SlidingWindow(3), store=store)
+    client = TestClient(create_app(build_graph(make_llm(fake=True)), sessions=sessions))
+
+    for i in range(3):
+        r = client.post("/sessions/alice/messages", json={"content": f"alice {i}"})
+        assert r.status_code == 200
+    r = client.post("/sessions/bob/messages", json={"content": "bob 0"})
+    assert r.json()["reply"] == "echo: bob 0"
+
+    assert len(sessions.get("alice").messages) == 4
+    assert [m.content for m in sessions.get("bob").messages] == ["bob 0", "echo: bob 0"]
+    assert store.count("alice") == 6
+    assert client.get("/health").json()["sessions"] == 2
+
+
+def test_session_load_runs_off_the_event_loop():
+    """Test a session missing from memory is loaded in a worker thread, once."""
+    class Store:
+        def __init__(self):
+            self.threads = []
+
+        def load(self, session_id, limit=None):
+            self.threads.append(threading.current_thread())
+            return [{"role": "user", "content": f"{session_id} earlier"}]
+
+    store = Store()
+    sessions = SessionManager(store=store)
+
+    async def scenario():
+        first = await sessions.aget("dave")
+        assert await sessions.aget("dave") is first
+        return first
+
+    session = asyncio.run(scenario())
+    assert session.messages[0].content == "dave earlier"
+    assert len(store.threads) == 1 and store.threads[0] is not threading.main_thread()
+
+
+def test_websocket_turns():
+    """Test the WebSocket endpoint answers every message."""
+    client = TestClient(create_app(build_graph(make_llm(fake=True))))
+    with client.websocket_connect("/ws/carol") as ws:
+        ws.send_text("hello")
+        assert ws.receive_json()["reply"] == "echo: hello"
+        ws.send_text("again")
+        assert ws.receive_json()["message_type"] in ("emotional", "logical")
+
+
+def test_turn_limiter_rejects_when_full():
+    """Test backpressure once in-flight and queued turns are exhausted."""
+    async def scenario():
+        limiter = TurnLimiter(max_in_flight=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter:
+                await release.wait()
+
+        first = asyncio.create_task(hold())
+        second = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        assert (limiter.in_flight, limiter.queued) == (1, 1)
+        with pytest.raises(Overloaded):
+            async with limiter:
+                pass
+        release.set()
+        await asyncio.gather(first, second)
+        assert limiter.rejected == 1
+
+    asyncio.run(scenario())
+
+
+def test_session_lock_waiters_count_as_queued():
+    """Test turns waiting on a busy session are bounded by max_queued even with free slots."""
+    async def scenario():
+        limiter = TurnLimiter(max_in_flight=4, max_queued=1)
+        lock = asyncio.Lock()
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.turn(lock):
+                await release.wait()
+
+        first = asyncio.create_task(hold())
+        second = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        assert (limiter.in_flight, limiter.queued) == (1, 1)
+        with pytest.raises(Overloaded):
+            async with limiter.turn(lock):
+                pass
+        release.set()
+        await asyncio.gather(first, second)
+        assert (limiter.in_flight, limiter.queued, lock.locked()) == (0, 0, False)
+
+    asyncio.run(scenario())
+
+
+def test_open_session_is_not_evicted():
+    """Test a session with a pending turn stays the same object while others are added."""
+    sessions = SessionManager(max_sessions=1)
+
+    async def scenario():
+        async with sessions.open("erin") as session:
+            await sessions.aget("frank")
+            assert await sessions.aget("erin") is session
+        await sessions.aget("grace")
+        assert len(sessions) == 1
+
+    asyncio.run(scenario())
+
+
+def test_throughput_scales_with_concurrency():
+    """Test concurrent sessions overlap model latency in one process."""
+    single, parallel = run([1, 8], turns=3, latency=0.05)
+    assert parallel["turns_per_s"] > 3 * single["turns_per_s"]
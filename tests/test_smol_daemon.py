@@ -0,0 +1,191 @@
+"""
+Tests for the smol agent daemon and its thin client, using a stand-in runner instead of a model.
+"""
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "smol"))
+
+import daemon
+from daemon import AgentDaemon, DaemonError
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are limited to ~100 bytes, so avoid pytest's long tmp_path.
+    directory = tempfile.mkdtemp(prefix="smol")
+    yield os.path.join(directory, "agent.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class EchoAgent:
+    """Counts loads and concurrent runs; answers with the prompt and cwd."""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.loads = 0
+        self.active = 0
+        self.max_active = 0
+        self.delay = delay
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def factory(self):
+        self.loads += 1
+        return self.run
+
+    def run(self, prompt, cwd):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if prompt == self.fail_on:
+                raise ValueError("tool blew up")
+            return f"{prompt} @ {cwd}"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def serve(socket_path):
+    daemons = []
+
+    def start(agent):
+        d = AgentDaemon(agent.factory, socket_path)
+        d.serve_in_thread()
+        daemons.append(d)
+        return d
+
+    yield start
+    for d in daemons:
+        d.stop()
+
+
+def test_model_loads_once(serve, socket_path, tmp_path):
+    """Test that many prompts share one load and carry the client's cwd."""
+    agent = EchoAgent()
+    serve(agent)
+    answers = [daemon.ask(f"task {i}", cwd=str(tmp_path), socket_path=socket_path) for i in range(3)]
+    assert answers == [f"task {i} @ {tmp_path}" for i in range(3)]
+    assert agent.loads == 1
+    stats = daemon.ping(socket_path)
+    assert stats["runs"] == 3 and stats["loaded"] and stats["pid"] == os.getpid()
+    assert os.stat(socket_path).st_mode & 0o777 == 0o600
+
+
+def test_run_error_keeps_daemon_alive(serve, socket_path):
+    """Test that a failing run is reported to the client and the daemon keeps serving."""
+    serve(EchoAgent(fail_on="boom"))
+    with pytest.raises(DaemonError, match="tool blew up"):
+        daemon.ask("boom", socket_path=socket_path)
+    assert daemon.ask("ok", cwd="/", socket_path=socket_path) == "ok @ /"
+
+
+def test_runs_are_serialized_but_ping_is_not(serve, socket_path):
+    """Test that concurrent prompts run one at a time while pings answer immediately."""
+    agent = EchoAgent(delay=0.2)
+    serve(agent)
+    threads = [threading.Thread(target=daemon.ask, args=(f"p{i}",), kwargs={"socket_path": socket_path})
+               for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    assert daemon.ping(socket_path)["busy"]
+    assert time.perf_counter() - start < 0.15
+    for t in threads:
+        t.join()
+    assert agent.max_active == 1
+
+
+def test_slow_load_answers_pings_and_queues_runs(serve, socket_path):
+    """Test that the socket is up while the model loads and runs wait for it."""
+    loaded = threading.Event()
+    agent = EchoAgent()
+
+    def slow_factory():
+        loaded.wait(5)
+        return agent.run
+
+    d = AgentDaemon(slow_factory, socket_path)
+    d.serve_in_thread()
+    try:
+        assert daemon.ping(socket_path)["loaded"] is False
+        threading.Timer(0.1, loaded.set).start()
+        assert daemon.ask("hi", cwd="/", socket_path=socket_path) == "hi @ /"
+    finally:
+        d.stop()
+
+
+def test_load_failure_is_reported(socket_path):
+    """Test that serve_forever re-raises a load failure and removes the socket."""
+    def broken():
+        raise RuntimeError("no weights")
+
+    with pytest.raises(RuntimeError, match="no weights"):
+        AgentDaemon(broken, socket_path).serve_forever()
+    assert not os.path.exists(socket_path)
+
+
+def test_stale_socket_is_replaced_and_live_one_is_not(serve, socket_path):
+    """Test that a leftover socket file is reused but a running daemon is not clobbered."""
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(socket_path)
+    stale.close()
+    serve(EchoAgent())
+    assert daemon.ping(socket_path) is not None
+    with pytest.raises(RuntimeError, match="already listening"):
+        AgentDaemon(EchoAgent().factory, socket_path).start()
+
+
+def test_client_cli(serve, socket_path, capsys):
+    """Test the ask/status/stop client commands."""
+    assert daemon.main(["--socket", socket_path, "status"]) == 1
+    assert daemon.main(["--socket", socket_path, "ask", "hello"]) == 1
+    assert "no daemon" in capsys.readouterr().err
+
+    serve(EchoAgent())
+    assert daemon.main(["--socket", socket_path, "ask", "hello", "there"]) == 0
+    assert capsys.readouterr().out.startswith("hello there @ ")
+    assert daemon.main(["--socket", socket_path, "status"]) == 0
+    assert daemon.main(["--socket", socket_path, "stop"]) == 0
+    for _ in range(50):
+        if daemon.ping(socket_path) is None:
+            break
+        time.sleep(0.02)
+    assert daemon.ping(socket_path) is None
+
+
+def test_foreign_socket_is_refused(serve, socket_path, monkeypatch):
+    """Test that clients and the daemon refuse a socket owned by another user."""
+    serve(EchoAgent())
+    monkeypatch.setattr(daemon.os, "getuid", lambda: os.stat(socket_path).st_uid + 1)
+    assert daemon.ping(socket_path) is None
+    with pytest.raises(PermissionError):
+        daemon.ask("hi", socket_path=socket_path)
+    with pytest.raises(PermissionError):
+        AgentDaemon(EchoAgent().factory, socket_path).start()
+    assert os.path.exists(socket_path)
+
+
+def test_default_socket_in_private_dir(tmp_path, monkeypatch):
+    """Test the fallback socket lives in a 0700 directory and a shared one is rejected."""
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(daemon.tempfile, "tempdir", str(tmp_path))
+    path = daemon.default_socket_path()
+    assert os.path.dirname(path) == str(tmp_path / f"smol-agent-{os.getuid()}")
+    assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+
+    os.chmod(os.path.dirname(path), 0o777)
+    with pytest.raises(PermissionError):
+        daemon.default_socket_path()
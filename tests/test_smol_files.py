@@ -0,0 +1,163 @@
+"""
+Tests for the smol agent's file tools: ranged reads, grep, caching and atomic writes.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "smol"))
+
+import files
+from files import FileCache, grep_file, read_file, write_file
+from shell import ShellSession
+
+
+@pytest.fixture
+def cache():
+    return FileCache()
+
+
+@pytest.fixture
+def numbered(tmp_path):
+    path = tmp_path / "numbered.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+    return path
+
+
+def test_read_range(numbered, cache):
+    """Test that a line range comes back numbered, with a note when more remains."""
+    assert read_file(str(numbered), 10, 12, cache=cache).splitlines() == [
+        "    10\tline 10", "    11\tline 11", "    12\tline 12",
+    ]
+    capped = read_file(str(numbered), 990, max_lines=5, cache=cache).splitlines()
+    assert capped[-1] == "[lines 990-994 of 1000; read from line 995 for more]"
+    assert read_file(str(numbered), 999, cache=cache).splitlines()[-1] == "  1000\tline 1000"
+    assert read_file(str(numbered), 2000, cache=cache) == "[file has 1000 lines]"
+
+
+def test_read_edge_cases(tmp_path, cache):
+    """Test empty files, a missing trailing newline, CRLF and binary files."""
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    assert read_file(str(empty), cache=cache) == "[file has 0 lines]"
+    ragged = tmp_path / "ragged"
+    ragged.write_bytes(b"a\r\nb")
+    assert read_file(str(ragged), cache=cache) == "     1\ta\n     2\tb"
+    binary = tmp_path / "blob"
+    binary.write_bytes(b"\x00\x01" * 10)
+    assert read_file(str(binary), cache=cache) == "[binary file, 20 bytes]"
+
+
+def test_cache_hits_and_invalidation(numbered, cache):
+    """Test that unchanged files are served from cache and edits are picked up."""
+    first = read_file(str(numbered), 1, 3, cache=cache)
+    assert read_file(str(numbered), 1, 3, cache=cache) == first
+    assert cache.stats()["hits"] == 1
+
+    # An edit from outside the tools, with the same size, still invalidates.
+    with open(numbered, "r+") as f:
+        f.write("LINE")
+    os.utime(numbered, ns=(0, os.stat(numbered).st_mtime_ns + 1_000_000))
+    assert read_file(str(numbered), 1, 1, cache=cache) == "     1\tLINE 1"
+
+    write_file(str(numbered), "fresh\n", cache=cache)
+    assert read_file(str(numbered), 1, 3, cache=cache) == "     1\tfresh"
+
+
+def test_cache_is_bounded(tmp_path):
+    """Test that the cache evicts least recently used files past its byte budget."""
+    cache = FileCache(max_bytes=4096)
+    for i in range(10):
+        path = tmp_path / f"f{i}.txt"
+        path.write_text("x" * 1000 + "\n")
+        read_file(str(path), cache=cache)
+    assert cache.stats()["bytes"] <= 4096
+    assert cache.stats()["files"] < 10
+
+
+def test_grep_with_context(numbered, cache):
+    """Test grep output with merged context windows and a match cap."""
+    out = grep_file(str(numbered), r"^line (5|7|500)$", context=1, cache=cache).splitlines()
+    assert out == [
+        "4-line 4", "5:line 5", "6-line 6", "7:line 7", "8-line 8", "--",
+        "499-line 499", "500:line 500", "501-line 501",
+    ]
+    capped = grep_file(str(numbered), "line", max_matches=2, cache=cache).splitlines()
+    assert capped == ["1:line 1", "2:line 2", "[stopped after 2 matching lines]"]
+    assert grep_file(str(numbered), "nope", cache=cache) == "[no matches]"
+    assert grep_file(str(numbered), "LINE 1$", ignore_case=True, cache=cache) == "1:line 1"
+
+
+def test_write_is_atomic_and_keeps_mode(tmp_path, cache):
+    """Test that writes create parents, keep permissions and leave no temp files."""
+    path = tmp_path / "deep" / "dir" / "out.sh"
+    assert write_file(str(path), "héllo\n", cache=cache) == len("héllo\n".encode())
+    assert path.read_text(encoding="utf-8") == "héllo\n"
+
+    path.chmod(0o755)
+    write_file(str(path), "echo hi\n", cache=cache)
+    assert path.stat().st_mode & 0o777 == 0o755
+    assert os.listdir(path.parent) == ["out.sh"]
+
+
+def test_write_through_symlink_replaces_target(tmp_path, cache):
+    """Test that writing to a symlink updates its target and keeps the link."""
+    target = tmp_path / "real.txt"
+    target.write_text("old\n")
+    target.chmod(0o640)
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    write_file(str(link), "new\n", cache=cache)
+    assert link.is_symlink()
+    assert target.read_text() == "new\n"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert sorted(os.listdir(tmp_path)) == ["link.txt", "real.txt"]
+
+
+def test_write_does_not_touch_umask(tmp_path, cache, monkeypatch):
+    """Test that new files get the default mode without changing the process umask."""
+    def no_umask(mask):
+        raise AssertionError("os.umask called while tools may be running")
+
+    monkeypatch.setattr(files.os, "umask", no_umask)
+    path = tmp_path / "new.txt"
+    write_file(str(path), "x", cache=cache)
+    assert path.stat().st_mode & 0o777 == 0o666 & ~files._UMASK
+
+
+def test_failed_write_leaves_original(tmp_path, cache, monkeypatch):
+    """Test that a failure before the rename keeps the old contents and cleans up."""
+    path = tmp_path / "keep.txt"
+    path.write_text("original\n")
+
+    def boom(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(files.os, "replace", boom)
+    with pytest.raises(OSError):
+        write_file(str(path), "new\n", cache=cache)
+    assert path.read_text() == "original\n"
+    assert os.listdir(tmp_path) == ["keep.txt"]
+
+
+def test_relative_paths_follow_the_shell_cwd(tmp_path, cache):
+    """Test that relative paths resolve against the cwd the shell session cd'd to."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "x.py").write_text("top\n")
+    (tmp_path / "src" / "x.py").write_text("inner\n")
+    session = ShellSession(cwd=str(tmp_path))
+    try:
+        session.run("cd src")
+        cwd = session.cwd
+    finally:
+        session.close()
+
+    assert read_file("x.py", cache=cache, cwd=cwd) == "     1\tinner"
+    assert grep_file("x.py", "inner", cache=cache, cwd=cwd) == "1:inner"
+    write_file("y.py", "new\n", cache=cache, cwd=cwd)
+    assert (tmp_path / "src" / "y.py").read_text() == "new\n"
+    assert read_file(str(tmp_path / "x.py"), cache=cache, cwd=cwd) == "     1\ttop"
@@ -0,0 +1,93 @@
+"""
+Tests for the persistent shell session behind the smol agent's sh tool.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+if shutil.which("bash") is None:
+    pytest.skip("bash is not available", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "smol"))
+
+from shell import ShellPool, ShellSession
+
+
+@pytest.fixture
+def session(tmp_path):
+    with ShellSession(cwd=str(tmp_path)) as s:
+        yield s
+
+
+def test_cd_and_env_persist(session, tmp_path):
+    """Test that directory changes and exports survive between commands."""
+    (tmp_path / "sub").mkdir()
+    session.run("cd sub && export GREETING=hello")
+    result = session.run('echo "$GREETING"; pwd')
+    assert result.output.splitlines() == ["hello", str(tmp_path / "sub")]
+    assert result.cwd == str(tmp_path / "sub")
+
+
+def test_exit_code_and_stderr(session):
+    """Test that stderr is captured and a failing command reports its exit code."""
+    result = session.run("echo out; echo err >&2; exit_with() { return $1; }; exit_with 3")
+    assert result.output.splitlines() == ["out", "err"]
+    assert result.exit_code == 3
+    assert result.for_agent().endswith("[exit 3]")
+    assert session.run("true").exit_code == 0
+
+
+def test_stdin_reader_does_not_hang(session):
+    """Test that a command reading stdin sees EOF instead of the framing script."""
+    result = session.run("cat; echo done", timeout=5)
+    assert result.output == "done\n"
+    assert session.run("echo still-alive").output == "still-alive\n"
+
+
+def test_timeout_restarts_shell(session, tmp_path):
+    """Test that a command past its timeout is killed and the session starts fresh."""
+    session.run("export LOST=1; mkdir -p sub && cd sub")
+    result = session.run("echo before; sleep 30", timeout=0.5)
+    assert result.timed_out
+    assert "before" in result.output
+    assert "timed out" in result.for_agent()
+    after = session.run('echo "${LOST:-unset}"; pwd')
+    assert after.output.splitlines() == ["unset", str(tmp_path)]
+
+
+def test_large_output_is_truncated(session):
+    """Test that runaway output keeps the head and tail and reports what was dropped."""
+    result = session.run("seq 1 200000", max_output=2000)
+    lines = result.output.splitlines()
+    assert lines[0] == "1" and lines[-1] == "200000"
+    assert result.truncated > 1_000_000
+    assert len(result.output) < 2100
+    assert "bytes of output truncated" in result.for_agent()
+
+
+def test_on_output_streams_chunks(session):
+    """Test that on_output receives the output as it is produced."""
+    chunks = []
+    result = session.run("echo one; sleep 0.1; echo two", on_output=chunks.append)
+    assert result.output == "one\ntwo\n"
+    assert b"one" in b"".join(chunks)
+
+
+def test_pool_shares_cwd(tmp_path):
+    """Test that pooled sessions follow the directory the last command left behind."""
+    (tmp_path / "sub").mkdir()
+    with ShellPool(size=2, cwd=str(tmp_path)) as pool:
+        pool.run("cd sub")
+        assert [pool.run("pwd").output.strip() for _ in range(3)] == [str(tmp_path / "sub")] * 3
+
+
+def test_pool_run_in_given_cwd(tmp_path):
+    """Test that an explicit cwd is used for one command without moving the pool."""
+    (tmp_path / "sub").mkdir()
+    with ShellPool(size=1, cwd=str(tmp_path)) as pool:
+        assert pool.run("pwd", cwd=str(tmp_path / "sub")).output.strip() == str(tmp_path / "sub")
+        assert pool.cwd == str(tmp_path)
+        assert pool.run("pwd").output.strip() == str(tmp_path)
@@ -0,0 +1,173 @@
+"""
+Tests for the smol agent's tool executor: command classification, memoization, parallel batches.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts" / "smol"))
+
+from toolexec import ToolExecutor, format_step_report, is_read_only_command
+
+
+@pytest.mark.parametrize("cmd", [
+    "ls -la", "cat a.py | grep -n foo", "rg def src 2>/dev/null", "grep x f 2>&1 | head -5",
+    "git status && git diff HEAD", "sed -n 1,20p f", "find . -name '*.py'", "wc -l < f", "echo 'a > b'",
+    "sed 's/hello/world/g' README.md", "sed -ne '/we/p' notes", "sed -E 's|a/w|b|' f",
+    "sort -nr f", "tree -L 2", "fd -e py", "rg --pretty x", "git log --oneline -5",
+])
+def test_read_only_commands(cmd):
+    """Test that plain inspection commands are read-only."""
+    assert is_read_only_command(cmd)
+
+
+@pytest.mark.parametrize("cmd", [
+    "cd src", "export X=1", "X=1 ls", "ls > out.txt", "echo hi >> log", "sed -i s/a/b/ f", "rm -rf build",
+    "find . -delete", "git commit -m x", "echo $(touch f)", "ls `rm f`", "ls\nrm f", "pip install x",
+    "python script.py", "cat 'unterminated", "uniq in.txt out.txt", "xxd -r dump bin",
+    "sed 's/a/b/w out' f", "sed -n '/x/W out' f", "sed '1e date' f", "sed 's/a/date/e' f",
+    "sed -e p -e 'w out' f", "sed --expression='w out' f", "sed -f script.sed f",
+    "sed -Ei s/a/b/ f", "sed -ni s/a/b/p f", "sed -si s/a/b/ f", "sed --in-place=.bak s/a/b/ f",
+    "sort --output=x a", "sort -uo x a", "tree -o out.txt", "git diff --output=x", "git log --output y",
+    "fd -x rm", "fd --exec rm", "fd -X rm", "rg --pre=./script x", "rg --pre ./script x", "find . -fprint0 out",
+])
+def test_mutating_commands(cmd):
+    """Test that anything that may write or change the session is mutating."""
+    assert not is_read_only_command(cmd)
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return f"result {kwargs}"
+
+
+@pytest.fixture
+def executor():
+    ex = ToolExecutor(max_workers=4)
+    yield ex
+    ex.close()
+
+
+def test_read_only_results_are_memoized_until_a_mutation(executor):
+    """Test that repeated reads hit the memo and a mutating call clears it."""
+    read, write = Recorder(), Recorder()
+    executor.register("read", read, read_only=True)
+    executor.register("write", write)
+
+    assert executor.call("read", path="a") == executor.call("read", path="a")
+    executor.call("read", path="b")
+    assert len(read.calls) == 2
+    executor.call("write", path="a")
+    executor.call("read", path="a")
+    assert len(read.calls) == 3
+
+    report = executor.step_report()
+    assert (report["calls"], report["cached"]) == (5, 1)
+    assert executor.step_report()["calls"] == 0
+
+
+def test_predicate_classifies_per_call(executor):
+    """Test that a read_only predicate decides per call, as for sh."""
+    shell = Recorder()
+    executor.register("sh", shell, read_only=lambda kwargs: is_read_only_command(kwargs["cmd"]))
+    executor.call("sh", cmd="ls")
+    executor.call("sh", cmd="ls")
+    executor.call("sh", cmd="touch f")
+    executor.call("sh", cmd="touch f")
+    executor.call("sh", cmd="ls")
+    assert [c["cmd"] for c in shell.calls] == ["ls", "touch f", "touch f", "ls"]
+
+
+def test_call_many_overlaps_reads_and_orders_writes(executor):
+    """Test that consecutive reads run concurrently and a write is a barrier."""
+    events = []
+    lock = threading.Lock()
+
+    def read(name):
+        with lock:
+            events.append(("start", name))
+        time.sleep(0.2)
+        with lock:
+            events.append(("end", name))
+        return name
+
+    def write(name):
+        with lock:
+            events.append(("write", name))
+        return name
+
+    executor.register("read", read, read_only=True)
+    executor.register("write", write)
+    start = time.perf_counter()
+    results = executor.call_many([
+        ("read", {"name": "r1"}), ("read", {"name": "r2"}), ("read", {"name": "r3"}),
+        ("write", {"name": "w"}), ("read", {"name": "r4"}),
+    ])
+    elapsed = time.perf_counter() - start
+
+    assert results == ["r1", "r2", "r3", "w", "r4"]
+    assert elapsed < 0.55  # two rounds of reads, not four
+    write_at = events.index(("write", "w"))
+    assert {e for e in events[:write_at] if e[0] == "end"} == {("end", "r1"), ("end", "r2"), ("end", "r3")}
+    assert events[write_at + 1] == ("start", "r4")
+
+    report = executor.step_report()
+    assert report["tool_seconds"] > report["wall_seconds"]
+    assert "5 call(s)" in format_step_report(report)
+
+
+def test_call_many_return_exceptions(executor):
+    """Test that failures can be returned in place instead of raised."""
+    def boom(**kwargs):
+        raise ValueError("bad path")
+
+    executor.register("read", Recorder(), read_only=True)
+    executor.register("boom", boom, read_only=True)
+    results = executor.call_many([("read", {"x": 1}), ("boom", {}), ("missing", {})], return_exceptions=True)
+    assert results[0] == "result {'x': 1}"
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], KeyError)
+    with pytest.raises(ValueError):
+        executor.call_many([("boom", {})])
+
+
+def test_read_overlapping_a_write_is_not_memoized(executor):
+    """Test that a read that started before a write finished is not cached afterwards."""
+    started = threading.Event()
+    release = threading.Event()
+    reads = []
+
+    def read():
+        reads.append(1)
+        started.set()
+        release.wait(5)
+        return "old"
+
+    executor.register("read", read, read_only=True)
+    executor.register("write", lambda: None)
+    reader = threading.Thread(target=executor.call, args=("read",))
+    reader.start()
+    started.wait(5)
+    executor.call("write")
+    release.set()
+    reader.join()
+    executor.call("read")
+    assert len(reads) == 2